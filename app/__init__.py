@@ -11,6 +11,10 @@ from flask_login import LoginManager
 from flask_mail import Mail
 from flask_restx import Api
 from flask_cors import CORS
+from werkzeug.middleware.proxy_fix import ProxyFix
+from app.utils.cache import Cache
+from app.utils.compression import Compress
+from app.utils.rate_limit import Limiter
 from datetime import datetime
 import pytz
 
@@ -20,6 +24,9 @@ jwt = JWTManager()
 login_manager = LoginManager()
 mail = Mail()
 cors = CORS()
+cache = Cache()
+compress = Compress()
+limiter = Limiter()
 
 # Define timezone
 timezone = pytz.timezone('Europe/Zurich')
@@ -31,6 +38,12 @@ def create_app(config_name='development'):
     app = Flask(__name__)
     app.config.from_object(config_dict[config_name])
     
+    # Behind a reverse proxy, take the client address from X-Forwarded-For
+    # (rate limits are keyed by it)
+    hops = app.config.get('PROXY_FIX_HOPS', 0)
+    if hops:
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=hops, x_proto=hops, x_host=hops)
+    
     # Initialize extensions
     db.init_app(app)
     migrate.init_app(app, db)
@@ -38,6 +51,9 @@ def create_app(config_name='development'):
     login_manager.init_app(app)
     mail.init_app(app)
     cors.init_app(app)
+    cache.init_app(app)
+    compress.init_app(app)
+    limiter.init_app(app)
     
     # Add template filter for local time
     @app.template_filter('localtime')
@@ -57,8 +73,14 @@ def create_app(config_name='development'):
     # User loader
     @login_manager.user_loader
     def load_user(user_id):
-        from app.models.user import User
-        return User.query.get(int(user_id))
+        from app.services.auth_service import AuthService
+        return AuthService().get_user_by_id(int(user_id))
+    
+    # Reject JWTs issued before a password, role or account status change
+    @jwt.token_in_blocklist_loader
+    def check_token_version(jwt_header, jwt_payload):
+        from app.services.auth_service import AuthService
+        return AuthService().is_token_revoked(jwt_payload)
     
     # Register blueprints
     from app.web import bp as web_bp
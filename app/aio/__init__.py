@@ -0,0 +1,293 @@
+"""
+Async read service (ASGI) for Scooter Share Pro
+
+The hottest read endpoints are coroutines on an asyncio event loop, with
+database I/O through SQLAlchemy's asyncio engine (asyncpg on PostgreSQL,
+aiosqlite on SQLite), so a slow query or a long-poll waiting for a rental to
+end holds no worker thread. Every other request goes to the Flask app
+unchanged, run in a thread pool.
+
+Handlers run inside a Flask request context and reuse the app's config, JWT
+verification, rate limiter, caches, repository statements, read models,
+error handlers and after_request hooks (compression, CORS, rate-limit
+headers); only the queries are awaited. With a Redis cache or rate-limit
+backend, their calls run in short worker-thread hops (``blocking``) so the
+event loop never waits on a socket::
+
+    uvicorn asgi:app --workers 4
+"""
+
+import asyncio
+import io
+import re
+import sys
+import threading
+from contextlib import contextmanager
+from a2wsgi import WSGIMiddleware
+from flask import Response, current_app, request
+from flask_jwt_extended import decode_token, get_jwt, verify_jwt_in_request
+from flask_restx.utils import unpack
+from sqlalchemy.ext.asyncio import create_async_engine
+from werkzeug.middleware.proxy_fix import ProxyFix
+from app.aio.handlers import ROUTES
+from app.aio.streams import EventStream
+from app.repositories.user_repository import UserRepository
+from app.services.auth_service import AuthService, token_version_cache
+from app.signals import rental_started, rental_ended, rental_cancelled
+from app.utils.fast_json import output_json
+from app.utils.jwt_claims import TokenIdentity, current_identity, is_legacy_token
+
+# Sync drivers and the asyncio drivers used in their place
+ASYNC_DRIVERS = (
+    ('postgresql+psycopg2://', 'postgresql+asyncpg://'),
+    ('postgresql://', 'postgresql+asyncpg://'),
+    ('postgres://', 'postgresql+asyncpg://'),
+    ('sqlite://', 'sqlite+aiosqlite://'),
+)
+
+def async_database_url(url: str) -> str:
+    """Map a sync database URL to the same database through an asyncio driver"""
+    for prefix, replacement in ASYNC_DRIVERS:
+        if url.startswith(prefix):
+            return replacement + url[len(prefix):]
+    return url
+
+def build_environ(scope: dict) -> dict:
+    """WSGI environ for a bodiless ASGI HTTP request"""
+    root_path = scope.get('root_path', '')
+    path = scope['path']
+    if root_path and path.startswith(root_path):
+        path = path[len(root_path):]
+    server = scope.get('server') or ('localhost', 80)
+    client = scope.get('client') or ('', 0)
+
+    environ = {
+        'REQUEST_METHOD': scope['method'],
+        'SCRIPT_NAME': root_path.encode('utf8').decode('latin1'),
+        'PATH_INFO': path.encode('utf8').decode('latin1'),
+        'QUERY_STRING': scope['query_string'].decode('latin1'),
+        'SERVER_NAME': server[0],
+        'SERVER_PORT': str(server[1]),
+        'SERVER_PROTOCOL': f"HTTP/{scope.get('http_version', '1.1')}",
+        'REMOTE_ADDR': client[0],
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': scope.get('scheme', 'http'),
+        'wsgi.input': io.BytesIO(),
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': True,
+        'wsgi.run_once': False
+    }
+
+    for name, value in scope.get('headers', ()):
+        name = name.decode('latin1').upper().replace('-', '_')
+        if name not in ('CONTENT_TYPE', 'CONTENT_LENGTH'):
+            name = f'HTTP_{name}'
+        value = value.decode('latin1')
+        environ[name] = f'{environ[name]},{value}' if name in environ else value
+
+    return environ
+
+class AsyncReadService:
+    """ASGI app serving ROUTES asynchronously and mounting Flask for the rest"""
+
+    def __init__(self, flask_app, engine=None):
+        self.flask_app = flask_app
+        config = flask_app.config
+
+        self.wsgi = WSGIMiddleware(flask_app, workers=config.get('ASYNC_WSGI_THREADS', 40))
+        self.engine = engine or create_async_engine(
+            config.get('ASYNC_DATABASE_URL') or async_database_url(config['SQLALCHEMY_DATABASE_URI']),
+            pool_pre_ping=True
+        )
+        self.routes = [(re.compile(pattern), handler) for pattern, handler in ROUTES]
+
+        # Redis cache/limiter calls are blocking socket round-trips
+        self.offload = 'redis' in (config.get('CACHE_BACKEND'), config.get('RATELIMIT_BACKEND'))
+
+        # Same X-Forwarded-* handling as create_app applies to the Flask app
+        hops = config.get('PROXY_FIX_HOPS', 0)
+        self.proxy_fix = ProxyFix(lambda environ, start_response: environ, x_for=hops,
+                                  x_proto=hops, x_host=hops) if hops else None
+
+        # Open event streams in this worker (capped by SCOOTER_STREAM_MAX_CLIENTS)
+        self.open_streams = 0
+
+        # Long-polls waiting on a rental: rental_id -> {(loop, asyncio.Event)}
+        self._rental_waiters = {}
+        self._waiters_lock = threading.Lock()
+        for signal in (rental_started, rental_ended, rental_cancelled):
+            signal.connect(self._on_rental_changed)
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self._lifespan(receive, send)
+            return
+
+        if scope['type'] == 'http' and scope['method'] in ('GET', 'HEAD'):
+            for pattern, handler in self.routes:
+                match = pattern.fullmatch(scope['path'])
+                if match:
+                    await self._dispatch(handler, match.groupdict(), scope, receive, send)
+                    return
+
+        await self.wsgi(scope, receive, send)
+
+    async def _dispatch(self, handler, params: dict, scope: dict, receive, send):
+        app = self.flask_app
+        environ = build_environ(scope)
+        if self.proxy_fix:
+            environ = self.proxy_fix(environ, None)
+        stream = None
+
+        # A context pushed in this task is private to it (contextvars)
+        with app.request_context(environ):
+            try:
+                result = await handler(self, **params)
+                if isinstance(result, EventStream):
+                    stream, result = result, result.response()
+                response = self._make_response(result)
+            except Exception as e:
+                if stream is not None:
+                    stream.close()
+                    stream = None
+                response = app.make_response(self._handle_exception(e))
+            response = app.process_response(response)
+            headers = response.get_wsgi_headers(environ)
+            body = b'' if stream or scope['method'] == 'HEAD' else response.get_data()
+            response.close()
+
+        await send({
+            'type': 'http.response.start',
+            'status': response.status_code,
+            'headers': [(name.lower().encode('latin1'), value.encode('latin1'))
+                        for name, value in headers.items()]
+        })
+        if stream is not None:
+            await self._send_stream(stream, receive, send)
+        else:
+            await send({'type': 'http.response.body', 'body': body})
+
+    async def _send_stream(self, stream: 'EventStream', receive, send):
+        # Pump the body until the client disconnects; no thread is held meanwhile
+        async def pump():
+            async for chunk in stream.body:
+                await send({'type': 'http.response.body', 'body': chunk, 'more_body': True})
+            await send({'type': 'http.response.body', 'body': b''})
+
+        async def disconnected():
+            while (await receive())['type'] != 'http.disconnect':
+                pass
+
+        self.open_streams += 1
+        tasks = (asyncio.ensure_future(pump()), asyncio.ensure_future(disconnected()))
+        try:
+            await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            await stream.body.aclose()
+            stream.close()
+            self.open_streams -= 1
+
+    @staticmethod
+    def _make_response(result) -> Response:
+        # Encode like the API's representation (fast_json), so both paths send the same bytes
+        if isinstance(result, Response):
+            return result
+        data, code, headers = unpack(result)
+        if isinstance(data, Response):
+            return data
+        return output_json(data, code, headers)
+
+    def _handle_exception(self, e):
+        # Registered handlers first (JWT errors, HTTP errors), then the 500 path
+        try:
+            return self.flask_app.handle_user_exception(e)
+        except Exception as unhandled:
+            return self.flask_app.handle_exception(unhandled)
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                await self.engine.dispose()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    async def fetch_all(self, stmt) -> list:
+        """Run a statement on the async engine and return all rows"""
+        async with self.engine.connect() as connection:
+            return (await connection.execute(stmt)).all()
+
+    async def fetch_one(self, stmt):
+        """Run a statement on the async engine and return the first row or None"""
+        async with self.engine.connect() as connection:
+            return (await connection.execute(stmt)).first()
+
+    async def blocking(self, func, *args, **kwargs):
+        """
+        Call a cache, rate limiter or JWT function. With a Redis backend it runs
+        in a worker thread (which sees the request context), off the event loop.
+        """
+        if not self.offload:
+            return func(*args, **kwargs)
+        return await asyncio.to_thread(func, *args, **kwargs)
+
+    async def authenticate(self):
+        """
+        Verify the request's access token like @jwt_required() and return its
+        TokenIdentity. The revocation check is served from token_version_cache,
+        which is filled here with an awaited query, never a blocking one.
+        """
+        user_id = self._token_identity()
+        if user_id is not None and await self.blocking(token_version_cache.get, user_id) is None:
+            state = await self.fetch_one(UserRepository.token_state_stmt(user_id))
+            await self.blocking(AuthService.cache_token_version, user_id, state)
+
+        await self.blocking(verify_jwt_in_request)
+        claims = get_jwt()
+        if is_legacy_token(claims):
+            state = await self.fetch_one(UserRepository.token_state_stmt(user_id))
+            return TokenIdentity(user_id, state.role if state else None,
+                                 bool(state and state.is_active))
+        return current_identity()
+
+    def _token_identity(self):
+        scheme, _, token = request.headers.get('Authorization', '').partition(' ')
+        if scheme != 'Bearer' or not token:
+            return None
+        try:
+            payload = decode_token(token)
+        except Exception:
+            return None  # verify_jwt_in_request reports it
+        return payload.get(current_app.config.get('JWT_IDENTITY_CLAIM', 'sub'))
+
+    @contextmanager
+    def watch_rental(self, rental_id: int):
+        """Yield an asyncio.Event set when this worker starts, ends or cancels the rental"""
+        waiter = (asyncio.get_running_loop(), asyncio.Event())
+        with self._waiters_lock:
+            self._rental_waiters.setdefault(rental_id, set()).add(waiter)
+        try:
+            yield waiter[1]
+        finally:
+            with self._waiters_lock:
+                waiters = self._rental_waiters.get(rental_id)
+                waiters.discard(waiter)
+                if not waiters:
+                    del self._rental_waiters[rental_id]
+
+    def _on_rental_changed(self, rental, **extra):
+        # Sent from Flask threads after commit
+        with self._waiters_lock:
+            waiters = tuple(self._rental_waiters.get(rental.id, ()))
+        for loop, event in waiters:
+            loop.call_soon_threadsafe(event.set)
+
+def create_asgi_app(flask_app, engine=None) -> AsyncReadService:
+    """Build the ASGI application around a Flask app"""
+    return AsyncReadService(flask_app, engine)
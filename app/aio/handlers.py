@@ -0,0 +1,176 @@
+"""
+Async handlers of the read service
+
+Each handler mirrors the Flask endpoint at the same path (same parameters,
+caching validators and payload), building its queries with the repositories'
+statement helpers and awaiting them on the service's engine.
+"""
+
+import asyncio
+from flask import current_app, request
+from app import limiter
+from app.aio.streams import EventStream
+from app.api.scooters import NEARBY_RATE_LIMIT
+from app.models.read_models import RentalView, ScooterView
+from app.models.rental import Rental
+from app.models.scooter import Scooter
+from app.repositories.rental_repository import RentalRepository
+from app.repositories.scooter_repository import ScooterRepository
+from app.services.rental_service import RentalService
+from app.services.scooter_service import ScooterService, scooter_cache
+from app.utils.fast_json import sse_event
+from app.utils.fieldsets import fields_from_request
+from app.utils.http_cache import make_etag, async_conditional_response
+
+async def available_scooters(service):
+    """GET /api/scooters/available"""
+    await service.authenticate()
+    limit = request.args.get('limit', 100, type=int)
+
+    fields, error = fields_from_request(Scooter.serialized_fields)
+    if error:
+        return {'message': error}, 400
+
+    version = tuple(await service.fetch_one(ScooterRepository.available_version_stmt()))
+    etag = make_etag('scooters-available', limit, ','.join(sorted(fields or ())), *version)
+
+    async def build_payload():
+        # Same cache entries as the Flask endpoint
+        key = ScooterService.available_cache_key(limit, version)
+        data = await service.blocking(scooter_cache.get, key)
+        if data is None:
+            rows = await service.fetch_all(ScooterRepository.available_views_stmt(limit))
+            data = [s.to_dict() for s in ScooterView.from_rows(rows)]
+            await service.blocking(scooter_cache.set, key, data,
+                                   ttl=current_app.config.get('SCOOTER_CACHE_TTL', 10))
+        return ScooterService.pick_fields(data, fields)
+
+    return await async_conditional_response(etag, version[1], build_payload)
+
+async def nearby_scooters(service):
+    """GET /api/scooters/nearby"""
+    await service.authenticate()
+
+    rejected = await service.blocking(limiter.hit, **NEARBY_RATE_LIMIT)
+    if rejected:
+        return rejected
+
+    latitude = request.args.get('latitude', type=float)
+    longitude = request.args.get('longitude', type=float)
+    radius = request.args.get('radius', 5.0, type=float)
+    limit = request.args.get('limit', 50, type=int)
+
+    if latitude is None or longitude is None:
+        return {'message': 'Latitude and longitude are required'}, 400
+
+    fields, error = fields_from_request(Scooter.serialized_fields)
+    if error:
+        return {'message': error}, 400
+
+    rows = await service.fetch_all(ScooterRepository.nearby_views_stmt(
+        latitude, longitude, radius, limit, Scooter.serialized_fields.columns(fields)))
+    scooters = ScooterService.order_by_distance(ScooterView.from_rows(rows), latitude, longitude)
+
+    return [s.to_dict(fields) for s in scooters]
+
+async def active_rentals(service):
+    """GET /api/rentals/active"""
+    user = await service.authenticate()
+
+    fields, error = fields_from_request(Rental.serialized_fields)
+    if error:
+        return {'message': error}, 400
+
+    scope_user_id = None if user.is_admin() else user.id
+    version = RentalService.live_version(
+        *await service.fetch_one(RentalRepository.active_version_stmt(scope_user_id)))
+    etag = make_etag('rentals-active', scope_user_id or 'all', ','.join(sorted(fields or ())), *version)
+
+    async def build_payload():
+        # Admins see up to 100 active rentals, everyone else their own
+        rows = await service.fetch_all(
+            RentalRepository.active_views_stmt(scope_user_id, 100 if scope_user_id is None else 1))
+        return [r.to_dict(fields) for r in RentalView.from_rows(rows)]
+
+    return await async_conditional_response(etag, version[1], build_payload)
+
+async def rental_status(service, rental_id: str):
+    """
+    GET /api/rentals/<id>/status
+    With ?status=<known>&wait=<seconds>, answers once the status differs from
+    the known one or the wait ends. Changes made by this worker wake the poll
+    at once; changes from other workers are seen by re-reading every
+    RENTAL_STATUS_POLL_INTERVAL seconds.
+    """
+    user = await service.authenticate()
+    stmt = RentalRepository.status_stmt(int(rental_id))
+
+    row = await service.fetch_one(stmt)
+
+    if not row:
+        return {'message': 'Rental not found'}, 404
+
+    if not RentalService.can_view_status(row, user):
+        return {'message': 'Not authorized to access this rental'}, 403
+
+    config = current_app.config
+    known = request.args.get('status')
+    wait = min(max(request.args.get('wait', 0.0, type=float), 0.0),
+               config.get('RENTAL_STATUS_MAX_WAIT', 60))
+    interval = config.get('RENTAL_STATUS_POLL_INTERVAL', 5)
+
+    if known and wait and row.status == known:
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + wait
+
+        with service.watch_rental(row.id) as changed:
+            while row.status == known:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    await asyncio.wait_for(changed.wait(), min(remaining, interval))
+                except asyncio.TimeoutError:
+                    pass
+                changed.clear()
+                row = await service.fetch_one(stmt) or row
+
+    return RentalService.status_payload(row)
+
+async def _scooter_events(subscription, keepalive: float):
+    # Same frames as the Flask stream, awaited instead of blocking a thread
+    yield b'retry: 3000\n\n'
+    while True:
+        events = await subscription.wait_async(keepalive)
+        if subscription.lagged:
+            subscription.lagged = False
+            yield sse_event({}, 'resync')
+        yield b''.join(events) if events else b': keepalive\n\n'
+
+async def scooter_stream(service):
+    """
+    GET /api/scooters/stream
+    Each open stream is a coroutine waiting on the worker's SpatialHub, so it
+    holds no thread; SCOOTER_STREAM_MAX_CLIENTS caps them per worker.
+    """
+    await service.authenticate()
+    config = current_app.config
+
+    if service.open_streams >= config.get('SCOOTER_STREAM_MAX_CLIENTS', 10000):
+        return {'message': 'Too many open streams, retry later'}, 503, {'Retry-After': '30'}
+
+    subscription, error = ScooterService().subscribe_to_changes(request.args.get('bbox'))
+    if error:
+        return {'message': error}, 400
+
+    keepalive = config.get('SCOOTER_STREAM_KEEPALIVE', 15)
+    return EventStream(_scooter_events(subscription, keepalive), subscription.close)
+
+# (path pattern, handler); named groups become handler arguments
+ROUTES = (
+    (r'/api/scooters/available', available_scooters),
+    (r'/api/scooters/nearby', nearby_scooters),
+    (r'/api/scooters/stream', scooter_stream),
+    (r'/api/rentals/active', active_rentals),
+    (r'/api/rentals/(?P<rental_id>\d+)/status', rental_status),
+)
@@ -0,0 +1,26 @@
+"""
+Streaming responses of the async read service
+"""
+
+from flask import Response
+
+class EventStream:
+    """
+    Handler result for a text/event-stream response: body is an async
+    generator of encoded frames, close runs once the stream ends.
+    """
+
+    def __init__(self, body, close=None):
+        self.body = body
+        self._close = close
+
+    def response(self) -> Response:
+        # Headers only; an iterator body keeps Content-Length unset
+        return Response(iter(()), mimetype='text/event-stream',
+                        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+    def close(self):
+        """Release the stream's resources (idempotent)"""
+        if self._close is not None:
+            self._close()
+            self._close = None
@@ -4,6 +4,7 @@ API Blueprint for RESTful endpoints
 
 from flask import Blueprint
 from flask_restx import Api
+from app.utils.fast_json import output_json
 
 bp = Blueprint('api', __name__)
 
@@ -16,25 +17,37 @@ api = Api(
     doc='/api/docs/'
 )
 
+# Encode responses with orjson when available (see app.utils.fast_json)
+api.representations['application/json'] = output_json
+
 # Import and register API routes
 from .auth import auth_ns
 from .scooters import scooters_ns
 from .rentals import rentals_ns
 from .users import users_ns
+from .payments import payments_ns
 from .debug import debug_ns
+from .analytics import analytics_ns
+from .batch import batch_ns
 
 # Register all namespaces
 api.add_namespace(auth_ns, path='/auth')
 api.add_namespace(scooters_ns, path='/scooters')
 api.add_namespace(rentals_ns, path='/rentals')
 api.add_namespace(users_ns, path='/users')
+api.add_namespace(payments_ns, path='/payments')
 api.add_namespace(debug_ns, path='/debug')
+api.add_namespace(analytics_ns, path='/analytics')
+api.add_namespace(batch_ns, path='/batch')
 
 # Export namespaces for documentation
 from app.api.auth import auth_ns
 from app.api.scooters import scooters_ns
 from app.api.rentals import rentals_ns
 from app.api.users import users_ns
+from app.api.payments import payments_ns
 from app.api.debug import debug_ns
+from app.api.analytics import analytics_ns
+from app.api.batch import batch_ns
 
-__all__ = ['bp', 'auth_ns', 'scooters_ns', 'rentals_ns', 'users_ns', 'debug_ns']
+__all__ = ['bp', 'auth_ns', 'scooters_ns', 'rentals_ns', 'users_ns', 'payments_ns', 'debug_ns', 'analytics_ns', 'batch_ns']
@@ -0,0 +1,158 @@
+"""
+Analytics API endpoints
+"""
+
+from datetime import datetime, timedelta
+from flask import Blueprint, request
+from flask_restx import Namespace, Resource
+from flask_jwt_extended import jwt_required
+from app.services.analytics_service import AnalyticsService
+from app.utils.jwt_claims import current_identity
+
+# Flask Blueprint for API routes
+bp = Blueprint('analytics_api', __name__)
+
+# Flask-RESTX Namespace for documentation
+analytics_ns = Namespace('analytics', description='Fleet analytics operations')
+
+analytics_service = AnalyticsService()
+
+MAX_WINDOW_DAYS = 366
+
+# Rider counts merge one stored sketch per day, so longer trends stay cheap
+MAX_RIDER_WINDOW_DAYS = 3 * 366
+
+def _resolve_provider_scope(user):
+    """
+    Resolve which provider's fleet the user may analyse
+    Returns: (provider_id, error_response)
+    """
+    if user.is_admin():
+        return request.args.get('provider_id', type=int), None
+
+    if user.is_provider():
+        return user.id, None
+
+    return None, ({'message': 'Provider or admin access required'}, 403)
+
+def _resolve_date_range(max_days=MAX_WINDOW_DAYS):
+    """
+    Parse start_date/end_date (YYYY-MM-DD) or fall back to the last `days` days
+    The range may span at most max_days days.
+    Returns: (start_day, end_day, error_response)
+    """
+    try:
+        end_arg = request.args.get('end_date')
+        end_day = datetime.strptime(end_arg, '%Y-%m-%d').date() if end_arg \
+            else datetime.utcnow().date()
+
+        start_arg = request.args.get('start_date')
+        if start_arg:
+            start_day = datetime.strptime(start_arg, '%Y-%m-%d').date()
+        else:
+            days = request.args.get('days', 30, type=int)
+            if not (1 <= days <= max_days):
+                return None, None, ({'message': f'days must be between 1 and {max_days}'}, 400)
+            start_day = end_day - timedelta(days=days - 1)
+    except ValueError:
+        return None, None, ({'message': 'Dates must use the format YYYY-MM-DD'}, 400)
+    except OverflowError:
+        return None, None, ({'message': 'Date range is out of bounds'}, 400)
+
+    if start_day > end_day:
+        return None, None, ({'message': 'start_date must not be after end_date'}, 400)
+    if (end_day - start_day).days >= max_days:
+        return None, None, ({'message': f'Date range must not exceed {max_days} days'}, 400)
+
+    return start_day, end_day, None
+
+@analytics_ns.route('/utilization')
+class FleetUtilization(Resource):
+    @jwt_required()
+    @analytics_ns.response(200, 'Success')
+    @analytics_ns.response(400, 'Invalid parameters')
+    @analytics_ns.response(403, 'Forbidden')
+    def get(self):
+        """Get fleet utilization by scooter, provider and hour of week"""
+        user = current_identity()
+
+        provider_id, error = _resolve_provider_scope(user)
+        if error:
+            return error
+
+        days = request.args.get('days', 30, type=int)
+        top = request.args.get('top', 20, type=int)
+
+        if not (1 <= days <= MAX_WINDOW_DAYS):
+            return {'message': f'days must be between 1 and {MAX_WINDOW_DAYS}'}, 400
+        if top < 1:
+            return {'message': 'top must be at least 1'}, 400
+
+        return analytics_service.get_fleet_utilization(days=days, provider_id=provider_id, top=top)
+
+@analytics_ns.route('/percentiles')
+class RentalPercentiles(Resource):
+    @jwt_required()
+    @analytics_ns.response(200, 'Success')
+    @analytics_ns.response(400, 'Invalid parameters')
+    @analytics_ns.response(403, 'Forbidden')
+    def get(self):
+        """Get p50/p90/p99 rental duration and cost for a date range"""
+        user = current_identity()
+
+        provider_id, error = _resolve_provider_scope(user)
+        if error:
+            return error
+
+        start_day, end_day, error = _resolve_date_range()
+        if error:
+            return error
+
+        return analytics_service.get_rental_percentiles(start_day, end_day, provider_id)
+
+@analytics_ns.route('/active-riders')
+class ActiveRiders(Resource):
+    @jwt_required()
+    @analytics_ns.response(200, 'Success')
+    @analytics_ns.response(400, 'Invalid parameters')
+    @analytics_ns.response(403, 'Forbidden')
+    def get(self):
+        """Get approximate distinct active riders per day, week or month"""
+        user = current_identity()
+
+        provider_id, error = _resolve_provider_scope(user)
+        if error:
+            return error
+
+        start_day, end_day, error = _resolve_date_range(max_days=MAX_RIDER_WINDOW_DAYS)
+        if error:
+            return error
+
+        granularity = request.args.get('granularity', 'day')
+        if granularity not in ('day', 'week', 'month'):
+            return {'message': 'granularity must be one of: day, week, month'}, 400
+
+        return analytics_service.get_active_riders(start_day, end_day, provider_id, granularity)
+
+@analytics_ns.route('/cohorts')
+class RiderCohorts(Resource):
+    @jwt_required()
+    @analytics_ns.response(200, 'Success')
+    @analytics_ns.response(400, 'Invalid parameters')
+    @analytics_ns.response(403, 'Forbidden')
+    def get(self):
+        """Get weekly sign-up cohorts with week-N retention (admin only)"""
+        user = current_identity()
+
+        if not user.is_admin():
+            return {'message': 'Admin access required'}, 403
+
+        weeks = request.args.get('weeks', 12, type=int)
+        max_offset = request.args.get('max_offset', 12, type=int)
+
+        if not (1 <= weeks <= 104):
+            return {'message': 'weeks must be between 1 and 104'}, 400
+        if not (0 <= max_offset <= 104):
+            return {'message': 'max_offset must be between 0 and 104'}, 400
+
+        return analytics_service.get_cohort_retention(weeks=weeks, max_offset=max_offset)
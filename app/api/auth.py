@@ -5,7 +5,9 @@ Authentication API endpoints
 from flask import Blueprint, request
 from flask_restx import Namespace, Resource, fields
 from flask_jwt_extended import create_access_token, create_refresh_token, jwt_required, get_jwt_identity
+from app import limiter
 from app.services.auth_service import AuthService
+from app.utils.jwt_claims import user_claims
 
 # Flask Blueprint for API routes
 bp = Blueprint('auth_api', __name__)
@@ -37,6 +39,7 @@ token_model = auth_ns.model('Token', {
 
 @auth_ns.route('/register')
 class Register(Resource):
+    @limiter.limit('5/minute', key='ip', scope='register')
     @auth_ns.expect(register_model)
     @auth_ns.response(201, 'User registered successfully')
     @auth_ns.response(400, 'Validation error')
@@ -56,8 +59,9 @@ class Register(Resource):
         if error:
             return {'message': error}, 400
         
-        access_token = create_access_token(identity=user.id)
-        refresh_token = create_refresh_token(identity=user.id)
+        claims = user_claims(user)
+        access_token = create_access_token(identity=user.id, additional_claims=claims)
+        refresh_token = create_refresh_token(identity=user.id, additional_claims=claims)
         
         return {
             'message': 'User registered successfully',
@@ -68,6 +72,7 @@ class Register(Resource):
 
 @auth_ns.route('/login')
 class Login(Resource):
+    @limiter.limit('10/minute', key='ip', scope='login')
     @auth_ns.expect(login_model)
     @auth_ns.marshal_with(token_model)
     @auth_ns.response(200, 'Login successful')
@@ -84,8 +89,9 @@ class Login(Resource):
         if error:
             return {'message': error}, 401
         
-        access_token = create_access_token(identity=user.id)
-        refresh_token = create_refresh_token(identity=user.id)
+        claims = user_claims(user)
+        access_token = create_access_token(identity=user.id, additional_claims=claims)
+        refresh_token = create_refresh_token(identity=user.id, additional_claims=claims)
         
         return {
             'access_token': access_token,
@@ -97,10 +103,17 @@ class Login(Resource):
 class RefreshToken(Resource):
     @jwt_required(refresh=True)
     @auth_ns.response(200, 'Token refreshed')
+    @auth_ns.response(401, 'Account is deactivated')
     def post(self):
         """Refresh access token"""
         current_user_id = get_jwt_identity()
-        access_token = create_access_token(identity=current_user_id)
+        user = auth_service.get_user_by_id(current_user_id)
+        
+        if not user or not user.is_active:
+            return {'message': 'Account is deactivated'}, 401
+        
+        access_token = create_access_token(identity=current_user_id,
+                                           additional_claims=user_claims(user))
         
         return {'access_token': access_token}
 
@@ -137,8 +150,9 @@ def register():
     if error:
         return {'message': error}, 400
     
-    access_token = create_access_token(identity=user.id)
-    refresh_token = create_refresh_token(identity=user.id)
+    claims = user_claims(user)
+    access_token = create_access_token(identity=user.id, additional_claims=claims)
+    refresh_token = create_refresh_token(identity=user.id, additional_claims=claims)
     
     return {
         'message': 'User registered successfully',
@@ -160,8 +174,9 @@ def login():
     if error:
         return {'message': error}, 401
     
-    access_token = create_access_token(identity=user.id)
-    refresh_token = create_refresh_token(identity=user.id)
+    claims = user_claims(user)
+    access_token = create_access_token(identity=user.id, additional_claims=claims)
+    refresh_token = create_refresh_token(identity=user.id, additional_claims=claims)
     
     return {
         'access_token': access_token,
@@ -0,0 +1,134 @@
+"""
+Batch API endpoint
+
+Runs several read-only sub-requests in one HTTP call, e.g. everything the
+mobile app needs on start. Sub-requests are dispatched in-process through the
+normal routing, auth and error handling, inside the batch's app context, so
+they share its JWT, database session and per-request user memo. JSON bodies
+are spliced into the combined response without being decoded again.
+"""
+
+import re
+from flask import Blueprint, Response, current_app, request
+from flask_restx import Namespace, Resource, fields
+from flask_jwt_extended import jwt_required
+from werkzeug.exceptions import HTTPException
+from werkzeug.test import EnvironBuilder
+from app import db
+from app.utils.fast_json import dumps
+
+# Flask Blueprint for API routes
+bp = Blueprint('batch_api', __name__)
+
+# Flask-RESTX Namespace for documentation
+batch_ns = Namespace('batch', description='Batched read requests')
+
+# Outer request headers every sub-request inherits
+FORWARDED_HEADERS = ('Authorization', 'Accept-Language', 'User-Agent')
+
+# Sub-response headers passed back to the client
+RETURNED_HEADERS = ('ETag', 'Last-Modified', 'Cache-Control', 'Location')
+
+sub_request_model = batch_ns.model('BatchSubRequest', {
+    'id': fields.String(description='Client key echoed in the response (defaults to the index)'),
+    'path': fields.String(required=True, description='API path with query string, e.g. /api/users/me'),
+    'method': fields.String(description='Only GET is supported', default='GET'),
+    'headers': fields.Raw(description='Extra headers, e.g. If-None-Match')
+})
+
+batch_model = batch_ns.model('Batch', {
+    'requests': fields.List(fields.Nested(sub_request_model), required=True)
+})
+
+def _validate(sub_requests):
+    """Return an error message for a malformed batch, else None"""
+    limit = current_app.config.get('API_BATCH_MAX_REQUESTS', 20)
+
+    if not isinstance(sub_requests, list) or not sub_requests:
+        return 'requests must be a non-empty list'
+    if len(sub_requests) > limit:
+        return f'At most {limit} requests per batch'
+
+    for sub in sub_requests:
+        if not isinstance(sub, dict) or not isinstance(sub.get('path'), str):
+            return 'Every request needs a path'
+        # Routing merges repeated slashes, so '/api//batch' is the batch endpoint too
+        route = re.sub('/{2,}', '/', sub['path'].split('?')[0]).rstrip('/')
+        if not sub['path'].startswith('/api/') or route == '/api/batch':
+            return f"Invalid path: {sub['path']}"
+        if str(sub.get('method', 'GET')).upper() != 'GET':
+            return 'Only GET requests can be batched'
+        if not isinstance(sub.get('headers', {}), dict):
+            return 'headers must be an object'
+
+    return None
+
+def _dispatch(sub: dict):
+    """Run one sub-request through the app and return its response"""
+    headers = {name: request.headers[name] for name in FORWARDED_HEADERS if name in request.headers}
+    headers.update(sub.get('headers') or {})
+    # Bodies are spliced into the batch as JSON, so sub-responses stay uncompressed
+    headers['Accept-Encoding'] = 'identity'
+
+    builder = EnvironBuilder(path=sub['path'], base_url=request.root_url, headers=headers,
+                             environ_base={'REMOTE_ADDR': request.remote_addr})
+    try:
+        # Pushed inside the current app context, which the sub-request reuses
+        with current_app.request_context(builder.get_environ()):
+            try:
+                response = current_app.full_dispatch_request()
+            except HTTPException as e:
+                # Routing redirects (e.g. merged slashes) escape the error handlers
+                response = e.get_response()
+            except Exception:
+                current_app.logger.exception('Batch sub-request %s failed', sub['path'])
+                db.session.rollback()
+                response = current_app.response_class(dumps({'error': 'Internal server error'}),
+                                                      500, mimetype='application/json')
+            if response.mimetype == 'text/event-stream':
+                # Endless streams would never finish; refuse them
+                response.close()
+                response = current_app.response_class(
+                    dumps({'message': 'Event streams cannot be batched'}), 400,
+                    mimetype='application/json')
+            # Drain streamed bodies while the sub-request context is active
+            response.get_data()
+            return response
+    finally:
+        builder.close()
+
+def _encode_result(key, response) -> bytes:
+    """Encode one entry of the combined response"""
+    entry = {'id': key, 'status': response.status_code}
+    returned = {name: response.headers[name] for name in RETURNED_HEADERS if name in response.headers}
+    if returned:
+        entry['headers'] = returned
+
+    body = response.get_data()
+    if not body:
+        body = b'null'
+    elif not response.is_json:
+        body = dumps(body.decode('utf-8', 'replace'))
+
+    # Splice the already encoded body in as the last member
+    return dumps(entry)[:-1] + b',"body":' + body + b'}'
+
+@batch_ns.route('')
+class Batch(Resource):
+    @jwt_required()
+    @batch_ns.expect(batch_model)
+    @batch_ns.response(200, 'Combined responses, one per sub-request in order')
+    @batch_ns.response(400, 'Validation error')
+    def post(self):
+        """Run several GET requests in one call"""
+        data = request.get_json(silent=True) or {}
+        sub_requests = data.get('requests')
+
+        error = _validate(sub_requests)
+        if error:
+            return {'message': error}, 400
+
+        results = [_encode_result(sub.get('id', index), _dispatch(sub))
+                   for index, sub in enumerate(sub_requests)]
+
+        return Response(b'{"responses":[' + b','.join(results) + b']}', mimetype='application/json')
@@ -4,9 +4,10 @@ Debug API endpoints for troubleshooting
 
 from flask import jsonify, request
 from flask_restx import Namespace, Resource
-from app import db
+from app import db, cache
 from sqlalchemy import text
 from flask_jwt_extended import jwt_required, get_jwt_identity
+from app.utils.jwt_claims import current_identity
 
 debug_ns = Namespace('debug', description='Debug endpoints')
 
@@ -128,3 +129,18 @@ class RatingTest(Resource):
                 'error': str(e),
                 'message': 'Failed to add test rating'
             }), 500
+
+@debug_ns.route('/cache')
+class CacheStats(Resource):
+    @jwt_required()
+    @debug_ns.response(200, 'Success')
+    @debug_ns.response(403, 'Forbidden')
+    def get(self):
+        """Cache backend and hit/miss counters per namespace (admin only)"""
+        if not current_identity().is_admin():
+            return {'message': 'Admin access required'}, 403
+        
+        return {
+            'backend': type(cache.backend).__name__,
+            'namespaces': cache.stats()
+        }
@@ -0,0 +1,78 @@
+"""
+Payment API endpoints
+"""
+
+from flask import Blueprint, request
+from flask_restx import Namespace, Resource
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from app.models.payment import Payment
+from app.services.payment_service import PaymentService
+from app.utils.fast_json import stream_json_array
+from app.utils.fieldsets import fields_from_request
+from app.utils.jwt_claims import current_identity
+
+# Flask Blueprint for API routes
+bp = Blueprint('payments_api', __name__)
+
+# Flask-RESTX Namespace for documentation
+payments_ns = Namespace('payments', description='Payment operations')
+
+payment_service = PaymentService()
+
+@payments_ns.route('/')
+class PaymentList(Resource):
+    @jwt_required()
+    @payments_ns.response(200, 'Success')
+    def get(self):
+        """Get payments (?cursor= for keyset pages with next_cursor, ?fields= for a sparse fieldset)"""
+        current_user_id = get_jwt_identity()
+        user = current_identity()
+        
+        limit = request.args.get('limit', 100, type=int)
+        status = request.args.get('status')
+        
+        fields, error = fields_from_request(Payment.serialized_fields)
+        if error:
+            return {'message': error}, 400
+        columns = Payment.serialized_fields.columns(fields)
+        
+        # Admins list every payment, everyone else their own
+        user_id = request.args.get('user_id', type=int) if user.is_admin() else current_user_id
+        
+        if 'cursor' in request.args:
+            try:
+                payments, next_cursor = payment_service.get_payments_page(
+                    limit, request.args['cursor'], user_id=user_id, status=status, columns=columns)
+            except ValueError as e:
+                return {'message': str(e)}, 400
+            return {'items': [p.to_dict(fields=fields) for p in payments], 'next_cursor': next_cursor}
+        
+        # Streamed from the cursor in batches: memory stays flat whatever the limit
+        payments = payment_service.iter_payment_views(user_id, status, columns, limit)
+        
+        return stream_json_array(payments, lambda p: p.to_dict(fields))
+
+@payments_ns.route('/export')
+class PaymentExport(Resource):
+    @jwt_required()
+    @payments_ns.response(200, 'Success')
+    @payments_ns.response(403, 'Forbidden')
+    def get(self):
+        """Export all payments as a streamed JSON array (admin only; ?user_id=, ?status=, ?fields=)"""
+        user = current_identity()
+        
+        if not user.is_admin():
+            return {'message': 'Admin access required'}, 403
+        
+        fields, error = fields_from_request(Payment.serialized_fields)
+        if error:
+            return {'message': error}, 400
+        
+        payments = payment_service.iter_payment_views(
+            request.args.get('user_id', type=int),
+            request.args.get('status'),
+            Payment.serialized_fields.columns(fields)
+        )
+        
+        return stream_json_array(payments, lambda p: p.to_dict(fields),
+                                 headers={'Content-Disposition': 'attachment; filename=payments.json'})
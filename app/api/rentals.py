@@ -5,8 +5,12 @@ Rental API endpoints
 from flask import Blueprint, request
 from flask_restx import Namespace, Resource, fields
 from flask_jwt_extended import jwt_required, get_jwt_identity
+from app.models.rental import Rental
 from app.services.rental_service import RentalService
-from app.services.auth_service import AuthService
+from app.utils.fast_json import stream_json_array
+from app.utils.fieldsets import fields_from_request
+from app.utils.jwt_claims import current_identity
+from app.utils.http_cache import make_etag, conditional_response
 
 # Flask Blueprint for API routes
 bp = Blueprint('rentals_api', __name__)
@@ -15,7 +19,6 @@ bp = Blueprint('rentals_api', __name__)
 rentals_ns = Namespace('rentals', description='Rental operations')
 
 rental_service = RentalService()
-auth_service = AuthService()
 
 rental_model = rentals_ns.model('Rental', {
     'id': fields.Integer(description='Rental ID'),
@@ -50,24 +53,33 @@ class RentalList(Resource):
     @jwt_required()
     @rentals_ns.response(200, 'Success')
     def get(self):
-        """Get rentals"""
+        """Get rentals (?cursor= for keyset pages with next_cursor, ?fields= for a sparse fieldset)"""
         current_user_id = get_jwt_identity()
-        user = auth_service.get_user_by_id(current_user_id)
+        user = current_identity()
         
         limit = request.args.get('limit', 100, type=int)
         status = request.args.get('status')
         
-        if user.is_admin():
-            if status:
-                rentals = rental_service.rental_repo.get_by_status(status, limit)
-            else:
-                rentals = rental_service.get_all_rentals(limit)
-        else:
-            rentals = rental_service.get_user_rentals(current_user_id, limit)
-            if status:
-                rentals = [r for r in rentals if r.status == status]
+        fields, error = fields_from_request(Rental.serialized_fields)
+        if error:
+            return {'message': error}, 400
+        columns = Rental.serialized_fields.columns(fields)
+        
+        # Admins list every rental, everyone else their own
+        user_id = None if user.is_admin() else current_user_id
+        
+        if 'cursor' in request.args:
+            try:
+                rentals, next_cursor = rental_service.get_rental_views_page(
+                    limit, request.args['cursor'], user_id=user_id, status=status, columns=columns)
+            except ValueError as e:
+                return {'message': str(e)}, 400
+            return {'items': [r.to_dict(fields) for r in rentals], 'next_cursor': next_cursor}
+        
+        # Streamed from the cursor in batches: memory stays flat whatever the limit
+        rentals = rental_service.iter_rental_views(user_id, status, columns, limit)
         
-        return [r.to_dict() for r in rentals]
+        return stream_json_array(rentals, lambda r: r.to_dict(fields))
     
     @jwt_required()
     @rentals_ns.expect(start_rental_model)
@@ -90,6 +102,31 @@ class RentalList(Resource):
         
         return rental.to_dict(include_sensitive=True), 201
 
+@rentals_ns.route('/export')
+class RentalExport(Resource):
+    @jwt_required()
+    @rentals_ns.response(200, 'Success')
+    @rentals_ns.response(403, 'Forbidden')
+    def get(self):
+        """Export all rentals as a streamed JSON array (admin only; ?user_id=, ?status=, ?fields=)"""
+        user = current_identity()
+        
+        if not user.is_admin():
+            return {'message': 'Admin access required'}, 403
+        
+        fields, error = fields_from_request(Rental.serialized_fields)
+        if error:
+            return {'message': error}, 400
+        
+        rentals = rental_service.iter_rental_views(
+            request.args.get('user_id', type=int),
+            request.args.get('status'),
+            Rental.serialized_fields.columns(fields)
+        )
+        
+        return stream_json_array(rentals, lambda r: r.to_dict(fields),
+                                 headers={'Content-Disposition': 'attachment; filename=rentals.json'})
+
 @rentals_ns.route('/<int:rental_id>')
 class RentalDetail(Resource):
     @jwt_required()
@@ -97,9 +134,8 @@ class RentalDetail(Resource):
     @rentals_ns.response(403, 'Forbidden')
     @rentals_ns.response(404, 'Rental not found')
     def get(self, rental_id):
-        """Get rental by ID"""
-        current_user_id = get_jwt_identity()
-        user = auth_service.get_user_by_id(current_user_id)
+        """Get rental by ID (?fields= for a sparse fieldset)"""
+        user = current_identity()
         
         rental = rental_service.get_rental_by_id(rental_id)
         
@@ -111,7 +147,31 @@ class RentalDetail(Resource):
         
         include_sensitive = user.is_admin() or rental.user_id == user.id
         
-        return rental.to_dict(include_sensitive=include_sensitive)
+        fields, error = fields_from_request(Rental.serialized_fields, include_sensitive)
+        if error:
+            return {'message': error}, 400
+        
+        return rental.to_dict(include_sensitive=include_sensitive, fields=fields)
+
+@rentals_ns.route('/<int:rental_id>/status')
+class RentalStatus(Resource):
+    @jwt_required()
+    @rentals_ns.response(200, 'Success')
+    @rentals_ns.response(403, 'Forbidden')
+    @rentals_ns.response(404, 'Rental not found')
+    def get(self, rental_id):
+        """Get a rental's status (the async read service long-polls ?status=<known>&wait=<seconds>)"""
+        user = current_identity()
+        
+        row = rental_service.get_rental_status(rental_id)
+        
+        if not row:
+            return {'message': 'Rental not found'}, 404
+        
+        if not rental_service.can_view_status(row, user):
+            return {'message': 'Not authorized to access this rental'}, 403
+        
+        return rental_service.status_payload(row)
 
 @rentals_ns.route('/<int:rental_id>/end')
 class EndRental(Resource):
@@ -123,8 +183,7 @@ class EndRental(Resource):
     @rentals_ns.response(404, 'Rental not found')
     def post(self, rental_id):
         """End an active rental"""
-        current_user_id = get_jwt_identity()
-        user = auth_service.get_user_by_id(current_user_id)
+        user = current_identity()
         
         rental = rental_service.get_rental_by_id(rental_id)
         
@@ -156,8 +215,7 @@ class CancelRental(Resource):
     @rentals_ns.response(404, 'Rental not found')
     def post(self, rental_id):
         """Cancel an active rental"""
-        current_user_id = get_jwt_identity()
-        user = auth_service.get_user_by_id(current_user_id)
+        user = current_identity()
         
         rental = rental_service.get_rental_by_id(rental_id)
         
@@ -223,7 +281,7 @@ class RateRental(Resource):
             return {'message': 'Rental not found'}, 404
         
         # Check authorization
-        user = auth_service.get_user_by_id(current_user_id)
+        user = current_identity()
         if not user.is_admin() and rental.user_id != current_user_id:
             # Providers can see rentals of their scooters
             if user.is_provider():
@@ -238,18 +296,30 @@ class RateRental(Resource):
 class ActiveRentals(Resource):
     @jwt_required()
     @rentals_ns.response(200, 'Success')
+    @rentals_ns.response(304, 'Not modified')
     def get(self):
-        """Get active rentals"""
+        """Get active rentals (supports If-None-Match / If-Modified-Since and ?fields=)"""
         current_user_id = get_jwt_identity()
-        user = auth_service.get_user_by_id(current_user_id)
+        user = current_identity()
         
-        if user.is_admin():
-            rentals = rental_service.get_active_rentals()
-        else:
-            rental = rental_service.get_active_rental_for_user(current_user_id)
-            rentals = [rental] if rental else []
+        fields, error = fields_from_request(Rental.serialized_fields)
+        if error:
+            return {'message': error}, 400
+        
+        scope_user_id = None if user.is_admin() else current_user_id
+        version = rental_service.get_active_rentals_version(scope_user_id)
+        etag = make_etag('rentals-active', scope_user_id or 'all', ','.join(sorted(fields or ())), *version)
         
-        return [r.to_dict() for r in rentals]
+        def build_payload():
+            if user.is_admin():
+                rentals = rental_service.get_active_rentals()
+            else:
+                rental = rental_service.get_active_rental_for_user(current_user_id)
+                rentals = [rental] if rental else []
+            
+            return [r.to_dict(fields=fields) for r in rentals]
+        
+        return conditional_response(etag, version[1], build_payload)
 
 @rentals_ns.route('/statistics')
 class RentalStatistics(Resource):
@@ -258,8 +328,7 @@ class RentalStatistics(Resource):
     @rentals_ns.response(403, 'Forbidden')
     def get(self):
         """Get rental statistics"""
-        current_user_id = get_jwt_identity()
-        user = auth_service.get_user_by_id(current_user_id)
+        user = current_identity()
         
         if not user.is_admin():
             return {'message': 'Admin access required'}, 403
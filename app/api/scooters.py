@@ -2,11 +2,17 @@
 Scooter API endpoints
 """
 
-from flask import Blueprint, request
+from flask import Blueprint, Response, current_app, request
 from flask_restx import Namespace, Resource, fields
 from flask_jwt_extended import jwt_required, get_jwt_identity
+from app import limiter
+from app.models.scooter import Scooter
 from app.services.scooter_service import ScooterService
-from app.services.auth_service import AuthService
+from app.utils.csv_import import decode_lines
+from app.utils.fast_json import sse_event
+from app.utils.fieldsets import fields_from_request
+from app.utils.jwt_claims import current_identity
+from app.utils.http_cache import make_etag, conditional_response
 
 # Flask Blueprint for API routes
 bp = Blueprint('scooters_api', __name__)
@@ -15,7 +21,9 @@ bp = Blueprint('scooters_api', __name__)
 scooters_ns = Namespace('scooters', description='Scooter operations')
 
 scooter_service = ScooterService()
-auth_service = AuthService()
+
+# Nearby lookups per user; the async read service draws from the same buckets
+NEARBY_RATE_LIMIT = {'rate': '60/minute', 'burst': 20, 'scope': 'scooters.nearby'}
 
 scooter_model = scooters_ns.model('Scooter', {
     'id': fields.Integer(description='Scooter ID'),
@@ -42,6 +50,19 @@ create_scooter_model = scooters_ns.model('CreateScooter', {
     'range_km': fields.Integer(description='Range in km')
 })
 
+bulk_filter_model = scooters_ns.model('BulkScooterFilter', {
+    'ids': fields.List(fields.Integer, description='Scooter IDs'),
+    'provider_id': fields.Integer(description='Provider (providers may only use their own)'),
+    'battery_below': fields.Integer(description='Battery level below this percentage'),
+    'bbox': fields.String(description='Geofence as min_lon,min_lat,max_lon,max_lat'),
+    'current_status': fields.String(description='Only scooters currently in this status')
+})
+
+bulk_status_model = scooters_ns.model('BulkScooterStatus', {
+    'status': fields.String(required=True, description='available, maintenance or offline'),
+    'filter': fields.Nested(bulk_filter_model, required=True, description='Criteria, combined with AND')
+})
+
 update_location_model = scooters_ns.model('UpdateLocation', {
     'latitude': fields.Float(required=True, description='Latitude'),
     'longitude': fields.Float(required=True, description='Longitude'),
@@ -53,17 +74,27 @@ class ScooterList(Resource):
     @jwt_required()
     @scooters_ns.response(200, 'Success')
     def get(self):
-        """Get all scooters"""
+        """Get all scooters (?cursor= for keyset pages with next_cursor, ?fields= for a sparse fieldset)"""
         limit = request.args.get('limit', 100, type=int)
         offset = request.args.get('offset', 0, type=int)
         status = request.args.get('status')
         
-        if status:
-            scooters = scooter_service.scooter_repo.get_by_status(status, limit)
-        else:
-            scooters = scooter_service.get_all_scooters(limit, offset)
+        fields, error = fields_from_request(Scooter.serialized_fields)
+        if error:
+            return {'message': error}, 400
+        columns = Scooter.serialized_fields.columns(fields)
+        
+        if 'cursor' in request.args:
+            try:
+                scooters, next_cursor = scooter_service.get_scooter_views_page(
+                    limit, request.args['cursor'], status=status, columns=columns)
+            except ValueError as e:
+                return {'message': str(e)}, 400
+            return {'items': [s.to_dict(fields) for s in scooters], 'next_cursor': next_cursor}
         
-        return [s.to_dict() for s in scooters]
+        scooters = scooter_service.get_scooter_views(limit, offset, status, columns)
+        
+        return [s.to_dict(fields) for s in scooters]
     
     @jwt_required()
     @scooters_ns.expect(create_scooter_model)
@@ -73,7 +104,7 @@ class ScooterList(Resource):
     def post(self):
         """Create a new scooter"""
         current_user_id = get_jwt_identity()
-        user = auth_service.get_user_by_id(current_user_id)
+        user = current_identity()
         
         if not user.can_manage_scooters():
             return {'message': 'Not authorized to create scooters'}, 403
@@ -104,18 +135,21 @@ class ScooterDetail(Resource):
     @scooters_ns.response(200, 'Success')
     @scooters_ns.response(404, 'Scooter not found')
     def get(self, scooter_id):
-        """Get scooter by ID"""
+        """Get scooter by ID (?fields= for a sparse fieldset)"""
         scooter = scooter_service.get_scooter_by_id(scooter_id)
         
         if not scooter:
             return {'message': 'Scooter not found'}, 404
         
-        current_user_id = get_jwt_identity()
-        user = auth_service.get_user_by_id(current_user_id)
+        user = current_identity()
         
         include_sensitive = user.is_admin() or scooter.provider_id == user.id
         
-        return scooter.to_dict(include_sensitive=include_sensitive)
+        fields, error = fields_from_request(Scooter.serialized_fields, include_sensitive)
+        if error:
+            return {'message': error}, 400
+        
+        return scooter.to_dict(include_sensitive=include_sensitive, fields=fields)
     
     @jwt_required()
     @scooters_ns.response(200, 'Scooter updated')
@@ -123,8 +157,7 @@ class ScooterDetail(Resource):
     @scooters_ns.response(404, 'Scooter not found')
     def put(self, scooter_id):
         """Update scooter"""
-        current_user_id = get_jwt_identity()
-        user = auth_service.get_user_by_id(current_user_id)
+        user = current_identity()
         
         scooter = scooter_service.get_scooter_by_id(scooter_id)
         if not scooter:
@@ -145,8 +178,7 @@ class ScooterDetail(Resource):
     @scooters_ns.response(404, 'Scooter not found')
     def delete(self, scooter_id):
         """Delete scooter"""
-        current_user_id = get_jwt_identity()
-        user = auth_service.get_user_by_id(current_user_id)
+        user = current_identity()
         
         scooter = scooter_service.get_scooter_by_id(scooter_id)
         if not scooter:
@@ -163,20 +195,70 @@ class ScooterDetail(Resource):
 class AvailableScooters(Resource):
     @jwt_required()
     @scooters_ns.response(200, 'Success')
+    @scooters_ns.response(304, 'Not modified')
     def get(self):
-        """Get available scooters"""
+        """Get available scooters (supports If-None-Match / If-Modified-Since and ?fields=)"""
         limit = request.args.get('limit', 100, type=int)
-        scooters = scooter_service.get_available_scooters(limit)
         
-        return [s.to_dict() for s in scooters]
+        fields, error = fields_from_request(Scooter.serialized_fields)
+        if error:
+            return {'message': error}, 400
+        
+        version = scooter_service.get_available_scooters_version()
+        etag = make_etag('scooters-available', limit, ','.join(sorted(fields or ())), *version)
+        
+        return conditional_response(
+            etag, version[1],
+            lambda: scooter_service.get_available_scooters_data(limit, version, fields)
+        )
+
+@scooters_ns.route('/labels')
+class ScooterLabels(Resource):
+    @jwt_required()
+    @scooters_ns.produces(['application/pdf', 'image/png'])
+    @scooters_ns.response(200, 'Label sheets')
+    @scooters_ns.response(400, 'Invalid parameters')
+    @scooters_ns.response(403, 'Forbidden')
+    def get(self):
+        """Print QR label sheets for ?ids=1,2,3 or ?provider_id= (format=pdf|png, page= for png)"""
+        user = current_identity()
+        
+        if not user.can_manage_scooters():
+            return {'message': 'Not authorized to print labels'}, 403
+        
+        try:
+            scooter_ids = [int(i) for i in request.args.get('ids', '').split(',') if i.strip()]
+        except ValueError:
+            return {'message': 'ids must be a comma-separated list of integers'}, 400
+        
+        provider_id = request.args.get('provider_id', type=int)
+        fmt = request.args.get('format', 'pdf').lower()
+        page = request.args.get('page', type=int)
+        
+        # Providers may only print labels for their own fleet
+        if not user.is_admin():
+            provider_id = user.id
+        
+        chunks, error = scooter_service.get_label_sheets(scooter_ids, provider_id, fmt, page)
+        
+        if error:
+            return {'message': error}, 400
+        
+        filename = f'scooter-labels.{fmt}' if fmt == 'pdf' else f'scooter-labels-{page or 1}.png'
+        return Response(
+            chunks,
+            mimetype='application/pdf' if fmt == 'pdf' else 'image/png',
+            headers={'Content-Disposition': f'attachment; filename="{filename}"'}
+        )
 
 @scooters_ns.route('/nearby')
 class NearbyScooters(Resource):
     @jwt_required()
+    @limiter.limit(**NEARBY_RATE_LIMIT)
     @scooters_ns.response(200, 'Success')
     @scooters_ns.response(400, 'Missing parameters')
     def get(self):
-        """Get nearby scooters"""
+        """Get nearby scooters (?fields= for a sparse fieldset)"""
         latitude = request.args.get('latitude', type=float)
         longitude = request.args.get('longitude', type=float)
         radius = request.args.get('radius', 5.0, type=float)
@@ -185,9 +267,143 @@ class NearbyScooters(Resource):
         if latitude is None or longitude is None:
             return {'message': 'Latitude and longitude are required'}, 400
         
-        scooters = scooter_service.get_nearby_scooters(latitude, longitude, radius, limit)
+        fields, error = fields_from_request(Scooter.serialized_fields)
+        if error:
+            return {'message': error}, 400
+        
+        scooters = scooter_service.get_nearby_scooter_views(
+            latitude, longitude, radius, limit, Scooter.serialized_fields.columns(fields))
+        
+        return [s.to_dict(fields) for s in scooters]
+
+def _event_stream(subscription, keepalive: float):
+    """SSE body: pending changes as they arrive, a comment line while idle"""
+    yield b'retry: 3000\n\n'
+    while True:
+        events = subscription.wait(keepalive)
+        if subscription.lagged:
+            # Events were dropped; the client should refetch its area
+            subscription.lagged = False
+            yield sse_event({}, 'resync')
+        yield b''.join(events) if events else b': keepalive\n\n'
+
+@scooters_ns.route('/stream')
+class ScooterStream(Resource):
+    @jwt_required()
+    @scooters_ns.response(200, 'text/event-stream of scooter changes')
+    @scooters_ns.response(400, 'Invalid bbox')
+    def get(self):
+        """Stream status, battery and location changes inside ?bbox=min_lon,min_lat,max_lon,max_lat (SSE)"""
+        subscription, error = scooter_service.subscribe_to_changes(request.args.get('bbox'))
+        
+        if error:
+            return {'message': error}, 400
+        
+        keepalive = current_app.config.get('SCOOTER_STREAM_KEEPALIVE', 15)
+        
+        response = Response(
+            _event_stream(subscription, keepalive),
+            mimetype='text/event-stream',
+            headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+        )
+        # The server closes the response when the client disconnects
+        response.call_on_close(subscription.close)
+        return response
+
+@scooters_ns.route('/bulk-status')
+class ScooterBulkStatus(Resource):
+    @jwt_required()
+    @scooters_ns.expect(bulk_status_model)
+    @scooters_ns.response(200, 'Affected counts')
+    @scooters_ns.response(400, 'Validation error')
+    @scooters_ns.response(403, 'Forbidden')
+    def post(self):
+        """Set the status of every scooter matching a filter in one statement (skips rented scooters)"""
+        user = current_identity()
+        
+        if not user.can_manage_scooters():
+            return {'message': 'Not authorized to manage scooters'}, 403
+        
+        data = request.get_json(silent=True) or {}
+        filters = data.get('filter')
+        
+        if (not user.is_admin() and isinstance(filters, dict)
+                and filters.get('provider_id') not in (None, user.id)):
+            return {'message': 'Not authorized to manage scooters of another provider'}, 403
         
-        return [s.to_dict() for s in scooters]
+        result, error = scooter_service.bulk_set_status(user, data.get('status'), filters)
+        
+        if error:
+            return {'message': error}, 400
+        
+        return result
+
+@scooters_ns.route('/import')
+class ScooterImport(Resource):
+    @jwt_required()
+    @scooters_ns.response(200, 'Import report with per-line errors')
+    @scooters_ns.response(400, 'Validation error')
+    @scooters_ns.response(403, 'Forbidden')
+    def post(self):
+        """Import scooters from CSV (multipart "file" or a text/csv body; admins may pass ?provider_id=)"""
+        user = current_identity()
+        
+        if not user.can_manage_scooters():
+            return {'message': 'Not authorized to create scooters'}, 403
+        
+        provider_id = user.id
+        if user.is_admin():
+            provider_id = request.args.get('provider_id', user.id, type=int)
+        
+        if 'file' in request.files:
+            raw = request.files['file'].stream
+        elif request.mimetype == 'text/csv':
+            raw = request.stream
+        else:
+            return {'message': 'Send a CSV file as multipart "file" or a text/csv body'}, 400
+        
+        # Decoded line by line as it is read: the upload is never held in memory as text
+        report, error = scooter_service.import_scooters(
+            decode_lines(raw), provider_id, current_app.config.get('SCOOTER_IMPORT_BATCH_SIZE', 1000))
+        
+        if error:
+            return {'message': error}, 400
+        
+        return report
+
+@scooters_ns.route('/changes')
+class ScooterChanges(Resource):
+    @jwt_required()
+    @scooters_ns.response(200, 'Success')
+    @scooters_ns.response(400, 'Validation error')
+    def get(self):
+        """Scooters changed since ?since=<version> (?limit=, ?provider_id=, ?fields=); without since, the current version"""
+        if 'since' not in request.args:
+            # Take the version first, then download the fleet, then sync from it
+            return {'version': scooter_service.get_change_version(), 'changes': [],
+                    'deleted': [], 'has_more': False}
+        
+        since = request.args.get('since', type=int)
+        if since is None or since < 0:
+            return {'message': 'since must be a non-negative integer version'}, 400
+        
+        limit = min(max(request.args.get('limit', 1000, type=int), 1), 5000)
+        
+        fields, error = fields_from_request(Scooter.serialized_fields)
+        if error:
+            return {'message': error}, 400
+        
+        changed, deleted, version, has_more = scooter_service.get_changes_since(
+            since, limit, request.args.get('provider_id', type=int),
+            Scooter.serialized_fields.columns(fields)
+        )
+        
+        return {
+            'version': version,
+            'changes': [dict(s.to_dict(fields), version=v) for v, s in changed],
+            'deleted': deleted,
+            'has_more': has_more
+        }
 
 @scooters_ns.route('/<int:scooter_id>/location')
 class UpdateScooterLocation(Resource):
@@ -198,8 +414,7 @@ class UpdateScooterLocation(Resource):
     @scooters_ns.response(404, 'Scooter not found')
     def put(self, scooter_id):
         """Update scooter location"""
-        current_user_id = get_jwt_identity()
-        user = auth_service.get_user_by_id(current_user_id)
+        user = current_identity()
         
         scooter = scooter_service.get_scooter_by_id(scooter_id)
         if not scooter:
@@ -230,8 +445,7 @@ class UpdateScooterStatus(Resource):
     @scooters_ns.response(404, 'Scooter not found')
     def put(self, scooter_id):
         """Update scooter status"""
-        current_user_id = get_jwt_identity()
-        user = auth_service.get_user_by_id(current_user_id)
+        user = current_identity()
         
         scooter = scooter_service.get_scooter_by_id(scooter_id)
         if not scooter:
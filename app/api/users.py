@@ -5,7 +5,11 @@ User API endpoints
 from flask import Blueprint, request
 from flask_restx import Namespace, Resource, fields
 from flask_jwt_extended import jwt_required, get_jwt_identity
+from app.models.user import User
 from app.services.auth_service import AuthService
+from app.utils.fast_json import stream_json_array
+from app.utils.fieldsets import fields_from_request
+from app.utils.jwt_claims import current_identity
 
 # Flask Blueprint for API routes
 bp = Blueprint('users_api', __name__)
@@ -43,9 +47,8 @@ class UserList(Resource):
     @users_ns.response(200, 'Success')
     @users_ns.response(403, 'Forbidden')
     def get(self):
-        """Get all users (admin only)"""
-        current_user_id = get_jwt_identity()
-        user = auth_service.get_user_by_id(current_user_id)
+        """Get all users (admin only; ?cursor= for keyset pages, ?fields= for a sparse fieldset)"""
+        user = current_identity()
         
         if not user.is_admin():
             return {'message': 'Admin access required'}, 403
@@ -54,12 +57,45 @@ class UserList(Resource):
         offset = request.args.get('offset', 0, type=int)
         role = request.args.get('role')
         
-        if role:
-            users = auth_service.get_users_by_role(role, limit)
-        else:
-            users = auth_service.get_all_users(limit, offset)
+        fields, error = fields_from_request(User.serialized_fields)
+        if error:
+            return {'message': error}, 400
+        columns = User.serialized_fields.columns(fields)
+        
+        if 'cursor' in request.args:
+            try:
+                users, next_cursor = auth_service.get_users_page(
+                    limit, request.args['cursor'], role=role, columns=columns)
+            except ValueError as e:
+                return {'message': str(e)}, 400
+            return {'items': [u.to_dict(fields=fields) for u in users], 'next_cursor': next_cursor}
         
-        return [u.to_dict() for u in users]
+        # Streamed from the cursor in batches: memory stays flat whatever the limit
+        users = auth_service.iter_user_views(role, columns, limit, offset)
+        
+        return stream_json_array(users, lambda u: u.to_dict(fields))
+
+@users_ns.route('/export')
+class UserExport(Resource):
+    @jwt_required()
+    @users_ns.response(200, 'Success')
+    @users_ns.response(403, 'Forbidden')
+    def get(self):
+        """Export all users as a streamed JSON array (admin only; ?role=, ?fields=)"""
+        user = current_identity()
+        
+        if not user.is_admin():
+            return {'message': 'Admin access required'}, 403
+        
+        fields, error = fields_from_request(User.serialized_fields)
+        if error:
+            return {'message': error}, 400
+        
+        users = auth_service.iter_user_views(request.args.get('role'),
+                                             User.serialized_fields.columns(fields))
+        
+        return stream_json_array(users, lambda u: u.to_dict(fields),
+                                 headers={'Content-Disposition': 'attachment; filename=users.json'})
 
 @users_ns.route('/<int:user_id>')
 class UserDetail(Resource):
@@ -70,7 +106,7 @@ class UserDetail(Resource):
     def get(self, user_id):
         """Get user by ID"""
         current_user_id = get_jwt_identity()
-        current_user = auth_service.get_user_by_id(current_user_id)
+        current_user = current_identity()
         
         user = auth_service.get_user_by_id(user_id)
         
@@ -82,18 +118,26 @@ class UserDetail(Resource):
         
         include_sensitive = current_user.is_admin() or current_user_id == user_id
         
-        return user.to_dict(include_sensitive=include_sensitive)
+        fields, error = fields_from_request(User.serialized_fields, include_sensitive)
+        if error:
+            return {'message': error}, 400
+        
+        return user.to_dict(include_sensitive=include_sensitive, fields=fields)
 
 @users_ns.route('/me')
 class CurrentUserProfile(Resource):
     @jwt_required()
     @users_ns.response(200, 'Success')
     def get(self):
-        """Get current user profile"""
+        """Get current user profile (?fields= for a sparse fieldset)"""
         current_user_id = get_jwt_identity()
         user = auth_service.get_user_by_id(current_user_id)
         
-        return user.to_dict(include_sensitive=True)
+        fields, error = fields_from_request(User.serialized_fields, include_sensitive=True)
+        if error:
+            return {'message': error}, 400
+        
+        return user.to_dict(include_sensitive=True, fields=fields)
     
     @jwt_required()
     @users_ns.expect(update_profile_model)
@@ -144,8 +188,7 @@ class SearchUsers(Resource):
     @users_ns.response(403, 'Forbidden')
     def get(self):
         """Search users (admin only)"""
-        current_user_id = get_jwt_identity()
-        user = auth_service.get_user_by_id(current_user_id)
+        user = current_identity()
         
         if not user.is_admin():
             return {'message': 'Admin access required'}, 403
@@ -165,8 +208,7 @@ class ActivateUser(Resource):
     @users_ns.response(404, 'User not found')
     def post(self, user_id):
         """Activate user (admin only)"""
-        current_user_id = get_jwt_identity()
-        current_user = auth_service.get_user_by_id(current_user_id)
+        current_user = current_identity()
         
         if not current_user.is_admin():
             return {'message': 'Admin access required'}, 403
@@ -188,8 +230,7 @@ class DeactivateUser(Resource):
     @users_ns.response(404, 'User not found')
     def post(self, user_id):
         """Deactivate user (admin only)"""
-        current_user_id = get_jwt_identity()
-        current_user = auth_service.get_user_by_id(current_user_id)
+        current_user = current_identity()
         
         if not current_user.is_admin():
             return {'message': 'Admin access required'}, 403
@@ -6,5 +6,7 @@ from .user import User
 from .scooter import Scooter
 from .rental import Rental
 from .payment import Payment
+from .metric_sketch import MetricSketch
+from .scooter_change import ScooterChange
 
-__all__ = ['User', 'Scooter', 'Rental', 'Payment']
+__all__ = ['User', 'Scooter', 'Rental', 'Payment', 'MetricSketch', 'ScooterChange']
@@ -0,0 +1,40 @@
+"""
+Metric sketch model for Scooter Share Pro
+"""
+
+from datetime import datetime
+from app import db
+
+class MetricSketch(db.Model):
+    """Serialized analytics sketch aggregated per day and provider"""
+    __tablename__ = 'metric_sketches'
+
+    id = db.Column(db.Integer, primary_key=True)
+
+    # Aggregation key
+    metric = db.Column(db.String(30), nullable=False)
+    day = db.Column(db.Date, nullable=False)
+    provider_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+
+    # Serialized sketch (see app.utils.sketches)
+    payload = db.Column(db.LargeBinary, nullable=False)
+
+    # Timestamps
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow,
+                          onupdate=datetime.utcnow, nullable=False)
+
+    # Indexes for performance
+    __table_args__ = (
+        db.UniqueConstraint('metric', 'day', 'provider_id', name='uq_metric_sketch_key'),
+        db.Index('idx_metric_sketch_provider_day', 'provider_id', 'metric', 'day'),
+    )
+
+    def __init__(self, metric, day, provider_id, payload):
+        self.metric = metric
+        self.day = day
+        self.provider_id = provider_id
+        self.payload = payload
+
+    def __repr__(self):
+        return f'<MetricSketch {self.metric} {self.day} provider={self.provider_id}>'
@@ -5,6 +5,7 @@ Payment model for Scooter Share Pro
 from datetime import datetime
 from flask_sqlalchemy import SQLAlchemy
 from app import db
+from app.utils.fieldsets import FieldMap, attr, computed, isoformat
 
 class Payment(db.Model):
     """Payment model for rental transactions"""
@@ -48,7 +49,8 @@ class Payment(db.Model):
     __table_args__ = (
         db.Index('idx_payment_user_status', 'user_id', 'status'),
         db.Index('idx_payment_rental', 'rental_id'),
-        db.Index('idx_payment_created', 'created_at'),
+        db.Index('idx_payment_created', 'created_at', 'id'),
+        db.Index('idx_payment_user_created', 'user_id', 'created_at', 'id'),
         db.CheckConstraint('amount >= 0', name='check_amount_positive'),
         db.CheckConstraint('refund_amount >= 0', name='check_refund_positive'),
     )
@@ -122,35 +124,38 @@ class Payment(db.Model):
             return 0.0
         return float(self.amount - self.refund_amount)
     
-    def to_dict(self, include_sensitive=False):
-        """Convert payment to dictionary"""
-        data = {
-            'id': self.id,
-            'transaction_id': self.transaction_id,
-            'user_id': self.user_id,
-            'rental_id': self.rental_id,
-            'amount': float(self.amount),
-            'currency': self.currency,
-            'payment_method': self.payment_method,
-            'status': self.status,
-            'created_at': self.created_at.isoformat(),
-            'processed_at': self.processed_at.isoformat() if self.processed_at else None
+    # Serialized fields for to_dict(), in output order
+    serialized_fields = FieldMap(
+        public={
+            'id': attr(),
+            'transaction_id': attr(),
+            'user_id': attr(),
+            'rental_id': attr(),
+            'amount': attr(float),
+            'currency': attr(),
+            'payment_method': attr(),
+            'status': attr(),
+            'created_at': attr(isoformat),
+            'processed_at': attr(isoformat)
+        },
+        sensitive={
+            'gateway_transaction_id': attr(),
+            'gateway_response': attr(),
+            'refund_amount': attr(float),
+            'refund_reason': attr(),
+            'refund_date': attr(isoformat),
+            'user_name': computed(lambda p: p.user.get_full_name(), 'user_id'),
+            'rental_code': computed(lambda p: p.rental.rental_code, 'rental_id'),
+            'is_refundable': computed(lambda p: p.is_refundable(),
+                                      'status', 'amount', 'refund_amount', 'created_at'),
+            'refundable_amount': computed(lambda p: p.get_refundable_amount(),
+                                          'status', 'amount', 'refund_amount', 'created_at')
         }
-        
-        if include_sensitive:
-            data.update({
-                'gateway_transaction_id': self.gateway_transaction_id,
-                'gateway_response': self.gateway_response,
-                'refund_amount': float(self.refund_amount),
-                'refund_reason': self.refund_reason,
-                'refund_date': self.refund_date.isoformat() if self.refund_date else None,
-                'user_name': self.user.get_full_name(),
-                'rental_code': self.rental.rental_code,
-                'is_refundable': self.is_refundable(),
-                'refundable_amount': self.get_refundable_amount()
-            })
-        
-        return data
+    )
+    
+    def to_dict(self, include_sensitive=False, fields=None):
+        """Convert payment to dictionary (only the given fields when fields is set)"""
+        return self.serialized_fields.serialize(self, include_sensitive, fields)
     
     def __repr__(self):
         return f'<Payment {self.transaction_id}>'
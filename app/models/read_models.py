@@ -0,0 +1,111 @@
+"""
+Lightweight read models for list views
+
+List endpoints only serialize rows, so they select plain columns with
+SQLAlchemy Core and copy each row into a __slots__ object instead of
+hydrating ORM instances (identity map, change tracking, Decimal conversion).
+Views reuse their model's FieldMap and the side-effect-free model methods
+it calls, so view.to_dict(fields) matches model.to_dict(fields=fields).
+RowView.stream() reads rows from a server-side cursor in batches, so large
+exports hold one batch in memory instead of the whole result.
+"""
+
+from typing import Iterable, Iterator, List, Optional
+from sqlalchemy import Float, Numeric, func, select, type_coerce
+from app import db
+from app.models.scooter import Scooter
+from app.models.rental import Rental
+from app.models.user import User
+from app.models.payment import Payment
+
+class RowView:
+    """Read-only snapshot of selected columns of one row"""
+
+    __slots__ = ()
+
+    # Set by subclasses: the mapped model and the columns a view can hold
+    orm_model = None
+    columns = ()
+
+    @classmethod
+    def select(cls, columns: Optional[Iterable[str]] = None):
+        """Core SELECT of the given columns (all view columns when None)"""
+        names = list(dict.fromkeys(['id', *(columns or cls.columns)]))
+        table = cls.orm_model.__table__
+        return select(*(cls._column(table.c[name]) for name in names))
+
+    @staticmethod
+    def _column(column):
+        # Numeric columns come back as floats (rounded to their scale like the
+        # ORM's Decimals); serialization converts them to float anyway
+        if isinstance(column.type, Numeric):
+            if column.type.scale is not None:
+                return type_coerce(func.round(column, column.type.scale), Float).label(column.name)
+            return type_coerce(column, Float).label(column.name)
+        return column
+
+    @classmethod
+    def from_rows(cls, rows) -> List['RowView']:
+        """Copy result rows into views"""
+        views = []
+        names = None
+        for row in rows:
+            if names is None:
+                names = row._fields
+            view = cls.__new__(cls)
+            for name, value in zip(names, row):
+                setattr(view, name, value)
+            views.append(view)
+        return views
+
+    @classmethod
+    def stream(cls, stmt, batch_size: int = 1000) -> Iterator['RowView']:
+        """Yield views for a statement, fetching batch_size rows at a time"""
+        result = db.session.execute(stmt.execution_options(yield_per=batch_size))
+        for rows in result.partitions():
+            yield from cls.from_rows(rows)
+
+    def to_dict(self, fields: Optional[Iterable[str]] = None) -> dict:
+        """Public representation, as the model's to_dict()"""
+        return self.orm_model.serialized_fields.serialize(self, False, fields)
+
+class ScooterView(RowView):
+    """Scooter list row"""
+
+    orm_model = Scooter
+    columns = ('id', 'identifier', 'model', 'brand', 'latitude', 'longitude', 'address',
+               'status', 'battery_level', 'provider_id', 'created_at', 'last_location_update')
+    __slots__ = columns + ('distance',)
+
+    is_available = Scooter.is_available
+    distance_from = Scooter.distance_from
+
+class RentalView(RowView):
+    """Rental list row"""
+
+    orm_model = Rental
+    columns = ('id', 'rental_code', 'user_id', 'scooter_id', 'status', 'start_time', 'end_time',
+               'duration_minutes', 'start_latitude', 'start_longitude', 'end_latitude',
+               'end_longitude', 'total_cost', 'created_at')
+    __slots__ = columns
+
+    get_duration_minutes = Rental.get_duration_minutes
+    get_duration_formatted = Rental.get_duration_formatted
+
+class UserView(RowView):
+    """User list row (public fields only)"""
+
+    orm_model = User
+    columns = ('id', 'email', 'first_name', 'last_name', 'role', 'is_active', 'is_verified',
+               'created_at', 'last_login')
+    __slots__ = columns
+
+    get_full_name = User.get_full_name
+
+class PaymentView(RowView):
+    """Payment list row (public fields only)"""
+
+    orm_model = Payment
+    columns = ('id', 'transaction_id', 'user_id', 'rental_id', 'amount', 'currency',
+               'payment_method', 'status', 'created_at', 'processed_at')
+    __slots__ = columns
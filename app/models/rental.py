@@ -6,6 +6,8 @@ from datetime import datetime, timedelta
 from flask_sqlalchemy import SQLAlchemy
 from app import db
 from app.models.payment import Payment
+from app.signals import rental_started, rental_ended, rental_cancelled
+from app.utils.fieldsets import OMIT, FieldMap, attr, computed, isoformat
 
 class Rental(db.Model):
     """Rental model tracking scooter usage and billing"""
@@ -58,6 +60,8 @@ class Rental(db.Model):
         db.Index('idx_rental_user_status', 'user_id', 'status'),
         db.Index('idx_rental_scooter_status', 'scooter_id', 'status'),
         db.Index('idx_rental_time_range', 'start_time', 'end_time'),
+        db.Index('idx_rental_created', 'created_at', 'id'),
+        db.Index('idx_rental_user_created', 'user_id', 'created_at', 'id'),
         db.CheckConstraint('duration_minutes >= 0', name='check_duration_positive'),
         db.CheckConstraint('rating >= 1 AND rating <= 5', name='check_rating_range'),
     )
@@ -91,6 +95,7 @@ class Rental(db.Model):
         scooter.set_status('in_use')
         self.status = 'active'
         db.session.commit()
+        rental_started.send(self)
     
     def end_rental(self, end_latitude=None, end_longitude=None):
         """End the rental and calculate costs"""
@@ -123,6 +128,7 @@ class Rental(db.Model):
         scooter.set_status('available')
         
         db.session.commit()
+        rental_ended.send(self)
     
     def calculate_cost(self):
         """Calculate total rental cost"""
@@ -153,6 +159,7 @@ class Rental(db.Model):
         scooter.set_status('available')
         
         db.session.commit()
+        rental_cancelled.send(self)
     
     def is_overdue(self):
         """Check if rental is overdue"""
@@ -212,47 +219,47 @@ class Rental(db.Model):
             mins = minutes % 60
             return f"{hours}h {mins}m"
     
-    def to_dict(self, include_sensitive=False):
-        """Convert rental to dictionary"""
-        data = {
-            'id': self.id,
-            'rental_code': self.rental_code,
-            'user_id': self.user_id,
-            'scooter_id': self.scooter_id,
-            'status': self.status,
-            'start_time': self.start_time.isoformat(),
-            'end_time': self.end_time.isoformat() if self.end_time else None,
-            'duration_minutes': self.duration_minutes,
-            'duration_formatted': self.get_duration_formatted(),
-            'start_location': {
-                'latitude': float(self.start_latitude),
-                'longitude': float(self.start_longitude)
-            },
-            'total_cost': float(self.total_cost),
-            'created_at': self.created_at.isoformat()
+    # Serialized fields for to_dict(), in output order
+    serialized_fields = FieldMap(
+        public={
+            'id': attr(),
+            'rental_code': attr(),
+            'user_id': attr(),
+            'scooter_id': attr(),
+            'status': attr(),
+            'start_time': attr(isoformat),
+            'end_time': attr(isoformat),
+            'duration_minutes': attr(),
+            'duration_formatted': computed(lambda r: r.get_duration_formatted(),
+                                           'status', 'start_time', 'duration_minutes'),
+            'start_location': computed(lambda r: {
+                'latitude': float(r.start_latitude),
+                'longitude': float(r.start_longitude)
+            }, 'start_latitude', 'start_longitude'),
+            'total_cost': attr(float),
+            'created_at': attr(isoformat),
+            'end_location': computed(lambda r: {
+                'latitude': float(r.end_latitude),
+                'longitude': float(r.end_longitude)
+            } if r.end_latitude and r.end_longitude else OMIT, 'end_latitude', 'end_longitude')
+        },
+        sensitive={
+            'base_fee': attr(float),
+            'per_minute_rate': attr(float),
+            'rating': attr(),
+            'feedback': attr(),
+            'notes': attr(),
+            'user_name': computed(lambda r: r.user.get_full_name(), 'user_id'),
+            'scooter_identifier': computed(lambda r: r.scooter.identifier, 'scooter_id'),
+            'scooter_model': computed(lambda r: f"{r.scooter.brand} {r.scooter.model}", 'scooter_id'),
+            'payment_status': computed(lambda r: r.get_payment_status(), 'total_cost'),
+            'is_overdue': computed(lambda r: r.is_overdue(), 'status', 'start_time')
         }
-        
-        if self.end_latitude and self.end_longitude:
-            data['end_location'] = {
-                'latitude': float(self.end_latitude),
-                'longitude': float(self.end_longitude)
-            }
-        
-        if include_sensitive:
-            data.update({
-                'base_fee': float(self.base_fee),
-                'per_minute_rate': float(self.per_minute_rate),
-                'rating': self.rating,
-                'feedback': self.feedback,
-                'notes': self.notes,
-                'user_name': self.user.get_full_name(),
-                'scooter_identifier': self.scooter.identifier,
-                'scooter_model': f"{self.scooter.brand} {self.scooter.model}",
-                'payment_status': self.get_payment_status(),
-                'is_overdue': self.is_overdue()
-            })
-        
-        return data
+    )
+    
+    def to_dict(self, include_sensitive=False, fields=None):
+        """Convert rental to dictionary (only the given fields when fields is set)"""
+        return self.serialized_fields.serialize(self, include_sensitive, fields)
     
     def __repr__(self):
         return f'<Rental {self.rental_code}>'
@@ -5,6 +5,8 @@ Scooter model for Scooter Share Pro
 from datetime import datetime
 from flask_sqlalchemy import SQLAlchemy
 from app import db
+from app.signals import scooter_status_changed, scooter_location_changed, scooter_battery_changed
+from app.utils.fieldsets import FieldMap, attr, computed, isoformat
 
 class Scooter(db.Model):
     """Scooter model with location and status tracking"""
@@ -52,6 +54,8 @@ class Scooter(db.Model):
         db.Index('idx_scooter_status_location', 'status', 'latitude', 'longitude'),
         db.Index('idx_scooter_provider_status', 'provider_id', 'status'),
         db.Index('idx_scooter_battery', 'battery_level'),
+        db.Index('idx_scooter_created', 'created_at', 'id'),
+        db.Index('idx_scooter_provider_created', 'provider_id', 'created_at', 'id'),
         db.CheckConstraint('battery_level >= 0 AND battery_level <= 100', 
                           name='check_battery_level'),
     )
@@ -67,17 +71,34 @@ class Scooter(db.Model):
     
     def generate_qr_code(self):
         """Generate unique QR code for scooter"""
+        return Scooter.make_qr_code(self.identifier)
+    
+    @staticmethod
+    def make_qr_code(identifier: str) -> str:
+        """QR code for an (upper-cased) identifier, without building a Scooter"""
         import uuid
-        return f"SCOOT-{uuid.uuid4().hex[:8].upper()}-{self.identifier}"
+        return f"SCOOT-{uuid.uuid4().hex[:8].upper()}-{identifier}"
     
     def update_location(self, latitude, longitude, address=None):
         """Update scooter location"""
+        old_latitude, old_longitude = self.latitude, self.longitude
         self.latitude = latitude
         self.longitude = longitude
         if address:
             self.address = address
         self.last_location_update = datetime.utcnow()
         db.session.commit()
+        
+        scooter_location_changed.send(self, old_latitude=old_latitude, old_longitude=old_longitude)
+    
+    def set_battery_level(self, battery_level):
+        """Update battery level (0-100%)"""
+        old_level = self.battery_level
+        self.battery_level = battery_level
+        db.session.commit()
+        
+        if old_level != battery_level:
+            scooter_battery_changed.send(self, old_level=old_level, new_level=battery_level)
     
     def set_status(self, status):
         """Update scooter status with validation"""
@@ -85,9 +106,13 @@ class Scooter(db.Model):
         if status not in valid_statuses:
             raise ValueError(f"Invalid status: {status}")
         
+        old_status = self.status
         self.status = status
         self.updated_at = datetime.utcnow()
         db.session.commit()
+        
+        if old_status != status:
+            scooter_status_changed.send(self, old_status=old_status, new_status=status)
     
     def is_available(self):
         """Check if scooter is available for rental"""
@@ -159,38 +184,39 @@ class Scooter(db.Model):
         r = 6371
         return c * r
     
-    def to_dict(self, include_sensitive=False):
-        """Convert scooter to dictionary"""
-        data = {
-            'id': self.id,
-            'identifier': self.identifier,
-            'model': self.model,
-            'brand': self.brand,
-            'latitude': float(self.latitude),
-            'longitude': float(self.longitude),
-            'address': self.address,
-            'status': self.status,
-            'battery_level': self.battery_level,
-            'is_available': self.is_available(),
-            'created_at': self.created_at.isoformat(),
-            'last_location_update': self.last_location_update.isoformat()
+    # Serialized fields for to_dict(), in output order
+    serialized_fields = FieldMap(
+        public={
+            'id': attr(),
+            'identifier': attr(),
+            'model': attr(),
+            'brand': attr(),
+            'latitude': attr(float),
+            'longitude': attr(float),
+            'address': attr(),
+            'status': attr(),
+            'battery_level': attr(),
+            'is_available': computed(lambda s: s.is_available(), 'status', 'battery_level'),
+            'created_at': attr(isoformat),
+            'last_location_update': attr(isoformat)
+        },
+        sensitive={
+            'qr_code': attr(),
+            'max_speed': attr(),
+            'range_km': attr(),
+            'provider_id': attr(),
+            'provider_name': computed(lambda s: s.provider.get_full_name(), 'provider_id'),
+            'total_revenue': computed(lambda s: s.get_total_revenue()),
+            'utilization_rate': computed(lambda s: s.get_utilization_rate()),
+            'rental_count': computed(lambda s: s.rentals.count()),
+            'needs_maintenance': computed(lambda s: s.needs_maintenance(), 'battery_level', 'last_maintenance'),
+            'last_maintenance': attr(isoformat)
         }
-        
-        if include_sensitive:
-            data.update({
-                'qr_code': self.qr_code,
-                'max_speed': self.max_speed,
-                'range_km': self.range_km,
-                'provider_id': self.provider_id,
-                'provider_name': self.provider.get_full_name(),
-                'total_revenue': self.get_total_revenue(),
-                'utilization_rate': self.get_utilization_rate(),
-                'rental_count': self.rentals.count(),
-                'needs_maintenance': self.needs_maintenance(),
-                'last_maintenance': self.last_maintenance.isoformat() if self.last_maintenance else None
-            })
-        
-        return data
+    )
+    
+    def to_dict(self, include_sensitive=False, fields=None):
+        """Convert scooter to dictionary (only the given fields when fields is set)"""
+        return self.serialized_fields.serialize(self, include_sensitive, fields)
     
     def __repr__(self):
         return f'<Scooter {self.identifier}>'
@@ -0,0 +1,54 @@
+"""
+Scooter change log model for Scooter Share Pro
+"""
+
+from datetime import datetime
+from app import db
+
+class ScooterChange(db.Model):
+    """Latest change version of each scooter, for incremental fleet sync"""
+    __tablename__ = 'scooter_changes'
+
+    # Monotonic sync version; AUTOINCREMENT so versions are never reused
+    version = db.Column(db.Integer, primary_key=True, autoincrement=True)
+
+    # Changed scooter (no foreign key: deleted scooters keep a tombstone)
+    scooter_id = db.Column(db.Integer, nullable=False, index=True)
+    provider_id = db.Column(db.Integer)
+    deleted = db.Column(db.Boolean, default=False, nullable=False)
+
+    # Timestamps
+    changed_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+    # Indexes for performance
+    __table_args__ = (
+        db.Index('idx_scooter_change_provider', 'provider_id', 'version'),
+        {'sqlite_autoincrement': True},
+    )
+
+    def __init__(self, scooter_id, provider_id=None, deleted=False):
+        self.scooter_id = scooter_id
+        self.provider_id = provider_id
+        self.deleted = deleted
+
+    @classmethod
+    def record(cls, connection, changes: dict, batch_size: int = 500):
+        """
+        Write a new version for each {scooter_id: (provider_id, deleted)}
+        Older versions of the same scooters are removed, so the table holds
+        one row per scooter ever changed.
+        """
+        now = datetime.utcnow()
+        scooter_ids = list(changes)
+
+        for start in range(0, len(scooter_ids), batch_size):
+            batch = scooter_ids[start:start + batch_size]
+            connection.execute(db.delete(cls).where(cls.scooter_id.in_(batch)))
+            connection.execute(db.insert(cls), [
+                {'scooter_id': scooter_id, 'provider_id': changes[scooter_id][0],
+                 'deleted': changes[scooter_id][1], 'changed_at': now}
+                for scooter_id in batch
+            ])
+
+    def __repr__(self):
+        return f'<ScooterChange {self.version} scooter={self.scooter_id}>'
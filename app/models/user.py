@@ -7,6 +7,7 @@ from flask_sqlalchemy import SQLAlchemy
 from flask_login import UserMixin
 from werkzeug.security import generate_password_hash, check_password_hash
 from app import db
+from app.utils.fieldsets import FieldMap, attr, computed, isoformat
 
 class User(UserMixin, db.Model):
     """User model with authentication and authorization"""
@@ -45,6 +46,7 @@ class User(UserMixin, db.Model):
     __table_args__ = (
         db.Index('idx_user_email_active', 'email', 'is_active'),
         db.Index('idx_user_role_created', 'role', 'created_at'),
+        db.Index('idx_user_created', 'created_at', 'id'),
     )
     
     def __init__(self, email, password, first_name, last_name, role='customer'):
@@ -93,41 +95,45 @@ class User(UserMixin, db.Model):
     
     def get_rental_history(self, limit=10):
         """Get rental history"""
+        from app.models.rental import Rental
         return self.rentals.order_by(Rental.created_at.desc()).limit(limit).all()
     
     def get_total_spent(self):
         """Calculate total amount spent on rentals"""
         from sqlalchemy import func
+        from app.models.payment import Payment
+        from app.models.rental import Rental
         result = db.session.query(func.sum(Payment.amount))\
                           .join(Rental, Payment.rental_id == Rental.id)\
                           .filter(Rental.user_id == self.id)\
                           .scalar()
         return float(result) if result else 0.0
     
-    def to_dict(self, include_sensitive=False):
-        """Convert user to dictionary"""
-        data = {
-            'id': self.id,
-            'email': self.email,
-            'first_name': self.first_name,
-            'last_name': self.last_name,
-            'full_name': self.get_full_name(),
-            'role': self.role,
-            'is_active': self.is_active,
-            'is_verified': self.is_verified,
-            'created_at': self.created_at.isoformat(),
-            'last_login': self.last_login.isoformat() if self.last_login else None
+    # Serialized fields for to_dict(), in output order
+    serialized_fields = FieldMap(
+        public={
+            'id': attr(),
+            'email': attr(),
+            'first_name': attr(),
+            'last_name': attr(),
+            'full_name': computed(lambda u: u.get_full_name(), 'first_name', 'last_name'),
+            'role': attr(),
+            'is_active': attr(),
+            'is_verified': attr(),
+            'created_at': attr(isoformat),
+            'last_login': attr(isoformat)
+        },
+        sensitive={
+            'phone': attr(),
+            'scooter_count': computed(lambda u: u.scooters.count()),
+            'rental_count': computed(lambda u: u.rentals.count()),
+            'total_spent': computed(lambda u: u.get_total_spent())
         }
-        
-        if include_sensitive:
-            data.update({
-                'phone': self.phone,
-                'scooter_count': self.scooters.count(),
-                'rental_count': self.rentals.count(),
-                'total_spent': self.get_total_spent()
-            })
-        
-        return data
+    )
+    
+    def to_dict(self, include_sensitive=False, fields=None):
+        """Convert user to dictionary (only the given fields when fields is set)"""
+        return self.serialized_fields.serialize(self, include_sensitive, fields)
     
     def __repr__(self):
         return f'<User {self.email}>'
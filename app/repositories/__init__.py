@@ -6,5 +6,7 @@ from .user_repository import UserRepository
 from .scooter_repository import ScooterRepository
 from .rental_repository import RentalRepository
 from .payment_repository import PaymentRepository
+from .metric_sketch_repository import MetricSketchRepository
 
-__all__ = ['UserRepository', 'ScooterRepository', 'RentalRepository', 'PaymentRepository']
+__all__ = ['UserRepository', 'ScooterRepository', 'RentalRepository', 'PaymentRepository',
+           'MetricSketchRepository']
@@ -0,0 +1,87 @@
+"""
+Metric sketch repository for data access operations
+"""
+
+from typing import List, Optional
+from datetime import date
+from sqlalchemy import and_
+from app import db
+from app.models.metric_sketch import MetricSketch
+
+class MetricSketchRepository:
+    """Repository for MetricSketch model data access"""
+
+    @staticmethod
+    def get(metric: str, day: date, provider_id: int,
+            for_update: bool = False) -> Optional[MetricSketch]:
+        """Get the sketch for a (metric, day, provider) key"""
+        query = MetricSketch.query.filter_by(metric=metric, day=day, provider_id=provider_id)
+
+        if for_update:
+            query = query.with_for_update()
+
+        return query.first()
+
+    @staticmethod
+    def save(metric: str, day: date, provider_id: int, payload: bytes) -> MetricSketch:
+        """Insert or replace the sketch payload for a key"""
+        sketch = MetricSketchRepository.get(metric, day, provider_id)
+
+        if sketch:
+            sketch.payload = payload
+        else:
+            sketch = MetricSketch(metric=metric, day=day, provider_id=provider_id,
+                                  payload=payload)
+            db.session.add(sketch)
+
+        db.session.commit()
+        return sketch
+
+    @staticmethod
+    def get_payloads(metric: str, start_day: date, end_day: date,
+                     provider_id: Optional[int] = None) -> List[bytes]:
+        """Get serialized sketches for a metric within a day range (inclusive)"""
+        query = db.session.query(MetricSketch.payload).filter(
+            and_(
+                MetricSketch.metric == metric,
+                MetricSketch.day >= start_day,
+                MetricSketch.day <= end_day
+            )
+        )
+
+        if provider_id:
+            query = query.filter(MetricSketch.provider_id == provider_id)
+
+        return [row[0] for row in query.all()]
+
+    @staticmethod
+    def get_daily_payloads(metric: str, start_day: date, end_day: date,
+                           provider_id: Optional[int] = None) -> List[tuple]:
+        """Get (day, payload) rows for a metric within a day range (inclusive)"""
+        query = db.session.query(MetricSketch.day, MetricSketch.payload).filter(
+            and_(
+                MetricSketch.metric == metric,
+                MetricSketch.day >= start_day,
+                MetricSketch.day <= end_day
+            )
+        )
+
+        if provider_id:
+            query = query.filter(MetricSketch.provider_id == provider_id)
+
+        return query.order_by(MetricSketch.day).all()
+
+    @staticmethod
+    def delete_range(metric: str, start_day: Optional[date] = None,
+                     end_day: Optional[date] = None) -> int:
+        """Delete sketches for a metric, optionally limited to a day range"""
+        query = MetricSketch.query.filter(MetricSketch.metric == metric)
+
+        if start_day:
+            query = query.filter(MetricSketch.day >= start_day)
+        if end_day:
+            query = query.filter(MetricSketch.day <= end_day)
+
+        count = query.delete(synchronize_session=False)
+        db.session.commit()
+        return count
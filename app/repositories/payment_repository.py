@@ -2,11 +2,17 @@
 Payment repository for data access operations
 """
 
-from typing import List, Optional
+from typing import Iterator, List, Optional, Tuple
 from datetime import datetime, timedelta
 from sqlalchemy import and_, or_
 from app import db
 from app.models.payment import Payment
+from app.models.read_models import PaymentView
+from app.utils.fieldsets import load_columns
+from app.utils.pagination import keyset_page
+from app.utils.status_counts import track_status_changes, status_histogram, cached_status_histogram
+
+track_status_changes(Payment)
 
 class PaymentRepository:
     """Repository for Payment model data access"""
@@ -41,6 +47,22 @@ class PaymentRepository:
         """Get all payments with pagination"""
         return Payment.query.order_by(Payment.created_at.desc()).limit(limit).offset(offset).all()
     
+    @staticmethod
+    def get_page(limit: int = 100, cursor: Optional[str] = None,
+                 user_id: Optional[int] = None, rental_id: Optional[int] = None, status: Optional[str] = None,
+                 columns: Optional[List[str]] = None) -> Tuple[List[Payment], Optional[str]]:
+        """
+        Get a keyset page of payments, newest first, optionally filtered by user_id/rental_id/status
+        Returns: (payments, next_cursor)
+        """
+        filters = {'user_id': user_id, 'rental_id': rental_id, 'status': status}
+        query = Payment.query.filter_by(**{k: v for k, v in filters.items() if v is not None})
+        
+        if columns:
+            query = load_columns(query, Payment, [*columns, 'created_at'])
+        
+        return keyset_page(query, Payment, limit, cursor)
+    
     @staticmethod
     def get_by_user(user_id: int, limit: int = 100) -> List[Payment]:
         """Get payments by user"""
@@ -118,10 +140,25 @@ class PaymentRepository:
         db.session.commit()
         return True
     
+    @staticmethod
+    def get_status_counts(start_date: Optional[datetime] = None,
+                          end_date: Optional[datetime] = None) -> dict:
+        """Count payments for every status in one query, optionally by creation time"""
+        criteria = []
+        if start_date:
+            criteria.append(Payment.created_at >= start_date)
+        if end_date:
+            criteria.append(Payment.created_at <= end_date)
+        
+        if criteria:
+            return status_histogram(Payment, *criteria)
+        
+        return cached_status_histogram(Payment)
+    
     @staticmethod
     def count_by_status(status: str) -> int:
         """Count payments by status"""
-        return Payment.query.filter_by(status=status).count()
+        return PaymentRepository.get_status_counts().get(status, 0)
     
     @staticmethod
     def count_by_user(user_id: int) -> int:
@@ -193,19 +230,12 @@ class PaymentRepository:
     def get_payment_statistics(start_date: Optional[datetime] = None,
                                end_date: Optional[datetime] = None) -> dict:
         """Get payment statistics"""
-        from sqlalchemy import func
-        
-        query = Payment.query
-        
-        if start_date:
-            query = query.filter(Payment.created_at >= start_date)
-        if end_date:
-            query = query.filter(Payment.created_at <= end_date)
+        counts = PaymentRepository.get_status_counts(start_date, end_date)
         
-        total_payments = query.count()
-        completed = query.filter_by(status='completed').count()
-        pending = query.filter_by(status='pending').count()
-        failed = query.filter_by(status='failed').count()
+        total_payments = sum(counts.values())
+        completed = counts.get('completed', 0)
+        pending = counts.get('pending', 0)
+        failed = counts.get('failed', 0)
         
         total_revenue = PaymentRepository.get_total_revenue(start_date, end_date)
         
@@ -217,3 +247,20 @@ class PaymentRepository:
             'total_revenue': total_revenue,
             'success_rate': (completed / total_payments * 100) if total_payments > 0 else 0
         }
+    
+    # Read models: plain column rows for list views, no ORM instances
+    
+    @staticmethod
+    def iter_views(user_id: Optional[int] = None, status: Optional[str] = None,
+                   columns: Optional[List[str]] = None, limit: Optional[int] = None,
+                   batch_size: int = 1000) -> Iterator[PaymentView]:
+        """Stream payments as list rows, newest first, batch_size rows at a time (all when no limit)"""
+        stmt = PaymentView.select(columns)
+        
+        if user_id:
+            stmt = stmt.where(Payment.user_id == user_id)
+        if status:
+            stmt = stmt.where(Payment.status == status)
+        
+        stmt = stmt.order_by(Payment.created_at.desc(), Payment.id.desc()).limit(limit)
+        return PaymentView.stream(stmt, batch_size)
@@ -2,11 +2,17 @@
 Rental repository for data access operations
 """
 
-from typing import List, Optional
+from typing import Iterator, List, Optional, Tuple
 from datetime import datetime, timedelta
 from sqlalchemy import and_, or_
 from app import db
 from app.models.rental import Rental
+from app.models.read_models import RentalView
+from app.utils.fieldsets import load_columns
+from app.utils.pagination import keyset_page
+from app.utils.status_counts import track_status_changes, status_histogram, cached_status_histogram
+
+track_status_changes(Rental)
 
 class RentalRepository:
     """Repository for Rental model data access"""
@@ -37,14 +43,33 @@ class RentalRepository:
         return Rental.query.filter_by(rental_code=rental_code).first()
     
     @staticmethod
-    def get_all(limit: int = 100, offset: int = 0) -> List[Rental]:
-        """Get all rentals with pagination"""
-        return Rental.query.order_by(Rental.created_at.desc()).limit(limit).offset(offset).all()
+    def get_all(limit: int = 100, offset: int = 0,
+                columns: Optional[List[str]] = None) -> List[Rental]:
+        """Get all rentals with pagination (only the given columns when set)"""
+        return load_columns(Rental.query, Rental, columns)\
+                     .order_by(Rental.created_at.desc()).limit(limit).offset(offset).all()
+    
+    @staticmethod
+    def get_page(limit: int = 100, cursor: Optional[str] = None,
+                 user_id: Optional[int] = None, scooter_id: Optional[int] = None, status: Optional[str] = None,
+                 columns: Optional[List[str]] = None) -> Tuple[List[Rental], Optional[str]]:
+        """
+        Get a keyset page of rentals, newest first, optionally filtered by user_id/scooter_id/status
+        Returns: (rentals, next_cursor)
+        """
+        filters = {'user_id': user_id, 'scooter_id': scooter_id, 'status': status}
+        query = Rental.query.filter_by(**{k: v for k, v in filters.items() if v is not None})
+        
+        if columns:
+            query = load_columns(query, Rental, [*columns, 'created_at'])
+        
+        return keyset_page(query, Rental, limit, cursor)
     
     @staticmethod
-    def get_by_user(user_id: int, limit: int = 100) -> List[Rental]:
-        """Get rentals by user"""
-        return Rental.query.filter_by(user_id=user_id)\
+    def get_by_user(user_id: int, limit: int = 100,
+                    columns: Optional[List[str]] = None) -> List[Rental]:
+        """Get rentals by user (only the given columns when set)"""
+        return load_columns(Rental.query, Rental, columns).filter_by(user_id=user_id)\
                            .order_by(Rental.created_at.desc())\
                            .limit(limit).all()
     
@@ -56,9 +81,10 @@ class RentalRepository:
                            .limit(limit).all()
     
     @staticmethod
-    def get_by_status(status: str, limit: int = 100) -> List[Rental]:
-        """Get rentals by status"""
-        return Rental.query.filter_by(status=status)\
+    def get_by_status(status: str, limit: int = 100,
+                      columns: Optional[List[str]] = None) -> List[Rental]:
+        """Get rentals by status (only the given columns when set)"""
+        return load_columns(Rental.query, Rental, columns).filter_by(status=status)\
                            .order_by(Rental.created_at.desc())\
                            .limit(limit).all()
     
@@ -69,6 +95,53 @@ class RentalRepository:
                            .order_by(Rental.start_time.desc())\
                            .limit(limit).all()
     
+    @staticmethod
+    def get_active_version(user_id: Optional[int] = None) -> tuple:
+        """Get (count, latest updated_at) of active rentals, optionally for one user"""
+        return db.session.execute(RentalRepository.active_version_stmt(user_id)).one()
+    
+    @staticmethod
+    def active_version_stmt(user_id: Optional[int] = None):
+        """Statement behind get_active_version (shared with the async service)"""
+        from sqlalchemy import func, select
+        
+        stmt = select(func.count(Rental.id), func.max(Rental.updated_at))\
+            .where(Rental.status == 'active')
+        
+        if user_id:
+            stmt = stmt.where(Rental.user_id == user_id)
+        
+        return stmt
+    
+    @staticmethod
+    def active_views_stmt(user_id: Optional[int] = None, limit: int = 100):
+        """Active rentals (of one user) as list rows, latest start first"""
+        stmt = RentalView.select().where(Rental.status == 'active')
+        
+        if user_id:
+            stmt = stmt.where(Rental.user_id == user_id)
+        
+        return stmt.order_by(Rental.start_time.desc()).limit(limit)
+    
+    @staticmethod
+    def get_status(rental_id: int):
+        """Get a rental's status row, see status_stmt"""
+        return db.session.execute(RentalRepository.status_stmt(rental_id)).first()
+    
+    @staticmethod
+    def status_stmt(rental_id: int):
+        """
+        Status columns of one rental plus its scooter's provider_id (for access
+        checks) in a single row (shared with the async service)
+        """
+        from sqlalchemy import select
+        from app.models.scooter import Scooter
+        
+        return select(Rental.id, Rental.user_id, Rental.status, Rental.start_time, Rental.end_time,
+                      Rental.duration_minutes, Rental.total_cost, Scooter.provider_id)\
+            .join(Scooter, Scooter.id == Rental.scooter_id)\
+            .where(Rental.id == rental_id)
+    
     @staticmethod
     def get_active_by_user(user_id: int) -> Optional[Rental]:
         """Get active rental for a user"""
@@ -127,10 +200,25 @@ class RentalRepository:
         db.session.commit()
         return True
     
+    @staticmethod
+    def get_status_counts(start_date: Optional[datetime] = None,
+                          end_date: Optional[datetime] = None) -> dict:
+        """Count rentals for every status in one query, optionally by start time"""
+        criteria = []
+        if start_date:
+            criteria.append(Rental.start_time >= start_date)
+        if end_date:
+            criteria.append(Rental.start_time <= end_date)
+        
+        if criteria:
+            return status_histogram(Rental, *criteria)
+        
+        return cached_status_histogram(Rental)
+    
     @staticmethod
     def count_by_status(status: str) -> int:
         """Count rentals by status"""
-        return Rental.query.filter_by(status=status).count()
+        return RentalRepository.get_status_counts().get(status, 0)
     
     @staticmethod
     def count_by_user(user_id: int) -> int:
@@ -184,3 +272,128 @@ class RentalRepository:
             'total_spent': float(total_spent) if total_spent else 0.0,
             'average_duration': float(avg_duration) if avg_duration else 0.0
         }
+    
+    @staticmethod
+    def get_rental_intervals(start_date: datetime, end_date: datetime,
+                             provider_id: Optional[int] = None) -> List[tuple]:
+        """
+        Get (scooter_id, start_epoch, end_epoch) rows for rentals overlapping a window
+        Times are UTC epoch seconds computed in SQL; active rentals have end_epoch None.
+        """
+        from sqlalchemy import select, extract, cast, BigInteger
+        from app.models.scooter import Scooter
+        
+        stmt = select(
+            Rental.scooter_id,
+            cast(extract('epoch', Rental.start_time), BigInteger),
+            cast(extract('epoch', Rental.end_time), BigInteger)
+        ).where(
+            and_(
+                Rental.start_time < end_date,
+                or_(Rental.end_time.is_(None), Rental.end_time > start_date)
+            )
+        )
+        
+        if provider_id:
+            stmt = stmt.join(Scooter, Rental.scooter_id == Scooter.id)\
+                       .where(Scooter.provider_id == provider_id)
+        
+        return db.session.execute(stmt).all()
+    
+    @staticmethod
+    def iter_completed_metrics(start_date: Optional[datetime] = None,
+                               end_date: Optional[datetime] = None,
+                               batch_size: int = 5000):
+        """
+        Stream (end_time, provider_id, duration_minutes, total_cost) rows for completed rentals
+        Rows are fetched in batches without building Rental objects.
+        """
+        from sqlalchemy import select
+        from app.models.scooter import Scooter
+        
+        stmt = select(Rental.end_time, Scooter.provider_id,
+                      Rental.duration_minutes, Rental.total_cost)\
+            .join(Scooter, Rental.scooter_id == Scooter.id)\
+            .where(Rental.status == 'completed')
+        
+        if start_date:
+            stmt = stmt.where(Rental.end_time >= start_date)
+        if end_date:
+            stmt = stmt.where(Rental.end_time <= end_date)
+        
+        result = db.session.execute(stmt.execution_options(yield_per=batch_size))
+        for row in result:
+            yield row
+    
+    @staticmethod
+    def iter_rider_starts(start_date: Optional[datetime] = None,
+                          end_date: Optional[datetime] = None,
+                          batch_size: int = 5000):
+        """
+        Stream (start_time, provider_id, user_id) rows for all rentals
+        Rows are fetched in batches without building Rental objects.
+        """
+        from sqlalchemy import select
+        from app.models.scooter import Scooter
+        
+        stmt = select(Rental.start_time, Scooter.provider_id, Rental.user_id)\
+            .join(Scooter, Rental.scooter_id == Scooter.id)
+        
+        if start_date:
+            stmt = stmt.where(Rental.start_time >= start_date)
+        if end_date:
+            stmt = stmt.where(Rental.start_time <= end_date)
+        
+        result = db.session.execute(stmt.execution_options(yield_per=batch_size))
+        for row in result:
+            yield row
+    
+    # Read models: plain column rows for list views, no ORM instances
+    
+    @staticmethod
+    def get_views(limit: int = 100, offset: int = 0, user_id: Optional[int] = None,
+                  status: Optional[str] = None,
+                  columns: Optional[List[str]] = None) -> List[RentalView]:
+        """Get rentals as list rows, newest first (only the given columns when set)"""
+        stmt = RentalView.select(columns)
+        
+        if user_id:
+            stmt = stmt.where(Rental.user_id == user_id)
+        if status:
+            stmt = stmt.where(Rental.status == status)
+        
+        stmt = stmt.order_by(Rental.created_at.desc()).limit(limit).offset(offset)
+        return RentalView.from_rows(db.session.execute(stmt))
+    
+    @staticmethod
+    def get_page_views(limit: int = 100, cursor: Optional[str] = None,
+                       user_id: Optional[int] = None, scooter_id: Optional[int] = None,
+                       status: Optional[str] = None,
+                       columns: Optional[List[str]] = None) -> Tuple[List[RentalView], Optional[str]]:
+        """Get a keyset page of rentals as list rows, see get_page"""
+        stmt = RentalView.select(columns and [*columns, 'created_at'])
+        
+        if user_id:
+            stmt = stmt.where(Rental.user_id == user_id)
+        if scooter_id:
+            stmt = stmt.where(Rental.scooter_id == scooter_id)
+        if status:
+            stmt = stmt.where(Rental.status == status)
+        
+        rows, next_cursor = keyset_page(stmt, Rental, limit, cursor)
+        return RentalView.from_rows(rows), next_cursor
+    
+    @staticmethod
+    def iter_views(user_id: Optional[int] = None, status: Optional[str] = None,
+                   columns: Optional[List[str]] = None, limit: Optional[int] = None,
+                   batch_size: int = 1000) -> Iterator[RentalView]:
+        """Stream rentals as list rows, newest first, batch_size rows at a time (all when no limit)"""
+        stmt = RentalView.select(columns)
+        
+        if user_id:
+            stmt = stmt.where(Rental.user_id == user_id)
+        if status:
+            stmt = stmt.where(Rental.status == status)
+        
+        stmt = stmt.order_by(Rental.created_at.desc(), Rental.id.desc()).limit(limit)
+        return RentalView.stream(stmt, batch_size)
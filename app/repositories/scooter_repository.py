@@ -2,10 +2,19 @@
 Scooter repository for data access operations
 """
 
-from typing import List, Optional
+from typing import List, Optional, Tuple
 from sqlalchemy import and_, or_
 from app import db
 from app.models.scooter import Scooter
+from app.models.read_models import ScooterView
+from app.models.scooter_change import ScooterChange
+from app.utils.change_log import track_changes, record_changes
+from app.utils.fieldsets import load_columns
+from app.utils.pagination import keyset_page
+from app.utils.status_counts import track_status_changes, status_histogram, cached_status_histogram
+
+track_status_changes(Scooter)
+track_changes(Scooter, ScooterChange)
 
 class ScooterRepository:
     """Repository for Scooter model data access"""
@@ -52,14 +61,32 @@ class ScooterRepository:
         return Scooter.query.filter_by(qr_code=qr_code).first()
     
     @staticmethod
-    def get_all(limit: int = 100, offset: int = 0) -> List[Scooter]:
-        """Get all scooters with pagination"""
-        return Scooter.query.limit(limit).offset(offset).all()
+    def get_all(limit: int = 100, offset: int = 0,
+                columns: Optional[List[str]] = None) -> List[Scooter]:
+        """Get all scooters with pagination (only the given columns when set)"""
+        return load_columns(Scooter.query, Scooter, columns).limit(limit).offset(offset).all()
+    
+    @staticmethod
+    def get_page(limit: int = 100, cursor: Optional[str] = None,
+                 status: Optional[str] = None, provider_id: Optional[int] = None,
+                 columns: Optional[List[str]] = None) -> Tuple[List[Scooter], Optional[str]]:
+        """
+        Get a keyset page of scooters, newest first, optionally filtered by status/provider_id
+        Returns: (scooters, next_cursor)
+        """
+        filters = {'status': status, 'provider_id': provider_id}
+        query = Scooter.query.filter_by(**{k: v for k, v in filters.items() if v is not None})
+        
+        if columns:
+            query = load_columns(query, Scooter, [*columns, 'created_at'])
+        
+        return keyset_page(query, Scooter, limit, cursor)
     
     @staticmethod
-    def get_by_status(status: str, limit: int = 100) -> List[Scooter]:
-        """Get scooters by status"""
-        return Scooter.query.filter_by(status=status).limit(limit).all()
+    def get_by_status(status: str, limit: int = 100,
+                      columns: Optional[List[str]] = None) -> List[Scooter]:
+        """Get scooters by status (only the given columns when set)"""
+        return load_columns(Scooter.query, Scooter, columns).filter_by(status=status).limit(limit).all()
     
     @staticmethod
     def get_available(limit: int = 100) -> List[Scooter]:
@@ -71,6 +98,23 @@ class ScooterRepository:
             )
         ).limit(limit).all()
     
+    @staticmethod
+    def get_available_version() -> tuple:
+        """Get (count, latest updated_at) of available scooters in one aggregate query"""
+        return db.session.execute(ScooterRepository.available_version_stmt()).one()
+    
+    @staticmethod
+    def available_version_stmt():
+        """Statement behind get_available_version (shared with the async service)"""
+        from sqlalchemy import func, select
+        
+        return select(func.count(Scooter.id), func.max(Scooter.updated_at)).where(
+            and_(
+                Scooter.status == 'available',
+                Scooter.battery_level > 10
+            )
+        )
+    
     @staticmethod
     def get_by_provider(provider_id: int, limit: int = 100) -> List[Scooter]:
         """Get scooters by provider"""
@@ -78,18 +122,25 @@ class ScooterRepository:
     
     @staticmethod
     def get_nearby(latitude: float, longitude: float, radius_km: float = 5.0, 
-                   limit: int = 50) -> List[Scooter]:
+                   limit: int = 50, columns: Optional[List[str]] = None) -> List[Scooter]:
         """Get scooters near a location (simplified - uses bounding box)"""
+        query = load_columns(Scooter.query, Scooter, columns and [*columns, 'latitude', 'longitude'])
+        
+        return query.filter(
+            ScooterRepository._nearby_criteria(latitude, longitude, radius_km)
+        ).limit(limit).all()
+    
+    @staticmethod
+    def _nearby_criteria(latitude: float, longitude: float, radius_km: float):
+        """Bounding box around a location, restricted to available scooters"""
         lat_delta = radius_km / 111.0
         lon_delta = radius_km / (111.0 * abs(latitude))
         
-        return Scooter.query.filter(
-            and_(
-                Scooter.latitude.between(latitude - lat_delta, latitude + lat_delta),
-                Scooter.longitude.between(longitude - lon_delta, longitude + lon_delta),
-                Scooter.status == 'available'
-            )
-        ).limit(limit).all()
+        return and_(
+            Scooter.latitude.between(latitude - lat_delta, latitude + lat_delta),
+            Scooter.longitude.between(longitude - lon_delta, longitude + lon_delta),
+            Scooter.status == 'available'
+        )
     
     @staticmethod
     def get_low_battery(threshold: int = 20, limit: int = 100) -> List[Scooter]:
@@ -144,10 +195,18 @@ class ScooterRepository:
             )
         ).limit(limit).all()
     
+    @staticmethod
+    def get_status_counts(provider_id: Optional[int] = None) -> dict:
+        """Count scooters for every status in one query"""
+        if provider_id:
+            return status_histogram(Scooter, Scooter.provider_id == provider_id)
+        
+        return cached_status_histogram(Scooter)
+    
     @staticmethod
     def count_by_status(status: str) -> int:
         """Count scooters by status"""
-        return Scooter.query.filter_by(status=status).count()
+        return ScooterRepository.get_status_counts().get(status, 0)
     
     @staticmethod
     def count_by_provider(provider_id: int) -> int:
@@ -159,6 +218,32 @@ class ScooterRepository:
         """Check if scooter exists by identifier"""
         return Scooter.query.filter_by(identifier=identifier.upper()).count() > 0
     
+    @staticmethod
+    def get_identifiers() -> set:
+        """Get every scooter identifier, for validating imports without a query per row"""
+        from sqlalchemy import select
+        
+        return set(db.session.execute(select(Scooter.identifier)).scalars())
+    
+    @staticmethod
+    def bulk_insert(mappings: List[dict]) -> int:
+        """
+        Insert scooters from column value dicts in one executemany INSERT
+        Skips per-object ORM work; the rows are versioned in the change log
+        in the same transaction. Raises IntegrityError on a duplicate.
+        """
+        from sqlalchemy import insert
+        
+        try:
+            db.session.execute(insert(Scooter), mappings)
+            record_changes(db.session, Scooter,
+                           Scooter.identifier.in_([m['identifier'] for m in mappings]))
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+        return len(mappings)
+    
     @staticmethod
     def bulk_update_status(scooter_ids: List[int], status: str) -> int:
         """Bulk update scooter status"""
@@ -168,3 +253,181 @@ class ScooterRepository:
         )
         db.session.commit()
         return count
+    
+    @staticmethod
+    def bulk_set_status(status: str, ids: Optional[List[int]] = None,
+                        provider_id: Optional[int] = None, battery_below: Optional[int] = None,
+                        bbox: Optional[tuple] = None, current_status: Optional[str] = None,
+                        batch_size: int = 500) -> Tuple[list, int]:
+        """
+        Set the status of every scooter matching the filters
+        The matching rows are selected (and locked where supported) once with
+        their rental state; skipped is counted from that snapshot. The UPDATE,
+        batch_size ids at a time, still excludes scooters with an active or
+        overdue rental, so a rental starting meanwhile cannot be overridden.
+        bbox: (min_lon, min_lat, max_lon, max_lat)
+        Returns: (updated rows of id, status, battery_level, latitude, longitude,
+                  skipped_for_active_rentals)
+        """
+        from sqlalchemy import exists, select, update
+        from app.models.rental import Rental
+        
+        criteria = [Scooter.status != status]
+        if ids is not None:
+            criteria.append(Scooter.id.in_(ids))
+        if provider_id is not None:
+            criteria.append(Scooter.provider_id == provider_id)
+        if battery_below is not None:
+            criteria.append(Scooter.battery_level < battery_below)
+        if bbox:
+            min_lon, min_lat, max_lon, max_lat = bbox
+            criteria.append(Scooter.latitude.between(min_lat, max_lat))
+            criteria.append(Scooter.longitude.between(min_lon, max_lon))
+        if current_status:
+            criteria.append(Scooter.status == current_status)
+        
+        rented = exists().where(Rental.scooter_id == Scooter.id,
+                                Rental.status.in_(('active', 'overdue')))
+        
+        try:
+            matched = db.session.execute(
+                select(Scooter.id, rented.label('rented')).where(*criteria)
+                .order_by(Scooter.id).with_for_update(of=Scooter)).all()
+            free_ids = [row.id for row in matched if not row.rented]
+            
+            updated = []
+            for start in range(0, len(free_ids), batch_size):
+                updated += db.session.execute(
+                    update(Scooter)
+                    .where(Scooter.id.in_(free_ids[start:start + batch_size]), ~rented)
+                    .values(status=status)
+                    .returning(Scooter.id, Scooter.status, Scooter.battery_level,
+                               Scooter.latitude, Scooter.longitude),
+                    execution_options={'synchronize_session': False}
+                ).all()
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+        return updated, len(matched) - len(updated)
+    
+    @staticmethod
+    def get_fleet_index(provider_id: Optional[int] = None) -> List[tuple]:
+        """Get (id, provider_id) rows for the fleet without loading Scooter objects"""
+        from sqlalchemy import select
+        
+        stmt = select(Scooter.id, Scooter.provider_id).order_by(Scooter.id)
+        
+        if provider_id:
+            stmt = stmt.where(Scooter.provider_id == provider_id)
+        
+        return db.session.execute(stmt).all()
+    
+    @staticmethod
+    def get_label_data(scooter_ids: Optional[List[int]] = None,
+                       provider_id: Optional[int] = None) -> List[tuple]:
+        """Get (qr_code, identifier) rows for printing labels, ordered by identifier"""
+        from sqlalchemy import select
+        
+        stmt = select(Scooter.qr_code, Scooter.identifier).order_by(Scooter.identifier)
+        
+        if scooter_ids:
+            stmt = stmt.where(Scooter.id.in_(scooter_ids))
+        if provider_id:
+            stmt = stmt.where(Scooter.provider_id == provider_id)
+        
+        return db.session.execute(stmt).all()
+    
+    # Read models: plain column rows for list views, no ORM instances
+    
+    @staticmethod
+    def get_views(limit: int = 100, offset: int = 0, status: Optional[str] = None,
+                  columns: Optional[List[str]] = None) -> List[ScooterView]:
+        """Get scooters as list rows (only the given columns when set)"""
+        stmt = ScooterView.select(columns)
+        
+        if status:
+            stmt = stmt.where(Scooter.status == status)
+        
+        stmt = stmt.order_by(Scooter.id).limit(limit).offset(offset)
+        return ScooterView.from_rows(db.session.execute(stmt))
+    
+    @staticmethod
+    def get_page_views(limit: int = 100, cursor: Optional[str] = None,
+                       status: Optional[str] = None, provider_id: Optional[int] = None,
+                       columns: Optional[List[str]] = None) -> Tuple[List[ScooterView], Optional[str]]:
+        """Get a keyset page of scooters as list rows, see get_page"""
+        stmt = ScooterView.select(columns and [*columns, 'created_at'])
+        
+        if status:
+            stmt = stmt.where(Scooter.status == status)
+        if provider_id:
+            stmt = stmt.where(Scooter.provider_id == provider_id)
+        
+        rows, next_cursor = keyset_page(stmt, Scooter, limit, cursor)
+        return ScooterView.from_rows(rows), next_cursor
+    
+    @staticmethod
+    def get_available_views(limit: int = 100) -> List[ScooterView]:
+        """Get available scooters as list rows"""
+        stmt = ScooterRepository.available_views_stmt(limit)
+        return ScooterView.from_rows(db.session.execute(stmt))
+    
+    @staticmethod
+    def available_views_stmt(limit: int = 100):
+        """Statement behind get_available_views (shared with the async service)"""
+        return ScooterView.select().where(
+            and_(
+                Scooter.status == 'available',
+                Scooter.battery_level > 10
+            )
+        ).limit(limit)
+    
+    @staticmethod
+    def get_nearby_views(latitude: float, longitude: float, radius_km: float = 5.0,
+                         limit: int = 50, columns: Optional[List[str]] = None) -> List[ScooterView]:
+        """Get scooters near a location as list rows"""
+        stmt = ScooterRepository.nearby_views_stmt(latitude, longitude, radius_km, limit, columns)
+        return ScooterView.from_rows(db.session.execute(stmt))
+    
+    @staticmethod
+    def nearby_views_stmt(latitude: float, longitude: float, radius_km: float = 5.0,
+                          limit: int = 50, columns: Optional[List[str]] = None):
+        """Statement behind get_nearby_views (shared with the async service)"""
+        return ScooterView.select(columns and [*columns, 'latitude', 'longitude']).where(
+            ScooterRepository._nearby_criteria(latitude, longitude, radius_km)
+        ).limit(limit)
+    
+    @staticmethod
+    def get_views_by_ids(scooter_ids: List[int], columns: Optional[List[str]] = None) -> List[ScooterView]:
+        """Get the given scooters as list rows, ordered by id"""
+        stmt = ScooterView.select(columns).where(Scooter.id.in_(scooter_ids)).order_by(Scooter.id)
+        return ScooterView.from_rows(db.session.execute(stmt))
+    
+    # Change log: versions for incremental sync
+    
+    @staticmethod
+    def get_changes(since: int, limit: int = 1000, provider_id: Optional[int] = None) -> List[tuple]:
+        """Get (version, scooter_id, deleted, changed_at) rows after a version, oldest first"""
+        from sqlalchemy import select
+        
+        stmt = select(ScooterChange.version, ScooterChange.scooter_id, ScooterChange.deleted,
+                      ScooterChange.changed_at).where(ScooterChange.version > since)
+        
+        if provider_id:
+            stmt = stmt.where(ScooterChange.provider_id == provider_id)
+        
+        stmt = stmt.order_by(ScooterChange.version).limit(limit)
+        return db.session.execute(stmt).all()
+    
+    @staticmethod
+    def get_change_version(changed_before=None) -> int:
+        """Get the latest change version (of changes made before a time when given)"""
+        from sqlalchemy import func, select
+        
+        stmt = select(func.max(ScooterChange.version))
+        
+        if changed_before is not None:
+            stmt = stmt.where(ScooterChange.changed_at <= changed_before)
+        
+        return db.session.execute(stmt).scalar() or 0
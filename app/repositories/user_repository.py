@@ -2,9 +2,15 @@
 User repository for data access operations
 """
 
-from typing import List, Optional
+from typing import Iterator, List, Optional, Tuple
+from datetime import datetime
+from sqlalchemy.orm import make_transient_to_detached
+from sqlalchemy.orm.attributes import set_committed_value
 from app import db
 from app.models.user import User
+from app.models.read_models import UserView
+from app.utils.fieldsets import load_columns
+from app.utils.pagination import keyset_page
 
 class UserRepository:
     """Repository for User model data access"""
@@ -33,20 +39,71 @@ class UserRepository:
         """Get user by ID"""
         return User.query.get(user_id)
     
+    # Never copied into cache snapshots (they may be pickled into Redis)
+    CREDENTIAL_COLUMNS = frozenset({'password_hash'})
+    
+    @staticmethod
+    def snapshot(user: User) -> dict:
+        """Copy a user's column values, except credentials, for caching outside the session"""
+        return {attr.key: getattr(user, attr.key) for attr in User.__mapper__.column_attrs
+                if attr.key not in UserRepository.CREDENTIAL_COLUMNS}
+    
+    @staticmethod
+    def from_snapshot(values: dict) -> User:
+        """
+        Attach a cached user snapshot to the session without querying
+        Columns missing from the snapshot (credentials) load on first access.
+        """
+        user = User.__mapper__.class_manager.new_instance()
+        for key, value in values.items():
+            set_committed_value(user, key, value)
+        make_transient_to_detached(user)
+        return db.session.merge(user, load=False)
+    
+    @staticmethod
+    def get_token_state(user_id: int) -> Optional[tuple]:
+        """Get (password_hash, role, is_active) without loading the full user"""
+        return db.session.execute(UserRepository.token_state_stmt(user_id)).first()
+    
+    @staticmethod
+    def token_state_stmt(user_id: int):
+        """Statement behind get_token_state (shared with the async service)"""
+        from sqlalchemy import select
+        
+        return select(User.password_hash, User.role, User.is_active).where(User.id == user_id)
+    
     @staticmethod
     def get_by_email(email: str) -> Optional[User]:
         """Get user by email"""
         return User.query.filter_by(email=email.lower()).first()
     
     @staticmethod
-    def get_all(limit: int = 100, offset: int = 0) -> List[User]:
-        """Get all users with pagination"""
-        return User.query.limit(limit).offset(offset).all()
+    def get_all(limit: int = 100, offset: int = 0,
+                columns: Optional[List[str]] = None) -> List[User]:
+        """Get all users with pagination (only the given columns when set)"""
+        return load_columns(User.query, User, columns).limit(limit).offset(offset).all()
+    
+    @staticmethod
+    def get_page(limit: int = 100, cursor: Optional[str] = None,
+                 role: Optional[str] = None, is_active: Optional[bool] = None,
+                 columns: Optional[List[str]] = None) -> Tuple[List[User], Optional[str]]:
+        """
+        Get a keyset page of users, newest first, optionally filtered by role/is_active
+        Returns: (users, next_cursor)
+        """
+        filters = {'role': role, 'is_active': is_active}
+        query = User.query.filter_by(**{k: v for k, v in filters.items() if v is not None})
+        
+        if columns:
+            query = load_columns(query, User, [*columns, 'created_at'])
+        
+        return keyset_page(query, User, limit, cursor)
     
     @staticmethod
-    def get_by_role(role: str, limit: int = 100) -> List[User]:
-        """Get users by role"""
-        return User.query.filter_by(role=role).limit(limit).all()
+    def get_by_role(role: str, limit: int = 100,
+                    columns: Optional[List[str]] = None) -> List[User]:
+        """Get users by role (only the given columns when set)"""
+        return load_columns(User.query, User, columns).filter_by(role=role).limit(limit).all()
     
     @staticmethod
     def get_active_users(limit: int = 100) -> List[User]:
@@ -113,3 +170,46 @@ class UserRepository:
     def exists(email: str) -> bool:
         """Check if user exists by email"""
         return User.query.filter_by(email=email.lower()).count() > 0
+    
+    @staticmethod
+    def iter_rental_activity(created_from: Optional[datetime] = None,
+                             created_to: Optional[datetime] = None,
+                             role: str = 'customer', batch_size: int = 5000):
+        """
+        Stream (user_id, user_created_at, rental_start_time) rows ordered by user
+        Users without rentals appear once with rental_start_time None. Rows are
+        fetched in batches without building User or Rental objects.
+        """
+        from sqlalchemy import select
+        from app.models.rental import Rental
+        
+        stmt = select(User.id, User.created_at, Rental.start_time)\
+            .outerjoin(Rental, Rental.user_id == User.id)\
+            .where(User.role == role)\
+            .order_by(User.id)
+        
+        if created_from:
+            stmt = stmt.where(User.created_at >= created_from)
+        if created_to:
+            stmt = stmt.where(User.created_at < created_to)
+        
+        result = db.session.execute(stmt.execution_options(yield_per=batch_size))
+        for row in result:
+            yield row
+    
+    # Read models: plain column rows for list views, no ORM instances
+    
+    @staticmethod
+    def iter_views(role: Optional[str] = None, is_active: Optional[bool] = None,
+                   columns: Optional[List[str]] = None, limit: Optional[int] = None,
+                   offset: int = 0, batch_size: int = 1000) -> Iterator[UserView]:
+        """Stream users as list rows by id, batch_size rows at a time (all when no limit)"""
+        stmt = UserView.select(columns)
+        
+        if role:
+            stmt = stmt.where(User.role == role)
+        if is_active is not None:
+            stmt = stmt.where(User.is_active == is_active)
+        
+        stmt = stmt.order_by(User.id).limit(limit).offset(offset)
+        return UserView.stream(stmt, batch_size)
@@ -6,5 +6,6 @@ from .auth_service import AuthService
 from .scooter_service import ScooterService
 from .rental_service import RentalService
 from .payment_service import PaymentService
+from .analytics_service import AnalyticsService
 
-__all__ = ['AuthService', 'ScooterService', 'RentalService', 'PaymentService']
+__all__ = ['AuthService', 'ScooterService', 'RentalService', 'PaymentService', 'AnalyticsService']
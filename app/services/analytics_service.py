@@ -0,0 +1,426 @@
+"""
+Analytics service for fleet-wide reporting
+"""
+
+from typing import Optional, Tuple, Sequence
+from datetime import datetime, timedelta, date
+import numpy as np
+import pytz
+from sqlalchemy.exc import IntegrityError
+from app import db, timezone
+from app.repositories.rental_repository import RentalRepository
+from app.repositories.scooter_repository import ScooterRepository
+from app.repositories.user_repository import UserRepository
+from app.repositories.metric_sketch_repository import MetricSketchRepository
+from app.utils.sketches import DDSketch, HyperLogLog
+
+SECONDS_PER_HOUR = 3600
+HOURS_PER_WEEK = 168
+
+# Sketch metrics persisted per (day, provider)
+DURATION_METRIC = 'rental_duration'
+COST_METRIC = 'rental_cost'
+RIDERS_METRIC = 'active_riders'
+SKETCH_ACCURACY = 0.01
+DEFAULT_QUANTILES = (0.5, 0.9, 0.99)
+
+# Period start for each supported rider-count granularity
+PERIOD_KEYS = {
+    'day': lambda day: day,
+    'week': lambda day: day - timedelta(days=day.weekday()),
+    'month': lambda day: day.replace(day=1)
+}
+
+def _to_epoch_seconds(value: datetime) -> int:
+    """Convert a naive UTC datetime to epoch seconds"""
+    return int(np.datetime64(value, 's').astype(np.int64))
+
+def _week_start(value: datetime) -> date:
+    """Get the Monday of the week containing a datetime"""
+    day = value.date()
+    return day - timedelta(days=day.weekday())
+
+def _local_hour_of_week(hour_starts: np.ndarray) -> np.ndarray:
+    """
+    Map UTC hour starts (epoch seconds) to local hour-of-week buckets
+    Bucket 0 is Monday 00:00 in the application timezone.
+    """
+    offsets = np.fromiter(
+        (datetime.fromtimestamp(int(t), tz=pytz.UTC).astimezone(timezone).utcoffset().total_seconds()
+         for t in hour_starts),
+        dtype=np.int64,
+        count=len(hour_starts)
+    )
+    local_hours = (hour_starts + offsets) // SECONDS_PER_HOUR
+    # 1970-01-01 was a Thursday, i.e. weekday 3 with Monday = 0
+    weekdays = (local_hours // 24 + 3) % 7
+    return weekdays * 24 + local_hours % 24
+
+class AnalyticsService:
+    """Service for fleet analytics computed over bulk-loaded rental data"""
+
+    def __init__(self):
+        self.rental_repo = RentalRepository()
+        self.scooter_repo = ScooterRepository()
+        self.sketch_repo = MetricSketchRepository()
+        self.user_repo = UserRepository()
+
+    def get_fleet_utilization(self, days: int = 30, provider_id: Optional[int] = None,
+                              end_date: Optional[datetime] = None, top: int = 20) -> dict:
+        """
+        Get per-scooter, per-provider and hour-of-week utilization for a window
+        Rental intervals are loaded once and aggregated with NumPy, so the cost
+        is one query plus a few vectorized passes regardless of fleet size.
+        """
+        window_end = end_date or datetime.utcnow()
+        window_start = window_end - timedelta(days=days)
+        ws = _to_epoch_seconds(window_start)
+        we = _to_epoch_seconds(window_end)
+        window_seconds = we - ws
+
+        fleet = self.scooter_repo.get_fleet_index(provider_id)
+        result = {
+            'window_start': window_start.isoformat(),
+            'window_end': window_end.isoformat(),
+            'days': days,
+            'timezone': str(timezone),
+            'fleet_size': len(fleet),
+            'rental_count': 0,
+            'utilization_rate': 0.0,
+            'hour_of_week': [[0.0] * 24 for _ in range(7)],
+            'providers': [],
+            'scooters': []
+        }
+
+        if not fleet or window_seconds <= 0:
+            return result
+
+        fleet_ids = np.fromiter((row[0] for row in fleet), dtype=np.int64, count=len(fleet))
+        fleet_providers = np.fromiter((row[1] for row in fleet), dtype=np.int64, count=len(fleet))
+
+        rows = self.rental_repo.get_rental_intervals(window_start, window_end, provider_id)
+        count = result['rental_count'] = len(rows)
+        rental_scooters = np.fromiter((row[0] for row in rows), dtype=np.int64, count=count)
+        starts = np.fromiter((row[1] for row in rows), dtype=np.int64, count=count)
+        ends = np.fromiter((we if row[2] is None else row[2] for row in rows),
+                           dtype=np.int64, count=count)
+
+        # Clip every interval to the window and map scooters to fleet positions
+        starts = np.maximum(starts, ws)
+        ends = np.minimum(ends, we)
+        positions = np.clip(np.searchsorted(fleet_ids, rental_scooters), 0, len(fleet_ids) - 1)
+        keep = (ends > starts) & (fleet_ids[positions] == rental_scooters)
+        starts, ends, positions = starts[keep], ends[keep], positions[keep]
+        durations = ends - starts
+
+        # Per-scooter and per-provider occupancy
+        scooter_seconds = np.bincount(positions, weights=durations, minlength=len(fleet_ids))
+        provider_codes, provider_index = np.unique(fleet_providers, return_inverse=True)
+        provider_seconds = np.bincount(provider_index, weights=scooter_seconds,
+                                       minlength=len(provider_codes))
+        provider_sizes = np.bincount(provider_index, minlength=len(provider_codes))
+
+        # Hour sweep: partial first/last hours via bincount, full hours via a difference array
+        base_hour = ws // SECONDS_PER_HOUR
+        hour_count = -(-we // SECONDS_PER_HOUR) - base_hour
+        first = starts // SECONDS_PER_HOUR - base_hour
+        last = (ends - 1) // SECONDS_PER_HOUR - base_hour
+        single = first == last
+        first_end = (first + 1 + base_hour) * SECONDS_PER_HOUR
+        last_start = (last + base_hour) * SECONDS_PER_HOUR
+
+        partial = np.bincount(first, weights=np.where(single, durations, first_end - starts),
+                              minlength=hour_count)
+        partial += np.bincount(last[~single], weights=(ends - last_start)[~single],
+                               minlength=hour_count)
+
+        multi = ~single
+        diff = np.bincount(first[multi] + 1, minlength=hour_count + 1) \
+            - np.bincount(last[multi], minlength=hour_count + 1)
+        occupied = np.cumsum(diff)[:hour_count] * SECONDS_PER_HOUR + partial[:hour_count]
+
+        hour_starts = (base_hour + np.arange(hour_count, dtype=np.int64)) * SECONDS_PER_HOUR
+        capacity = (np.minimum(hour_starts + SECONDS_PER_HOUR, we) - np.maximum(hour_starts, ws)) \
+            * len(fleet_ids)
+        buckets = _local_hour_of_week(hour_starts)
+        week_occupied = np.bincount(buckets, weights=occupied, minlength=HOURS_PER_WEEK)
+        week_capacity = np.bincount(buckets, weights=capacity, minlength=HOURS_PER_WEEK)
+        week_rates = np.divide(week_occupied * 100, week_capacity,
+                               out=np.zeros(HOURS_PER_WEEK), where=week_capacity > 0)
+
+        scooter_rates = scooter_seconds * 100 / window_seconds
+        provider_rates = provider_seconds * 100 / (provider_sizes * window_seconds)
+        ranking = np.argsort(-scooter_rates, kind='stable')[:top]
+
+        result.update({
+            'utilization_rate': float(scooter_seconds.sum() * 100 / (len(fleet_ids) * window_seconds)),
+            'hour_of_week': np.round(week_rates, 2).reshape(7, 24).tolist(),
+            'providers': [
+                {
+                    'provider_id': int(provider_codes[i]),
+                    'scooter_count': int(provider_sizes[i]),
+                    'occupied_minutes': int(provider_seconds[i] // 60),
+                    'utilization_rate': round(float(provider_rates[i]), 2)
+                }
+                for i in range(len(provider_codes))
+            ],
+            'scooters': [
+                {
+                    'scooter_id': int(fleet_ids[i]),
+                    'provider_id': int(fleet_providers[i]),
+                    'occupied_minutes': int(scooter_seconds[i] // 60),
+                    'utilization_rate': round(float(scooter_rates[i]), 2)
+                }
+                for i in ranking
+            ]
+        })
+
+        return result
+
+    def record_completed_rental(self, rental) -> Tuple[bool, Optional[str]]:
+        """
+        Add a completed rental's duration and cost to its day/provider sketches
+        Returns: (success, error_message)
+        """
+        if rental.status != 'completed' or not rental.end_time:
+            return False, 'Rental is not completed'
+
+        day = rental.end_time.date()
+        provider_id = rental.scooter.provider_id
+
+        duration = DDSketch(SKETCH_ACCURACY)
+        duration.add(rental.duration_minutes or 0)
+        cost = DDSketch(SKETCH_ACCURACY)
+        cost.add(float(rental.total_cost or 0))
+
+        try:
+            self._merge_sketch(DURATION_METRIC, day, provider_id, duration)
+            self._merge_sketch(COST_METRIC, day, provider_id, cost)
+            return True, None
+        except Exception as e:
+            db.session.rollback()
+            return False, str(e)
+
+    def record_rental_start(self, rental) -> Tuple[bool, Optional[str]]:
+        """
+        Add a rental's rider to the active-rider sketch of its start day and provider
+        Returns: (success, error_message)
+        """
+        riders = HyperLogLog()
+        riders.add(rental.user_id)
+
+        try:
+            self._merge_sketch(RIDERS_METRIC, rental.start_time.date(),
+                               rental.scooter.provider_id, riders)
+            return True, None
+        except Exception as e:
+            db.session.rollback()
+            return False, str(e)
+
+    def rebuild_rental_sketches(self, start_date: Optional[datetime] = None,
+                                end_date: Optional[datetime] = None) -> int:
+        """
+        Rebuild duration and cost sketches from completed rentals
+        Returns the number of rentals scanned.
+        """
+        sketches = {}
+        scanned = 0
+
+        for end_time, provider_id, duration_minutes, total_cost in \
+                self.rental_repo.iter_completed_metrics(start_date, end_date):
+            key = (end_time.date(), provider_id)
+            if key not in sketches:
+                sketches[key] = (DDSketch(SKETCH_ACCURACY), DDSketch(SKETCH_ACCURACY))
+            duration, cost = sketches[key]
+            duration.add(duration_minutes or 0)
+            cost.add(float(total_cost or 0))
+            scanned += 1
+
+        start_day = start_date.date() if start_date else None
+        end_day = end_date.date() if end_date else None
+        self.sketch_repo.delete_range(DURATION_METRIC, start_day, end_day)
+        self.sketch_repo.delete_range(COST_METRIC, start_day, end_day)
+
+        for (day, provider_id), (duration, cost) in sketches.items():
+            self.sketch_repo.save(DURATION_METRIC, day, provider_id, duration.to_bytes())
+            self.sketch_repo.save(COST_METRIC, day, provider_id, cost.to_bytes())
+
+        return scanned
+
+    def rebuild_rider_sketches(self, start_date: Optional[datetime] = None,
+                               end_date: Optional[datetime] = None) -> int:
+        """
+        Rebuild active-rider sketches from rental starts
+        Returns the number of rentals scanned.
+        """
+        sketches = {}
+        scanned = 0
+
+        for start_time, provider_id, user_id in \
+                self.rental_repo.iter_rider_starts(start_date, end_date):
+            key = (start_time.date(), provider_id)
+            if key not in sketches:
+                sketches[key] = HyperLogLog()
+            sketches[key].add(user_id)
+            scanned += 1
+
+        self.sketch_repo.delete_range(RIDERS_METRIC,
+                                      start_date.date() if start_date else None,
+                                      end_date.date() if end_date else None)
+
+        for (day, provider_id), riders in sketches.items():
+            self.sketch_repo.save(RIDERS_METRIC, day, provider_id, riders.to_bytes())
+
+        return scanned
+
+    def get_active_riders(self, start_day: date, end_day: date,
+                          provider_id: Optional[int] = None,
+                          granularity: str = 'day') -> dict:
+        """
+        Get approximate distinct riders for a range and per day/week/month
+        Cost depends on the number of stored sketches, not on rental volume.
+        """
+        if granularity not in PERIOD_KEYS:
+            raise ValueError(f"Invalid granularity: {granularity}")
+
+        period_key = PERIOD_KEYS[granularity]
+        total = HyperLogLog()
+        periods = {}
+
+        for day, payload in self.sketch_repo.get_daily_payloads(RIDERS_METRIC, start_day,
+                                                                end_day, provider_id):
+            riders = HyperLogLog.from_bytes(payload)
+            total.merge(riders)
+            period = period_key(day)
+            if period in periods:
+                periods[period].merge(riders)
+            else:
+                periods[period] = riders
+
+        return {
+            'start_date': start_day.isoformat(),
+            'end_date': end_day.isoformat(),
+            'provider_id': provider_id,
+            'granularity': granularity,
+            'active_riders': total.count(),
+            'periods': [
+                {'period_start': period.isoformat(), 'active_riders': riders.count()}
+                for period, riders in sorted(periods.items())
+            ]
+        }
+
+    def get_cohort_retention(self, weeks: int = 12, max_offset: int = 12,
+                             now: Optional[datetime] = None) -> dict:
+        """
+        Get week-N retention for weekly sign-up cohorts
+        A user counts as retained in week N when they started at least one
+        rental N weeks after their sign-up week. Computed in a single pass over
+        a user-ordered row stream, so memory holds only the current user's
+        active weeks plus the cohort matrix.
+        """
+        now = now or datetime.utcnow()
+        current_week = _week_start(now)
+        first_cohort = current_week - timedelta(weeks=weeks - 1)
+
+        sizes = {}
+        retained = {}
+
+        def flush(cohort, offsets):
+            sizes[cohort] = sizes.get(cohort, 0) + 1
+            counts = retained.setdefault(cohort, [0] * (max_offset + 1))
+            for offset in offsets:
+                counts[offset] += 1
+
+        current_user = None
+        cohort = None
+        offsets = set()
+
+        for user_id, created_at, start_time in self.user_repo.iter_rental_activity(
+                created_from=datetime.combine(first_cohort, datetime.min.time())):
+            if user_id != current_user:
+                if current_user is not None:
+                    flush(cohort, offsets)
+                current_user = user_id
+                cohort = _week_start(created_at)
+                offsets = set()
+
+            if start_time is not None:
+                offset = (_week_start(start_time) - cohort).days // 7
+                if 0 <= offset <= max_offset:
+                    offsets.add(offset)
+
+        if current_user is not None:
+            flush(cohort, offsets)
+
+        cohorts = []
+        for cohort_week in sorted(sizes):
+            size = sizes[cohort_week]
+            # Only report weeks that have started; later weeks are still unknown
+            observed = min(max_offset, (current_week - cohort_week).days // 7)
+            counts = retained[cohort_week][:observed + 1]
+            cohorts.append({
+                'cohort_week': cohort_week.isoformat(),
+                'size': size,
+                'retained': counts,
+                'retention_rate': [round(count * 100 / size, 2) for count in counts]
+            })
+
+        return {
+            'first_cohort': first_cohort.isoformat(),
+            'current_week': current_week.isoformat(),
+            'max_offset': max_offset,
+            'cohorts': cohorts
+        }
+
+    def get_rental_percentiles(self, start_day: date, end_day: date,
+                               provider_id: Optional[int] = None,
+                               quantiles: Sequence[float] = DEFAULT_QUANTILES) -> dict:
+        """Get duration and cost percentiles by merging stored daily sketches"""
+        return {
+            'start_date': start_day.isoformat(),
+            'end_date': end_day.isoformat(),
+            'provider_id': provider_id,
+            'duration_minutes': self._summarize(
+                self._load_merged(DURATION_METRIC, start_day, end_day, provider_id), quantiles),
+            'total_cost': self._summarize(
+                self._load_merged(COST_METRIC, start_day, end_day, provider_id), quantiles)
+        }
+
+    def _merge_sketch(self, metric: str, day: date, provider_id: int, sketch):
+        """Merge a sketch into the stored one for its key, retrying once on an insert race"""
+        for attempt in range(2):
+            stored = self.sketch_repo.get(metric, day, provider_id, for_update=True)
+            if stored:
+                merged = type(sketch).from_bytes(stored.payload)
+                merged.merge(sketch)
+            else:
+                merged = sketch
+            try:
+                self.sketch_repo.save(metric, day, provider_id, merged.to_bytes())
+                return
+            except IntegrityError:
+                db.session.rollback()
+                if attempt:
+                    raise
+
+    def _load_merged(self, metric: str, start_day: date, end_day: date,
+                     provider_id: Optional[int]) -> DDSketch:
+        """Load and merge all stored sketches for a metric and range"""
+        merged = DDSketch(SKETCH_ACCURACY)
+        for payload in self.sketch_repo.get_payloads(metric, start_day, end_day, provider_id):
+            merged.merge(DDSketch.from_bytes(payload))
+        return merged
+
+    @staticmethod
+    def _summarize(sketch: DDSketch, quantiles: Sequence[float]) -> dict:
+        """Convert a sketch into a JSON-friendly summary"""
+        summary = {
+            'count': sketch.count,
+            'mean': round(sketch.mean(), 2) if sketch.count else None,
+            'min': sketch.min if sketch.count else None,
+            'max': sketch.max if sketch.count else None
+        }
+        for q in quantiles:
+            value = sketch.quantile(q)
+            summary[f'p{q * 100:g}'] = round(value, 2) if value is not None else None
+        return summary
@@ -2,10 +2,44 @@
 Authentication service for user management and authentication
 """
 
-from typing import Optional, Tuple
-from flask import current_app
+from typing import Iterator, Optional, Tuple
+from flask import current_app, g, has_request_context
+from sqlalchemy import event
 from app.repositories.user_repository import UserRepository
 from app.models.user import User
+from app.models.read_models import UserView
+from app import cache, db
+from app.utils.jwt_claims import in_legacy_grace, is_legacy_token, token_version
+
+# Current token version per user id ('' when the user is missing or inactive)
+token_version_cache = cache.namespace('token_versions')
+
+# Detached column snapshots of recently loaded users, keyed by user id
+user_cache = cache.namespace('users')
+
+@event.listens_for(db.session, 'after_flush')
+def _collect_changed_users(session, flush_context):
+    """Remember users written by this flush until commit"""
+    changed = {obj.id for obj in session.dirty
+               if isinstance(obj, User) and session.is_modified(obj, include_collections=False)}
+    changed.update(obj.id for obj in session.deleted if isinstance(obj, User))
+    if changed:
+        session.info.setdefault('changed_users', set()).update(changed)
+
+@event.listens_for(db.session, 'after_commit')
+def _forget_changed_users(session):
+    """
+    Drop this worker's cached version and snapshot of every committed user
+    change, whichever code path made it. With a per-worker cache backend,
+    other workers keep theirs for up to JWT_VERSION_CACHE_TTL seconds.
+    """
+    for user_id in session.info.pop('changed_users', ()):
+        token_version_cache.delete(user_id)
+        user_cache.delete(user_id)
+
+@event.listens_for(db.session, 'after_rollback')
+def _discard_changed_users(session):
+    session.info.pop('changed_users', None)
 
 class AuthService:
     """Service for authentication and user management"""
@@ -58,6 +92,7 @@ class AuthService:
             return None, 'Invalid email or password'
         
         user.update_last_login()
+        self.forget_user(user.id)
         return user, None
     
     def change_password(self, user: User, old_password: str, 
@@ -74,6 +109,7 @@ class AuthService:
         
         user.set_password(new_password)
         self.user_repo.update(user)
+        self.forget_user(user.id)
         return True, None
     
     def reset_password(self, email: str, new_password: str) -> Tuple[bool, Optional[str]]:
@@ -91,6 +127,7 @@ class AuthService:
         
         user.set_password(new_password)
         self.user_repo.update(user)
+        self.forget_user(user.id)
         return True, None
     
     def update_profile(self, user: User, **kwargs) -> Tuple[Optional[User], Optional[str]]:
@@ -112,25 +149,57 @@ class AuthService:
         
         try:
             updated_user = self.user_repo.update(user, **update_data)
+            self.forget_user(user.id)
             return updated_user, None
         except Exception as e:
             return None, str(e)
     
     def deactivate_user(self, user: User) -> bool:
         """Deactivate user account"""
-        return self.user_repo.delete(user)
+        result = self.user_repo.delete(user)
+        self.forget_user(user.id)
+        return result
     
     def activate_user(self, user: User) -> User:
         """Activate user account"""
-        return self.user_repo.update(user, is_active=True)
+        user = self.user_repo.update(user, is_active=True)
+        self.forget_user(user.id)
+        return user
     
     def verify_user(self, user: User) -> User:
         """Verify user account"""
-        return self.user_repo.verify_user(user)
+        user = self.user_repo.verify_user(user)
+        self.forget_user(user.id)
+        return user
     
     def get_user_by_id(self, user_id: int) -> Optional[User]:
-        """Get user by ID"""
-        return self.user_repo.get_by_id(user_id)
+        """
+        Get user by ID
+        Users are memoized for the current request and served from a snapshot
+        cache (USER_CACHE_TTL seconds, 0 disables) across requests. Snapshots
+        hold no password hash; check_password() loads it on demand.
+        """
+        if user_id is None:
+            return None
+        user_id = int(user_id)
+        
+        request_users = g.setdefault('_request_users', {}) if has_request_context() else {}
+        user = request_users.get(user_id)
+        if user is not None:
+            return user
+        
+        snapshot = user_cache.get(user_id)
+        if snapshot is not None:
+            user = self.user_repo.from_snapshot(snapshot)
+        else:
+            user = self.user_repo.get_by_id(user_id)
+            if user is not None:
+                user_cache.set(user_id, self.user_repo.snapshot(user),
+                               ttl=current_app.config.get('USER_CACHE_TTL', 60))
+        
+        if user is not None:
+            request_users[user_id] = user
+        return user
     
     def get_user_by_email(self, email: str) -> Optional[User]:
         """Get user by email"""
@@ -140,13 +209,28 @@ class AuthService:
         """Search users"""
         return self.user_repo.search(query, limit)
     
-    def get_all_users(self, limit: int = 100, offset: int = 0) -> list:
+    def get_all_users(self, limit: int = 100, offset: int = 0,
+                      columns: Optional[list] = None) -> list:
         """Get all users"""
-        return self.user_repo.get_all(limit, offset)
+        return self.user_repo.get_all(limit, offset, columns)
     
-    def get_users_by_role(self, role: str, limit: int = 100) -> list:
+    def get_users_page(self, limit: int = 100, cursor: Optional[str] = None,
+                       **filters) -> Tuple[list, Optional[str]]:
+        """
+        Get a keyset page of users (filters: role, is_active; columns)
+        Returns: (users, next_cursor); raises ValueError for an invalid cursor
+        """
+        return self.user_repo.get_page(limit, cursor, **filters)
+    
+    def iter_user_views(self, role: Optional[str] = None, columns: Optional[list] = None,
+                        limit: Optional[int] = None, offset: int = 0) -> Iterator[UserView]:
+        """Stream users as lightweight list rows (all when no limit)"""
+        return self.user_repo.iter_views(role, columns=columns, limit=limit, offset=offset)
+    
+    def get_users_by_role(self, role: str, limit: int = 100,
+                          columns: Optional[list] = None) -> list:
         """Get users by role"""
-        return self.user_repo.get_by_role(role, limit)
+        return self.user_repo.get_by_role(role, limit, columns)
     
     def promote_to_provider(self, user: User) -> Tuple[Optional[User], Optional[str]]:
         """Promote customer to provider"""
@@ -157,6 +241,7 @@ class AuthService:
             return None, 'Cannot change admin role'
         
         updated_user = self.user_repo.update(user, role='provider')
+        self.forget_user(user.id)
         return updated_user, None
     
     def demote_to_customer(self, user: User) -> Tuple[Optional[User], Optional[str]]:
@@ -171,8 +256,40 @@ class AuthService:
             return None, 'Provider has active scooters. Remove scooters first.'
         
         updated_user = self.user_repo.update(user, role='customer')
+        self.forget_user(user.id)
         return updated_user, None
     
+    def is_token_revoked(self, jwt_payload: dict) -> bool:
+        """
+        Check a token's version claim against the user's current state
+        Only the columns behind the version are read, and results are cached
+        for JWT_VERSION_CACHE_TTL seconds. Tokens issued before the claim
+        existed stay valid for JWT_LEGACY_TOKEN_GRACE seconds after issue
+        while the user is active.
+        """
+        user_id = jwt_payload.get(current_app.config.get('JWT_IDENTITY_CLAIM', 'sub'))
+        version = token_version_cache.get(user_id)
+        
+        if version is None:
+            version = self.cache_token_version(user_id, self.user_repo.get_token_state(user_id))
+        
+        if is_legacy_token(jwt_payload):
+            return not version or not in_legacy_grace(jwt_payload)
+        return not version or jwt_payload.get('ver') != version
+    
+    @staticmethod
+    def cache_token_version(user_id: int, state: Optional[tuple]) -> str:
+        """Cache the version for a (password_hash, role, is_active) row, '' when missing or inactive"""
+        version = token_version(*state) if state and state.is_active else ''
+        token_version_cache.set(user_id, version,
+                                ttl=current_app.config.get('JWT_VERSION_CACHE_TTL', 30))
+        return version
+    
+    def forget_user(self, user_id: int):
+        """Drop cached copies of a user after a profile, password, role or status change"""
+        token_version_cache.delete(user_id)
+        user_cache.delete(user_id)
+    
     def validate_admin(self, user: User) -> bool:
         """Check if user is admin"""
         return user.is_admin()
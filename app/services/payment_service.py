@@ -2,12 +2,13 @@
 Payment service for payment processing and management
 """
 
-from typing import Optional, Tuple, List
+from typing import Iterator, Optional, Tuple, List
 from datetime import datetime
 from app.repositories.payment_repository import PaymentRepository
 from app.repositories.rental_repository import RentalRepository
 from app.repositories.user_repository import UserRepository
 from app.models.payment import Payment
+from app.models.read_models import PaymentView
 from app.models.rental import Rental
 from app.models.user import User
 
@@ -143,6 +144,20 @@ class PaymentService:
         """Get payments for a user"""
         return self.payment_repo.get_by_user(user_id, limit)
     
+    def get_payments_page(self, limit: int = 100, cursor: Optional[str] = None,
+                          **filters) -> Tuple[List[Payment], Optional[str]]:
+        """
+        Get a keyset page of payments (filters: user_id, rental_id, status; columns)
+        Returns: (payments, next_cursor); raises ValueError for an invalid cursor
+        """
+        return self.payment_repo.get_page(limit, cursor, **filters)
+    
+    def iter_payment_views(self, user_id: Optional[int] = None, status: Optional[str] = None,
+                           columns: Optional[List[str]] = None,
+                           limit: Optional[int] = None) -> Iterator[PaymentView]:
+        """Stream payments as lightweight list rows, newest first (all when no limit)"""
+        return self.payment_repo.iter_views(user_id, status, columns, limit)
+    
     def get_rental_payments(self, rental_id: int) -> List[Payment]:
         """Get payments for a rental"""
         return self.payment_repo.get_by_rental(rental_id)
@@ -2,14 +2,27 @@
 Rental service for rental management and operations
 """
 
-from typing import Optional, Tuple, List
+from typing import Iterator, Optional, Tuple, List
 from datetime import datetime
+from flask import current_app
+from app import cache
 from app.repositories.rental_repository import RentalRepository
 from app.repositories.scooter_repository import ScooterRepository
 from app.repositories.user_repository import UserRepository
 from app.models.rental import Rental
+from app.models.read_models import RentalView
 from app.models.scooter import Scooter
 from app.models.user import User
+from app.services.analytics_service import AnalyticsService
+from app.signals import rental_started, rental_ended, rental_cancelled
+
+statistics_cache = cache.namespace('statistics')
+
+@rental_started.connect
+@rental_ended.connect
+@rental_cancelled.connect
+def _on_rental_changed(rental, **extra):
+    statistics_cache.delete('rentals')
 
 class RentalService:
     """Service for rental management"""
@@ -18,6 +31,7 @@ class RentalService:
         self.rental_repo = RentalRepository()
         self.scooter_repo = ScooterRepository()
         self.user_repo = UserRepository()
+        self.analytics_service = AnalyticsService()
     
     def start_rental(self, user_id: int, scooter_id: int, 
                     start_latitude: float, start_longitude: float) -> Tuple[Optional[Rental], Optional[str]]:
@@ -52,10 +66,15 @@ class RentalService:
             )
             
             rental.start_rental()
-            
-            return rental, None
         except Exception as e:
             return None, str(e)
+        
+        # Analytics must never block starting a rental
+        success, error = self.analytics_service.record_rental_start(rental)
+        if error:
+            current_app.logger.warning(f"Could not record rider for rental {rental.id}: {error}")
+        
+        return rental, None
     
     def end_rental(self, rental_id: int, end_latitude: Optional[float] = None, 
                   end_longitude: Optional[float] = None) -> Tuple[Optional[Rental], Optional[str]]:
@@ -73,9 +92,15 @@ class RentalService:
         
         try:
             rental.end_rental(end_latitude, end_longitude)
-            return rental, None
         except Exception as e:
             return None, str(e)
+        
+        # Analytics must never block ending a rental
+        success, error = self.analytics_service.record_completed_rental(rental)
+        if error:
+            current_app.logger.warning(f"Could not record metrics for rental {rental.id}: {error}")
+        
+        return rental, None
     
     def cancel_rental(self, rental_id: int, reason: Optional[str] = None) -> Tuple[Optional[Rental], Optional[str]]:
         """
@@ -104,9 +129,10 @@ class RentalService:
         """Get rental by code"""
         return self.rental_repo.get_by_code(rental_code)
     
-    def get_user_rentals(self, user_id: int, limit: int = 100) -> List[Rental]:
+    def get_user_rentals(self, user_id: int, limit: int = 100,
+                         columns: Optional[List[str]] = None) -> List[Rental]:
         """Get rentals for a user"""
-        return self.rental_repo.get_by_user(user_id, limit)
+        return self.rental_repo.get_by_user(user_id, limit, columns)
     
     def get_active_rental_for_user(self, user_id: int) -> Optional[Rental]:
         """Get active rental for a user"""
@@ -130,14 +156,60 @@ class RentalService:
         all_rentals.sort(key=lambda r: r.created_at, reverse=True)
         return all_rentals[:limit]
     
-    def get_all_rentals(self, limit: int = 100, offset: int = 0) -> List[Rental]:
+    def get_all_rentals(self, limit: int = 100, offset: int = 0,
+                        columns: Optional[List[str]] = None) -> List[Rental]:
         """Get all rentals"""
-        return self.rental_repo.get_all(limit, offset)
+        return self.rental_repo.get_all(limit, offset, columns)
+    
+    def get_rentals_page(self, limit: int = 100, cursor: Optional[str] = None,
+                         **filters) -> Tuple[List[Rental], Optional[str]]:
+        """
+        Get a keyset page of rentals (filters: user_id, scooter_id, status; columns)
+        Returns: (rentals, next_cursor); raises ValueError for an invalid cursor
+        """
+        return self.rental_repo.get_page(limit, cursor, **filters)
+    
+    def get_rental_views(self, limit: int = 100, offset: int = 0, user_id: Optional[int] = None,
+                         status: Optional[str] = None,
+                         columns: Optional[List[str]] = None) -> List[RentalView]:
+        """Get rentals as lightweight list rows, newest first"""
+        return self.rental_repo.get_views(limit, offset, user_id, status, columns)
+    
+    def get_rental_views_page(self, limit: int = 100, cursor: Optional[str] = None,
+                              **filters) -> Tuple[List[RentalView], Optional[str]]:
+        """
+        Get a keyset page of rentals as lightweight list rows
+        Returns: (views, next_cursor); raises ValueError for an invalid cursor
+        """
+        return self.rental_repo.get_page_views(limit, cursor, **filters)
+    
+    def iter_rental_views(self, user_id: Optional[int] = None, status: Optional[str] = None,
+                          columns: Optional[List[str]] = None,
+                          limit: Optional[int] = None) -> Iterator[RentalView]:
+        """Stream rentals as lightweight list rows, newest first (all when no limit)"""
+        return self.rental_repo.iter_views(user_id, status, columns, limit)
     
     def get_active_rentals(self, limit: int = 100) -> List[Rental]:
         """Get all active rentals"""
         return self.rental_repo.get_active_rentals(limit)
     
+    def get_active_rentals_version(self, user_id: Optional[int] = None) -> tuple:
+        """
+        Get (count, last_modified) identifying the active rentals (of one user)
+        Active rentals report a live duration, so while any exist the version
+        also advances every minute.
+        """
+        return self.live_version(*self.rental_repo.get_active_version(user_id))
+    
+    @staticmethod
+    def live_version(count: int, last_modified: Optional[datetime]) -> tuple:
+        """Advance an active rentals version to the current minute while any are active"""
+        if count:
+            current_minute = datetime.utcnow().replace(second=0, microsecond=0)
+            last_modified = max(last_modified, current_minute)
+        
+        return count, last_modified
+    
     def get_completed_rentals(self, limit: int = 100) -> List[Rental]:
         """Get completed rentals"""
         return self.rental_repo.get_completed_rentals(limit)
@@ -172,17 +244,26 @@ class RentalService:
     
     def get_rental_statistics(self, start_date: Optional[datetime] = None, 
                              end_date: Optional[datetime] = None) -> dict:
-        """Get rental statistics"""
-        if start_date and end_date:
-            rentals = self.rental_repo.get_rentals_in_timerange(start_date, end_date)
-        else:
-            rentals = self.rental_repo.get_all(limit=10000)
-        
-        total_rentals = len(rentals)
-        active = len([r for r in rentals if r.status == 'active'])
-        completed = len([r for r in rentals if r.status == 'completed'])
-        cancelled = len([r for r in rentals if r.status == 'cancelled'])
-        overdue = len([r for r in rentals if r.status == 'overdue'])
+        """Get rental statistics (the all-time figures are cached)"""
+        if start_date is None and end_date is None:
+            return statistics_cache.get_or_set(
+                'rentals',
+                lambda: self._compute_rental_statistics(),
+                ttl=current_app.config.get('STATISTICS_CACHE_TTL', 60)
+            )
+        
+        return self._compute_rental_statistics(start_date, end_date)
+    
+    def _compute_rental_statistics(self, start_date: Optional[datetime] = None,
+                                   end_date: Optional[datetime] = None) -> dict:
+        """Calculate rental statistics"""
+        counts = self.rental_repo.get_status_counts(start_date, end_date)
+        
+        total_rentals = sum(counts.values())
+        active = counts.get('active', 0)
+        completed = counts.get('completed', 0)
+        cancelled = counts.get('cancelled', 0)
+        overdue = counts.get('overdue', 0)
         
         total_revenue = self.rental_repo.get_total_revenue(start_date, end_date)
         avg_duration = self.rental_repo.get_average_duration()
@@ -202,6 +283,28 @@ class RentalService:
         """Get rental statistics for a user"""
         return self.rental_repo.get_user_statistics(user_id)
     
+    def get_rental_status(self, rental_id: int):
+        """Get a rental's status row (see RentalRepository.status_stmt), or None"""
+        return self.rental_repo.get_status(rental_id)
+    
+    @staticmethod
+    def can_view_status(row, user) -> bool:
+        """Check access to a status row, as validate_rental_access does for rentals"""
+        return (user.is_admin() or row.user_id == user.id
+                or (user.is_provider() and row.provider_id == user.id))
+    
+    @staticmethod
+    def status_payload(row) -> dict:
+        """Public representation of a status row"""
+        return {
+            'id': row.id,
+            'status': row.status,
+            'start_time': row.start_time.isoformat() if row.start_time else None,
+            'end_time': row.end_time.isoformat() if row.end_time else None,
+            'duration_minutes': row.duration_minutes,
+            'total_cost': float(row.total_cost) if row.total_cost is not None else None
+        }
+    
     def validate_rental_access(self, rental: Rental, user: User) -> bool:
         """Check if user can access rental details"""
         if user.is_admin():
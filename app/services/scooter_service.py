@@ -2,11 +2,80 @@
 Scooter service for scooter management and operations
 """
 
-from typing import Optional, Tuple, List
+import csv
+from datetime import datetime, timedelta
+from typing import Iterator, Optional, Tuple, List
+from flask import current_app
+from sqlalchemy.exc import IntegrityError
+from app import cache
 from app.repositories.scooter_repository import ScooterRepository
 from app.repositories.user_repository import UserRepository
 from app.models.scooter import Scooter
+from app.models.read_models import ScooterView
 from app.models.user import User
+from app.signals import (rental_started, rental_ended, rental_cancelled, scooter_status_changed,
+                         scooter_location_changed, scooter_battery_changed)
+from app.utils.csv_import import parse_scooter_row, read_rows
+from app.utils.fast_json import sse_event
+from app.utils.spatial_pubsub import SpatialHub, Subscription, parse_bbox
+
+# Serialized scooter listings, cleared on any scooter change in this worker
+scooter_cache = cache.namespace('scooters')
+
+# Per-scooter and per-provider statistics, keyed "scooter:<id>" / "provider:<id>"
+statistics_cache = cache.namespace('statistics')
+
+@scooter_status_changed.connect
+def _on_scooter_status_changed(scooter, **extra):
+    scooter_cache.clear()
+    statistics_cache.delete(f'provider:{scooter.provider_id}')
+
+@rental_started.connect
+@rental_ended.connect
+@rental_cancelled.connect
+def _on_rental_changed(rental, **extra):
+    """Revenue, utilization and rental counts depend on the scooter's rentals"""
+    statistics_cache.delete(f'scooter:{rental.scooter_id}')
+    statistics_cache.delete(f'provider:{rental.scooter.provider_id}')
+
+# Live scooter changes for /api/scooters/stream subscribers in this worker
+scooter_events = SpatialHub()
+
+def _publish_change(scooter, change: str, previous_position=None):
+    """Push a scooter delta to subscribers around its current (and previous) position"""
+    if not scooter_events.has_subscribers():
+        return
+    
+    position = (float(scooter.latitude), float(scooter.longitude))
+    frame = sse_event({
+        'change': change,
+        'id': scooter.id,
+        'status': scooter.status,
+        'battery_level': scooter.battery_level,
+        'latitude': position[0],
+        'longitude': position[1],
+        'at': datetime.utcnow().isoformat()
+    }, 'scooter')
+    scooter_events.publish(frame, [position, previous_position])
+
+@scooter_status_changed.connect
+def _stream_status_change(scooter, **extra):
+    _publish_change(scooter, 'status')
+
+@scooter_battery_changed.connect
+def _stream_battery_change(scooter, **extra):
+    _publish_change(scooter, 'battery')
+
+@scooter_location_changed.connect
+def _stream_location_change(scooter, old_latitude=None, old_longitude=None, **extra):
+    previous = None
+    if old_latitude is not None and old_longitude is not None:
+        previous = (float(old_latitude), float(old_longitude))
+    _publish_change(scooter, 'location', previous)
+
+def _is_int(value) -> bool:
+    """True for JSON integers (bool is an int subclass but not one)"""
+    return isinstance(value, int) and not isinstance(value, bool)
 
 class ScooterService:
     """Service for scooter management"""
@@ -43,10 +112,88 @@ class ScooterService:
                 provider_id=provider_id,
                 **kwargs
             )
+            self.invalidate_scooter_caches(provider_id)
             return scooter, None
         except Exception as e:
             return None, str(e)
     
+    def import_scooters(self, lines, provider_id: int, batch_size: int = 1000,
+                        max_errors: int = 1000) -> Tuple[Optional[dict], Optional[str]]:
+        """
+        Create scooters from CSV text lines (see decode_lines) in batched INSERTs
+        Rows are validated against identifiers preloaded once, instead of a
+        query per scooter; invalid rows are skipped and reported by line.
+        Returns: ({'created', 'failed', 'errors'}, error_message)
+        """
+        provider = self.user_repo.get_by_id(provider_id)
+        
+        if not provider:
+            return None, 'Provider not found'
+        
+        if not provider.can_manage_scooters():
+            return None, 'User is not authorized to manage scooters'
+        
+        report = {'created': 0, 'failed': 0, 'errors': []}
+        
+        def fail(line, identifier, message):
+            report['failed'] += 1
+            if len(report['errors']) < max_errors:
+                report['errors'].append({'line': line, 'identifier': identifier, 'error': message})
+        
+        def flush(batch):
+            try:
+                report['created'] += self.scooter_repo.bulk_insert([m for _, m in batch])
+            except IntegrityError:
+                # Someone else inserted a conflicting row meanwhile: isolate it
+                for line, mapping in batch:
+                    try:
+                        report['created'] += self.scooter_repo.bulk_insert([mapping])
+                    except IntegrityError as e:
+                        if self.scooter_repo.exists(mapping['identifier']):
+                            fail(line, mapping['identifier'], 'Scooter with this identifier already exists')
+                        else:
+                            fail(line, mapping['identifier'], str(e.orig))
+        
+        try:
+            rows = read_rows(lines)
+        except ValueError as e:
+            return None, str(e)
+        
+        identifiers = self.scooter_repo.get_identifiers()
+        batch = []
+        line = 1
+        
+        try:
+            for line, row in rows:
+                try:
+                    mapping = parse_scooter_row(row)
+                except ValueError as e:
+                    fail(line, (row.get('identifier') or '').strip().upper() or None, str(e))
+                    continue
+                
+                if mapping['identifier'] in identifiers:
+                    fail(line, mapping['identifier'], 'Scooter with this identifier already exists')
+                    continue
+                
+                identifiers.add(mapping['identifier'])
+                mapping['provider_id'] = provider_id
+                mapping['qr_code'] = Scooter.make_qr_code(mapping['identifier'])
+                batch.append((line, mapping))
+                
+                if len(batch) >= batch_size:
+                    flush(batch)
+                    batch = []
+        except csv.Error as e:
+            # Unparseable past this point; the rows before it are still imported
+            fail(line + 1, None, f'Malformed CSV, import stopped: {e}')
+        finally:
+            if batch:
+                flush(batch)
+            if report['created']:
+                self.invalidate_scooter_caches(provider_id)
+        
+        return report, None
+    
     def get_scooter_by_id(self, scooter_id: int) -> Optional[Scooter]:
         """Get scooter by ID"""
         return self.scooter_repo.get_by_id(scooter_id)
@@ -59,28 +206,209 @@ class ScooterService:
         """Get scooter by QR code"""
         return self.scooter_repo.get_by_qr_code(qr_code)
     
-    def get_all_scooters(self, limit: int = 100, offset: int = 0) -> List[Scooter]:
+    def get_all_scooters(self, limit: int = 100, offset: int = 0,
+                         columns: Optional[List[str]] = None) -> List[Scooter]:
         """Get all scooters"""
-        return self.scooter_repo.get_all(limit, offset)
+        return self.scooter_repo.get_all(limit, offset, columns)
+    
+    def get_scooters_page(self, limit: int = 100, cursor: Optional[str] = None,
+                          **filters) -> Tuple[List[Scooter], Optional[str]]:
+        """
+        Get a keyset page of scooters (filters: status, provider_id; columns)
+        Returns: (scooters, next_cursor); raises ValueError for an invalid cursor
+        """
+        return self.scooter_repo.get_page(limit, cursor, **filters)
+    
+    def get_scooter_views(self, limit: int = 100, offset: int = 0, status: Optional[str] = None,
+                          columns: Optional[List[str]] = None) -> List[ScooterView]:
+        """Get scooters as lightweight list rows"""
+        return self.scooter_repo.get_views(limit, offset, status, columns)
+    
+    def get_scooter_views_page(self, limit: int = 100, cursor: Optional[str] = None,
+                               **filters) -> Tuple[List[ScooterView], Optional[str]]:
+        """
+        Get a keyset page of scooters as lightweight list rows
+        Returns: (views, next_cursor); raises ValueError for an invalid cursor
+        """
+        return self.scooter_repo.get_page_views(limit, cursor, **filters)
+    
+    def get_change_version(self) -> int:
+        """Get the version a client starting a full download should sync from"""
+        return self.scooter_repo.get_change_version(self._settled_before())
+    
+    def get_changes_since(self, since: int, limit: int = 1000, provider_id: Optional[int] = None,
+                          columns: Optional[List[str]] = None) -> Tuple[List[tuple], List[int], int, bool]:
+        """
+        Get the scooters changed after a sync version
+        Returns: ([(version, view)], deleted_ids, next_version, has_more). Changes
+        younger than SCOOTER_CHANGES_SETTLE_SECONDS are returned but next_version
+        stops before them, so a transaction that took a lower version and commits
+        late is still picked up; clients apply changes idempotently.
+        """
+        rows = self.scooter_repo.get_changes(since, limit + 1, provider_id)
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        
+        settled_before = self._settled_before()
+        next_version = since
+        for row in rows:
+            if row.changed_at > settled_before:
+                has_more = False
+                break
+            next_version = row.version
+        
+        versions = {row.scooter_id: row.version for row in rows if not row.deleted}
+        views = self.scooter_repo.get_views_by_ids(list(versions), columns) if versions else []
+        changed = sorted(((versions[view.id], view) for view in views), key=lambda pair: pair[0])
+        
+        # Rows gone since their change was logged are reported as deleted too
+        present = {view.id for view in views}
+        deleted = [row.scooter_id for row in rows if row.scooter_id not in present]
+        
+        return changed, deleted, next_version, has_more
+    
+    @staticmethod
+    def _settled_before() -> datetime:
+        return datetime.utcnow() - timedelta(
+            seconds=current_app.config.get('SCOOTER_CHANGES_SETTLE_SECONDS', 2))
     
     def get_available_scooters(self, limit: int = 100) -> List[Scooter]:
         """Get available scooters"""
         return self.scooter_repo.get_available(limit)
     
+    def get_available_scooters_version(self) -> tuple:
+        """Get (count, last_modified) identifying the current set of available scooters"""
+        return self.scooter_repo.get_available_version()
+    
+    def get_available_scooters_data(self, limit: int = 100, version: Optional[tuple] = None,
+                                    fields: Optional[frozenset] = None) -> List[dict]:
+        """
+        Get available scooters as dictionaries, cached for SCOOTER_CACHE_TTL seconds
+        Passing the collection version keys the cache entry to it, so the payload
+        always matches the version it is served with. Sparse fieldsets are cut
+        from the cached full payload.
+        """
+        data = scooter_cache.get_or_set(
+            self.available_cache_key(limit, version),
+            lambda: [s.to_dict() for s in self.scooter_repo.get_available_views(limit)],
+            ttl=current_app.config.get('SCOOTER_CACHE_TTL', 10)
+        )
+        
+        return self.pick_fields(data, fields)
+    
+    @staticmethod
+    def available_cache_key(limit: int, version: Optional[tuple] = None) -> str:
+        """scooter_cache key of an available scooters payload (shared with the async service)"""
+        if version is None:
+            return f'available:{limit}'
+        return f'available:{limit}:{version[0]}:{version[1]}'
+    
+    @staticmethod
+    def pick_fields(data: List[dict], fields: Optional[frozenset] = None) -> List[dict]:
+        """Cut a sparse fieldset from full scooter dictionaries"""
+        if fields:
+            return [{k: v for k, v in item.items() if k in fields} for item in data]
+        return data
+    
     def get_scooters_by_provider(self, provider_id: int, limit: int = 100) -> List[Scooter]:
         """Get scooters by provider"""
         return self.scooter_repo.get_by_provider(provider_id, limit)
     
     def get_nearby_scooters(self, latitude: float, longitude: float, 
-                           radius_km: float = 5.0, limit: int = 50) -> List[Scooter]:
+                           radius_km: float = 5.0, limit: int = 50,
+                           columns: Optional[List[str]] = None) -> List[Scooter]:
         """Get scooters near a location"""
-        scooters = self.scooter_repo.get_nearby(latitude, longitude, radius_km, limit)
+        scooters = self.scooter_repo.get_nearby(latitude, longitude, radius_km, limit, columns)
         
         for scooter in scooters:
             scooter.distance = scooter.distance_from(latitude, longitude)
         
         return sorted(scooters, key=lambda s: s.distance)
     
+    def get_nearby_scooter_views(self, latitude: float, longitude: float,
+                                 radius_km: float = 5.0, limit: int = 50,
+                                 columns: Optional[List[str]] = None) -> List[ScooterView]:
+        """Get scooters near a location as lightweight list rows, closest first"""
+        views = self.scooter_repo.get_nearby_views(latitude, longitude, radius_km, limit, columns)
+        return self.order_by_distance(views, latitude, longitude)
+    
+    @staticmethod
+    def order_by_distance(views: List[ScooterView], latitude: float,
+                          longitude: float) -> List[ScooterView]:
+        """Set each view's distance from a location and sort closest first"""
+        for view in views:
+            view.distance = view.distance_from(latitude, longitude)
+        
+        return sorted(views, key=lambda v: v.distance)
+    
+    def subscribe_to_changes(self, bbox: Optional[str]) -> Tuple[Optional[Subscription], Optional[str]]:
+        """
+        Subscribe to live status, battery and location changes inside a bounding box
+        bbox: "min_lon,min_lat,max_lon,max_lat"
+        Returns: (Subscription, error_message) - close the subscription when done
+        """
+        try:
+            return scooter_events.subscribe(parse_bbox(bbox)), None
+        except ValueError as e:
+            return None, str(e)
+    
+    def bulk_set_status(self, user: User, status: str,
+                        filters: Optional[dict]) -> Tuple[Optional[dict], Optional[str]]:
+        """
+        Change the status of all scooters matching a filter in one statement
+        filters: ids, provider_id, battery_below, bbox ("min_lon,min_lat,max_lon,max_lat"),
+                 current_status; providers are limited to their own fleet
+        Returns: ({'status', 'updated', 'skipped_active_rentals'}, error_message)
+        """
+        if status not in ('available', 'maintenance', 'offline'):
+            return None, 'status must be one of available, maintenance, offline'
+        
+        if not isinstance(filters, dict):
+            return None, 'filter must be an object'
+        
+        unknown = set(filters) - {'ids', 'provider_id', 'battery_below', 'bbox', 'current_status'}
+        if unknown:
+            return None, f"Unknown filter: {', '.join(sorted(unknown))}"
+        
+        criteria = {name: value for name, value in filters.items() if value is not None}
+        if not criteria:
+            return None, 'filter needs at least one criterion'
+        
+        ids = criteria.get('ids')
+        if ids is not None and (not isinstance(ids, list) or not ids
+                                or not all(_is_int(i) for i in ids)):
+            return None, 'ids must be a non-empty list of integers'
+        
+        if criteria.get('current_status', 'available') not in Scooter.__table__.c.status.type.enums:
+            return None, 'Invalid current_status'
+        
+        for name in ('provider_id', 'battery_below'):
+            if name in criteria and not _is_int(criteria[name]):
+                return None, f'{name} must be an integer'
+        
+        if 'bbox' in criteria:
+            try:
+                criteria['bbox'] = parse_bbox(criteria['bbox'])
+            except ValueError as e:
+                return None, str(e)
+        
+        if not user.is_admin():
+            criteria['provider_id'] = user.id
+        
+        updated, skipped = self.scooter_repo.bulk_set_status(status, **criteria)
+        
+        if updated:
+            # Set-based updates bypass the per-scooter signals
+            scooter_cache.clear()
+            if criteria.get('provider_id'):
+                statistics_cache.delete(f"provider:{criteria['provider_id']}")
+            else:
+                statistics_cache.clear()
+            for row in updated:
+                _publish_change(row, 'status')
+        
+        return {'status': status, 'updated': len(updated), 'skipped_active_rentals': skipped}, None
+    
     def update_scooter(self, scooter: Scooter, user: User, 
                       **kwargs) -> Tuple[Optional[Scooter], Optional[str]]:
         """
@@ -109,6 +437,7 @@ class ScooterService:
         
         try:
             updated_scooter = self.scooter_repo.update(scooter, **update_data)
+            self.invalidate_scooter_caches(scooter.provider_id)
             return updated_scooter, None
         except Exception as e:
             return None, str(e)
@@ -121,6 +450,7 @@ class ScooterService:
         """
         try:
             scooter.update_location(latitude, longitude, address)
+            self.invalidate_scooter_caches()
             return True, None
         except Exception as e:
             return False, str(e)
@@ -135,7 +465,8 @@ class ScooterService:
             return False, 'Battery level must be between 0 and 100'
         
         try:
-            self.scooter_repo.update(scooter, battery_level=battery_level)
+            scooter.set_battery_level(battery_level)
+            self.invalidate_scooter_caches()
             
             if battery_level < 20 and scooter.status == 'available':
                 scooter.set_status('maintenance')
@@ -201,7 +532,9 @@ class ScooterService:
             return False, 'Cannot delete scooter with active rental'
         
         try:
+            provider_id = scooter.provider_id
             self.scooter_repo.delete(scooter)
+            self.invalidate_scooter_caches(provider_id)
             return True, None
         except Exception as e:
             return False, str(e)
@@ -219,17 +552,33 @@ class ScooterService:
         return self.scooter_repo.get_low_battery(threshold, limit)
     
     def get_scooter_statistics(self, scooter: Scooter) -> dict:
-        """Get statistics for a scooter"""
+        """Get statistics for a scooter (rental aggregates are cached)"""
+        rental_stats = statistics_cache.get_or_set(
+            f'scooter:{scooter.id}',
+            lambda: {
+                'total_revenue': scooter.get_total_revenue(),
+                'utilization_rate': scooter.get_utilization_rate(),
+                'total_rentals': scooter.rentals.count()
+            },
+            ttl=current_app.config.get('STATISTICS_CACHE_TTL', 60)
+        )
+        
         return {
-            'total_revenue': scooter.get_total_revenue(),
-            'utilization_rate': scooter.get_utilization_rate(),
-            'total_rentals': scooter.rentals.count(),
+            **rental_stats,
             'needs_maintenance': scooter.needs_maintenance(),
             'is_available': scooter.is_available()
         }
     
     def get_provider_statistics(self, provider_id: int) -> dict:
-        """Get statistics for a provider's scooters"""
+        """Get statistics for a provider's scooters, cached for STATISTICS_CACHE_TTL seconds"""
+        return statistics_cache.get_or_set(
+            f'provider:{provider_id}',
+            lambda: self._compute_provider_statistics(provider_id),
+            ttl=current_app.config.get('STATISTICS_CACHE_TTL', 60)
+        )
+    
+    def _compute_provider_statistics(self, provider_id: int) -> dict:
+        """Calculate statistics for a provider's scooters"""
         scooters = self.get_scooters_by_provider(provider_id, limit=1000)
         
         total_scooters = len(scooters)
@@ -248,3 +597,44 @@ class ScooterService:
             'total_revenue': total_revenue,
             'average_utilization': avg_utilization
         }
+    
+    def invalidate_scooter_caches(self, provider_id: Optional[int] = None):
+        """Drop cached scooter listings (and provider statistics) after a change"""
+        scooter_cache.clear()
+        if provider_id:
+            statistics_cache.delete(f'provider:{provider_id}')
+    
+    def get_label_sheets(self, scooter_ids: Optional[List[int]] = None,
+                         provider_id: Optional[int] = None, fmt: str = 'pdf',
+                         page: Optional[int] = None, columns: int = 4,
+                         rows: int = 6) -> Tuple[Optional[Iterator[bytes]], Optional[str]]:
+        """
+        Render QR label sheets for scooters as a stream of bytes
+        PDF streams every sheet; PNG renders a single sheet (page, 1-based).
+        Returns: (chunks, error_message)
+        """
+        from app.utils.qr_labels import iter_label_sheets, sheet_to_png, stream_pdf
+        
+        if fmt not in ('pdf', 'png'):
+            return None, 'Format must be pdf or png'
+        
+        if not scooter_ids and not provider_id:
+            return None, 'Scooter ids or a provider is required'
+        
+        labels = self.scooter_repo.get_label_data(scooter_ids, provider_id)
+        if not labels:
+            return None, 'No scooters found'
+        
+        workers = current_app.config.get('QR_LABEL_WORKERS') or None
+        
+        if fmt == 'png':
+            per_page = columns * rows
+            page = page or 1
+            labels = labels[(page - 1) * per_page:page * per_page]
+            if page < 1 or not labels:
+                return None, 'Page out of range'
+            
+            sheets = iter_label_sheets(labels, columns, rows, workers=workers)
+            return (sheet_to_png(sheet) for sheet in sheets), None
+        
+        return stream_pdf(iter_label_sheets(labels, columns, rows, workers=workers)), None
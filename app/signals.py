@@ -0,0 +1,25 @@
+"""
+Application signals for rental and scooter state changes
+
+Signals are sent by the models after the change has been committed, so
+receivers always observe persisted state. Receivers run synchronously in
+the sending thread and must not raise.
+"""
+
+from blinker import Namespace
+
+_signals = Namespace()
+
+# sender: Rental
+rental_started = _signals.signal('rental-started')
+rental_ended = _signals.signal('rental-ended')
+rental_cancelled = _signals.signal('rental-cancelled')
+
+# sender: Scooter, kwargs: old_status, new_status
+scooter_status_changed = _signals.signal('scooter-status-changed')
+
+# sender: Scooter, kwargs: old_latitude, old_longitude
+scooter_location_changed = _signals.signal('scooter-location-changed')
+
+# sender: Scooter, kwargs: old_level, new_level
+scooter_battery_changed = _signals.signal('scooter-battery-changed')
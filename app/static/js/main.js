@@ -55,6 +55,19 @@ document.addEventListener('DOMContentLoaded', function() {
         }
     }
 
+    // Live duration of active rentals (start time in UTC; cached pages stay current)
+    const rentalDurations = document.querySelectorAll('[data-rental-start]');
+    function updateRentalDurations() {
+        rentalDurations.forEach(element => {
+            const started = Date.parse(element.dataset.rentalStart);
+            element.textContent = Math.max(0, Math.floor((Date.now() - started) / 60000)) + ' min';
+        });
+    }
+    if (rentalDurations.length) {
+        updateRentalDurations();
+        setInterval(updateRentalDurations, 30000);
+    }
+
     // Battery level color coding
     const batteryBars = document.querySelectorAll('.battery-level');
     batteryBars.forEach(bar => {
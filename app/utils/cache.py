@@ -0,0 +1,472 @@
+"""
+Caching layer for ScooterShare Pro
+
+``Cache`` is a namespaced facade over a pluggable backend:
+
+- ``MemoryBackend``: thread-safe in-process LRU with per-entry expiry
+- ``RedisBackend``: speaks the Redis protocol (RESP) over a plain socket, so
+  any Redis-compatible server (or a local stand-in) can be shared by workers
+
+The backend is chosen from ``CACHE_BACKEND`` in ``config.Config`` when the
+extension is initialised. Clearing a namespace on Redis bumps a generation
+number that is part of the namespace's key prefix (one INCR, independent of
+the keyspace size); the orphaned keys expire by their TTL. Namespaces created at import time resolve the
+backend lazily, so they follow whatever ``init_app`` configured.
+"""
+
+import logging
+import pickle
+import socket
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from urllib.parse import urlparse, unquote
+
+logger = logging.getLogger(__name__)
+
+_MISSING = object()
+
+class MemoryBackend:
+    """
+    Thread-safe in-process cache with per-entry expiry and LRU eviction
+
+    Each worker process holds its own instance, so explicit invalidation only
+    reaches the local worker; the TTL bounds staleness everywhere else.
+    """
+
+    def __init__(self, max_entries: int = 10000):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str, default=None):
+        """Get a cached value, or default when missing or expired"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return default
+
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                return default
+
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value, ttl: float):
+        """Cache a value for ttl seconds"""
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def add(self, key: str, value, ttl: float) -> bool:
+        """Cache a value only if the key is not present; returns True if stored"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                return False
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            return True
+
+    def delete(self, key: str) -> bool:
+        """Remove a single key"""
+        with self._lock:
+            return self._entries.pop(key, None) is not None
+
+    def delete_prefix(self, prefix: str) -> int:
+        """Remove every key starting with prefix"""
+        with self._lock:
+            keys = [key for key in self._entries if key.startswith(prefix)]
+            for key in keys:
+                del self._entries[key]
+            return len(keys)
+
+    def namespace_prefix(self, path: tuple) -> str:
+        """Key prefix of a namespace path, e.g. ('dashboard', 'admin') -> 'dashboard:admin:'"""
+        return ''.join(f'{name}:' for name in path)
+
+    def clear_namespace(self, path: tuple) -> int:
+        """Remove every key of a namespace (and its nested namespaces)"""
+        return self.delete_prefix(self.namespace_prefix(path))
+
+    def __len__(self):
+        return len(self._entries)
+
+class RedisError(Exception):
+    """Error reply or protocol failure from a Redis-compatible server"""
+
+class RedisBackend:
+    """
+    Minimal Redis protocol client used as a shared cache backend
+
+    Values are pickled. Connection failures are logged and treated as cache
+    misses, and the server is skipped for retry_interval seconds afterwards,
+    so an unavailable server degrades to uncached behaviour instead of
+    slowing down or failing requests.
+    """
+
+    def __init__(self, url: str = 'redis://localhost:6379/0', key_prefix: str = '',
+                 timeout: float = 1.0, retry_interval: float = 5.0):
+        parsed = urlparse(url)
+        self.host = parsed.hostname or 'localhost'
+        self.port = parsed.port or 6379
+        self.password = unquote(parsed.password) if parsed.password else None
+        self.db = int(parsed.path.lstrip('/') or 0)
+        self.key_prefix = key_prefix
+        self.timeout = timeout
+        self.retry_interval = retry_interval
+        self._down_until = 0.0
+        self._local = threading.local()
+
+    # Connection and protocol handling
+
+    def _connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            sock = socket.create_connection((self.host, self.port), timeout=self.timeout)
+            conn = (sock, sock.makefile('rb'))
+            self._local.conn = conn
+            if self.password:
+                self._execute(conn, 'AUTH', self.password)
+            if self.db:
+                self._execute(conn, 'SELECT', self.db)
+        return conn
+
+    def _disconnect(self):
+        conn = getattr(self._local, 'conn', None)
+        self._local.conn = None
+        if conn is not None:
+            try:
+                conn[1].close()
+                conn[0].close()
+            except OSError:
+                pass
+
+    @staticmethod
+    def _encode(*args) -> bytes:
+        parts = [b'*%d\r\n' % len(args)]
+        for arg in args:
+            if not isinstance(arg, bytes):
+                arg = str(arg).encode()
+            parts.append(b'$%d\r\n%s\r\n' % (len(arg), arg))
+        return b''.join(parts)
+
+    def _read_reply(self, reader):
+        line = reader.readline()
+        if not line.endswith(b'\r\n'):
+            raise RedisError('Connection closed by server')
+
+        kind, payload = line[:1], line[1:-2]
+        if kind == b'+':
+            return payload.decode()
+        if kind == b'-':
+            raise RedisError(payload.decode())
+        if kind == b':':
+            return int(payload)
+        if kind == b'$':
+            length = int(payload)
+            if length < 0:
+                return None
+            data = reader.read(length + 2)
+            return data[:-2]
+        if kind == b'*':
+            length = int(payload)
+            if length < 0:
+                return None
+            return [self._read_reply(reader) for _ in range(length)]
+
+        raise RedisError(f'Unexpected reply type: {kind!r}')
+
+    def _execute(self, conn, *args):
+        sock, reader = conn
+        sock.sendall(self._encode(*args))
+        return self._read_reply(reader)
+
+    def execute(self, *args):
+        """Send one command and return its reply"""
+        try:
+            return self._execute(self._connection(), *args)
+        except (OSError, RedisError):
+            # The stream may be out of sync; reconnect on the next command
+            self._disconnect()
+            raise
+
+    @property
+    def available(self) -> bool:
+        """False while the server is being bypassed after a connection error"""
+        return time.monotonic() >= self._down_until
+
+    def mark_unavailable(self, error: OSError):
+        """Bypass the server for retry_interval seconds after a connection error"""
+        self._down_until = time.monotonic() + self.retry_interval
+        logger.warning('Cache server unavailable (%s); bypassing it for %ss',
+                       error, self.retry_interval)
+
+    def _safe(self, default, *args):
+        if not self.available:
+            return default
+
+        try:
+            return self.execute(*args)
+        except OSError as e:
+            self.mark_unavailable(e)
+            return default
+        except RedisError as e:
+            logger.warning('Cache server command %s failed: %s', args[0], e)
+            return default
+
+    def command(self, default, *args):
+        """Send one command; returns default while the server is unreachable or on an error"""
+        return self._safe(default, *args)
+
+    # Backend interface
+
+    def get(self, key: str, default=None):
+        """Get a cached value, or default when missing"""
+        data = self._safe(None, 'GET', self.key_prefix + key)
+        return default if data is None else pickle.loads(data)
+
+    def set(self, key: str, value, ttl: float):
+        """Cache a value for ttl seconds"""
+        self._safe(None, 'SET', self.key_prefix + key, pickle.dumps(value),
+                   'PX', max(int(ttl * 1000), 1))
+
+    def add(self, key: str, value, ttl: float) -> bool:
+        """Cache a value only if the key is not present; returns True if stored"""
+        reply = self._safe(_MISSING, 'SET', self.key_prefix + key, pickle.dumps(value),
+                           'PX', max(int(ttl * 1000), 1), 'NX')
+        # Without a reachable server nobody else can hold the key either
+        return reply == 'OK' or reply is _MISSING
+
+    def delete(self, key: str) -> bool:
+        """Remove a single key"""
+        return bool(self._safe(0, 'DEL', self.key_prefix + key))
+
+    def delete_prefix(self, prefix: str) -> int:
+        """Remove every key starting with prefix (incremental SCAN, no KEYS)"""
+        pattern = self._escape_glob(self.key_prefix + prefix) + '*'
+        deleted, cursor = 0, b'0'
+        while True:
+            reply = self._safe(None, 'SCAN', cursor, 'MATCH', pattern, 'COUNT', 500)
+            if reply is None:
+                return deleted
+
+            cursor, keys = reply
+            if keys:
+                deleted += self._safe(0, 'DEL', *keys)
+            if cursor in (b'0', 0, '0'):
+                return deleted
+
+    def _generation_keys(self, path: tuple) -> list:
+        return [f"{self.key_prefix}_gen:{':'.join(path[:depth])}"
+                for depth in range(1, len(path) + 1)]
+
+    def namespace_prefix(self, path: tuple) -> str:
+        """
+        Key prefix of a namespace path with each level's generation, e.g.
+        ('dashboard', 'admin') -> 'dashboard:3:admin:0:'; one MGET per call
+        """
+        generations = self._safe(None, 'MGET', *self._generation_keys(path)) or [None] * len(path)
+        return ''.join(f'{name}:{int(generation or 0)}:'
+                       for name, generation in zip(path, generations))
+
+    def clear_namespace(self, path: tuple) -> int:
+        """
+        Invalidate a namespace (and its nested namespaces) with one INCR of its
+        generation; the old keys are no longer read and expire by their TTL.
+        Returns 0: the number of orphaned keys is not known.
+        """
+        self._safe(None, 'INCR', self._generation_keys(path)[-1])
+        return 0
+
+    @staticmethod
+    def _escape_glob(value: str) -> str:
+        return ''.join('\\' + ch if ch in '*?[]\\' else ch for ch in value)
+
+class Cache:
+    """
+    Namespaced cache facade with TTLs, stampede protection and hit/miss counters
+
+    ``cache.namespace('users')`` returns a view whose keys live under
+    ``users``; clearing a namespace only drops its own keys (and those of the
+    namespaces nested in it).
+    """
+
+    LOCK_STRIPES = 64
+
+    def __init__(self, backend=None, default_ttl: float = 300, namespace: str = '',
+                 parent: 'Cache' = None, path: tuple = None):
+        self._parent = parent
+        self._path = tuple(path) if path else ((namespace,) if namespace else ())
+        self._namespace = ':'.join(self._path)
+        self._prefix = f'{self._namespace}:' if self._namespace else ''
+
+        if parent is None:
+            self.backend = backend or MemoryBackend()
+            self.default_ttl = default_ttl
+            self.lock_timeout = 5.0
+            self._stats = {}
+            self._stats_lock = threading.Lock()
+            self._locks = [threading.Lock() for _ in range(self.LOCK_STRIPES)]
+            self._namespaces = {}
+
+    def init_app(self, app):
+        """Configure the backend from the application config"""
+        root = self._root
+        config = app.config
+        backend = config.get('CACHE_BACKEND', 'memory')
+
+        if backend == 'redis':
+            root.backend = RedisBackend(config.get('CACHE_REDIS_URL', 'redis://localhost:6379/0'),
+                                        key_prefix=config.get('CACHE_KEY_PREFIX', ''))
+        elif backend == 'memory':
+            root.backend = MemoryBackend(max_entries=config.get('CACHE_MAX_ENTRIES', 10000))
+        else:
+            raise ValueError(f'Unknown cache backend: {backend}')
+
+        root.default_ttl = config.get('CACHE_DEFAULT_TTL', 300)
+        root.lock_timeout = config.get('CACHE_LOCK_TIMEOUT', 5.0)
+        app.extensions['cache'] = root
+
+    @property
+    def _root(self) -> 'Cache':
+        return self if self._parent is None else self._parent._root
+
+    def namespace(self, name: str) -> 'Cache':
+        """
+        Get a view of this cache whose keys live under name
+        Views of the root are shared; views nested in a view (e.g. one per
+        user) are created on demand and counted in their top namespace's stats.
+        """
+        root = self._root
+        if self is not root:
+            return Cache(parent=root, path=self._path + (name,))
+
+        view = root._namespaces.get(name)
+        if view is None:
+            view = root._namespaces.setdefault(name, Cache(parent=root, path=(name,)))
+        return view
+
+    def _key_prefix(self) -> str:
+        # Resolved per operation: generations change when another worker clears
+        return self._root.backend.namespace_prefix(self._path) if self._path else ''
+
+    # Instrumentation
+
+    def _count(self, event: str):
+        root = self._root
+        with root._stats_lock:
+            counters = root._stats.setdefault(self._path[0] if self._path else '(root)',
+                                              {'hits': 0, 'misses': 0, 'sets': 0, 'deletes': 0})
+            counters[event] += 1
+
+    def stats(self) -> dict:
+        """Get hit/miss/set/delete counters and hit ratio per namespace"""
+        root = self._root
+        with root._stats_lock:
+            snapshot = {name: dict(counters) for name, counters in root._stats.items()}
+
+        for counters in snapshot.values():
+            lookups = counters['hits'] + counters['misses']
+            counters['hit_ratio'] = round(counters['hits'] / lookups, 4) if lookups else None
+
+        if self._namespace:
+            return {name: counters for name, counters in snapshot.items()
+                    if name == self._namespace or name.startswith(self._prefix)}
+        return snapshot
+
+    # Cache operations
+
+    def get(self, key, default=None):
+        """Get a cached value, or default when missing or expired"""
+        value = self._root.backend.get(self._key_prefix() + str(key), _MISSING)
+        if value is _MISSING:
+            self._count('misses')
+            return default
+
+        self._count('hits')
+        return value
+
+    def set(self, key, value, ttl: float = None):
+        """Cache a value for ttl seconds (default TTL when None, skipped when <= 0)"""
+        ttl = self._root.default_ttl if ttl is None else ttl
+        if ttl <= 0:
+            return
+
+        self._root.backend.set(self._key_prefix() + str(key), value, ttl)
+        self._count('sets')
+
+    def delete(self, key) -> bool:
+        """Remove a single key"""
+        self._count('deletes')
+        return self._root.backend.delete(self._key_prefix() + str(key))
+
+    def clear(self) -> int:
+        """Remove every key in this namespace (the whole cache for the root)"""
+        self._count('deletes')
+        if self._path:
+            return self._root.backend.clear_namespace(self._path)
+        return self._root.backend.delete_prefix('')
+
+    def delete_prefix(self, prefix: str) -> int:
+        """
+        Remove every key in this namespace starting with prefix
+        On Redis this scans the keyspace; use a nested namespace and clear()
+        for anything invalidated often.
+        """
+        self._count('deletes')
+        return self._root.backend.delete_prefix(self._key_prefix() + prefix)
+
+    def get_or_set(self, key, factory, ttl: float = None):
+        """
+        Get a cached value or compute it with factory and cache the result
+
+        Concurrent misses for the same key compute the value once: threads in
+        this worker wait on a striped lock, and other workers sharing the
+        backend wait (up to lock_timeout) for the worker holding the fill lock.
+        """
+        root = self._root
+        full_key = self._key_prefix() + str(key)
+
+        value = root.backend.get(full_key, _MISSING)
+        if value is not _MISSING:
+            self._count('hits')
+            return value
+        self._count('misses')
+
+        stripe = root._locks[zlib.crc32(full_key.encode()) % len(root._locks)]
+
+        with stripe:
+            value = root.backend.get(full_key, _MISSING)
+            if value is not _MISSING:
+                return value
+
+            lock_key = f'{full_key}:fill-lock'
+            acquired = root.backend.add(lock_key, 1, root.lock_timeout)
+            if not acquired:
+                deadline = time.monotonic() + root.lock_timeout
+                while time.monotonic() < deadline:
+                    time.sleep(0.05)
+                    value = root.backend.get(full_key, _MISSING)
+                    if value is not _MISSING:
+                        return value
+
+            try:
+                value = factory()
+                ttl = root.default_ttl if ttl is None else ttl
+                if ttl > 0:
+                    # Under the generation read above: a clear meanwhile orphans it
+                    root.backend.set(full_key, value, ttl)
+                    self._count('sets')
+            finally:
+                if acquired:
+                    root.backend.delete(lock_key)
+
+        return value
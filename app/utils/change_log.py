@@ -0,0 +1,77 @@
+"""
+Per-row change versions for incremental sync
+
+``track_changes(Model, ChangeModel)`` gives every row of Model that a session
+inserts, updates or deletes a new version in ChangeModel's table, written in
+the same transaction as the change. Flushed ORM objects are recorded after
+the flush; bulk ``UPDATE``/``DELETE`` statements record the rows they match
+before they run. Rows added by bulk ``INSERT`` statements cannot be matched
+beforehand, so callers record them with ``record_changes`` afterwards.
+ChangeModel keeps one row per changed row, so clients read the changes since
+their last version in O(changes), deletions included.
+"""
+
+from sqlalchemy import event, select
+from app import db
+
+_tracked = {}
+
+def track_changes(model, change_model, partition: str = 'provider_id'):
+    """
+    Record versions of model's rows in change_model
+    change_model.record(connection, {id: (partition_value, deleted)}) writes them.
+    """
+    _tracked[model] = (change_model, partition)
+
+def record_changes(session, model, *criteria, deleted: bool = False) -> int:
+    """Version the rows of a tracked model matching criteria (all rows when none)"""
+    change_model, partition = _tracked[model]
+
+    stmt = select(model.id, getattr(model, partition))
+    if criteria:
+        stmt = stmt.where(*criteria)
+
+    connection = session.connection()
+    rows = {row[0]: (row[1], deleted) for row in connection.execute(stmt)}
+    if rows:
+        change_model.record(connection, rows)
+    return len(rows)
+
+def _add_change(changes: dict, obj, deleted: bool):
+    change_model, partition = _tracked[type(obj)]
+    changes.setdefault(change_model, {})[obj.id] = (getattr(obj, partition), deleted)
+
+@event.listens_for(db.session, 'after_flush')
+def _record_flushed_changes(session, flush_context):
+    """Version the tracked objects this flush wrote"""
+    changes = {}
+
+    for obj in session.new:
+        if type(obj) in _tracked:
+            _add_change(changes, obj, False)
+
+    for obj in session.dirty:
+        if type(obj) in _tracked and session.is_modified(obj, include_collections=False):
+            _add_change(changes, obj, False)
+
+    for obj in session.deleted:
+        if type(obj) in _tracked:
+            _add_change(changes, obj, True)
+
+    for change_model, rows in changes.items():
+        change_model.record(session.connection(), rows)
+
+@event.listens_for(db.session, 'do_orm_execute')
+def _record_bulk_changes(orm_execute_state):
+    """Bulk UPDATE/DELETE statements bypass flush; version the rows they match"""
+    if not (orm_execute_state.is_update or orm_execute_state.is_delete):
+        return
+
+    mapper = orm_execute_state.bind_mapper
+    if mapper is None or mapper.class_ not in _tracked:
+        return
+
+    whereclause = orm_execute_state.statement.whereclause
+    criteria = () if whereclause is None else (whereclause,)
+    record_changes(orm_execute_state.session, mapper.class_, *criteria,
+                   deleted=orm_execute_state.is_delete)
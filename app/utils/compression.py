@@ -0,0 +1,174 @@
+"""
+Response compression for ScooterShare Pro
+
+``Compress`` negotiates Accept-Encoding and compresses responses whose
+content type is in ``COMPRESS_MIMETYPES`` and whose body reaches
+``COMPRESS_MIN_SIZE`` bytes. It uses brotli when the optional ``brotli``
+package is installed (`pip install brotli`) and the client accepts it, and
+gzip otherwise. Streamed responses are compressed chunk by chunk, so they keep
+streaming.
+
+Static files are not compressed per request. When a precompressed variant
+(``style.css.br`` / ``style.css.gz``, written by ``flask compress-static``)
+is at least as new as the file itself, it is served as-is.
+"""
+
+import gzip
+import mimetypes
+import os
+import zlib
+from flask import current_app, request, send_from_directory
+from werkzeug.security import safe_join
+
+try:
+    import brotli
+except ImportError:  # optional dependency
+    brotli = None
+
+DEFAULT_MIMETYPES = (
+    'application/json', 'application/javascript', 'text/javascript', 'text/css',
+    'text/html', 'text/plain', 'text/csv', 'image/svg+xml'
+)
+
+# Precompressed static variants, preferred first
+STATIC_SUFFIXES = (('br', '.br'), ('gzip', '.gz'))
+
+_GZIP_WBITS = 16 + zlib.MAX_WBITS
+
+def compress_bytes(data: bytes, encoding: str, level: int = 6) -> bytes:
+    """Compress a body for a Content-Encoding (brotli takes level as quality)"""
+    if encoding == 'br':
+        return brotli.compress(data, quality=level)
+    compressor = zlib.compressobj(level, zlib.DEFLATED, _GZIP_WBITS)
+    return compressor.compress(data) + compressor.flush()
+
+def compress_stream(chunks, encoding: str, level: int = 6):
+    """Compress an iterable of chunks, flushing after each so none is held back"""
+    if encoding == 'br':
+        compressor = brotli.Compressor(quality=level)
+        for chunk in chunks:
+            yield compressor.process(chunk) + compressor.flush()
+        yield compressor.finish()
+    else:
+        compressor = zlib.compressobj(level, zlib.DEFLATED, _GZIP_WBITS)
+        for chunk in chunks:
+            yield compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+        yield compressor.flush()
+
+def precompress_static(static_folder: str) -> list:
+    """Write .gz (and .br with brotli) variants of compressible static files"""
+    written = []
+    for root, _dirs, files in os.walk(static_folder):
+        for name in files:
+            if not name.endswith(('.css', '.js', '.svg', '.html', '.json')):
+                continue
+            path = os.path.join(root, name)
+            with open(path, 'rb') as f:
+                data = f.read()
+
+            # mtime=0 keeps the output reproducible
+            variants = {'.gz': gzip.compress(data, compresslevel=9, mtime=0)}
+            if brotli is not None:
+                variants['.br'] = brotli.compress(data, quality=11)
+
+            for suffix, body in variants.items():
+                with open(path + suffix, 'wb') as f:
+                    f.write(body)
+                written.append(path + suffix)
+    return written
+
+class Compress:
+    """Flask extension compressing responses per Accept-Encoding"""
+
+    def init_app(self, app):
+        """Register the response hook and the precompressed static view"""
+        app.config.setdefault('COMPRESS_ENABLED', True)
+        app.config.setdefault('COMPRESS_MIN_SIZE', 500)
+        app.config.setdefault('COMPRESS_LEVEL', 6)
+        app.config.setdefault('COMPRESS_BROTLI_QUALITY', 4)
+        app.config.setdefault('COMPRESS_MIMETYPES', DEFAULT_MIMETYPES)
+
+        app.after_request(self.after_request)
+        if app.has_static_folder:
+            app.view_functions['static'] = self.send_static_file
+
+    @staticmethod
+    def negotiate(encodings=('br', 'gzip')):
+        """Best encoding the client accepts, or None"""
+        accepted = request.accept_encodings
+        for encoding in encodings:
+            if encoding == 'br' and brotli is None:
+                continue
+            if accepted[encoding]:
+                return encoding
+        return None
+
+    def after_request(self, response):
+        """Compress eligible responses"""
+        config = current_app.config
+
+        if (not config['COMPRESS_ENABLED']
+                or response.status_code < 200 or response.status_code in (204, 206, 304)
+                or response.direct_passthrough
+                or 'Content-Encoding' in response.headers
+                or response.mimetype not in config['COMPRESS_MIMETYPES']):
+            return response
+
+        response.vary.add('Accept-Encoding')
+
+        encoding = self.negotiate()
+        if encoding is None:
+            return response
+
+        level = config['COMPRESS_BROTLI_QUALITY'] if encoding == 'br' else config['COMPRESS_LEVEL']
+
+        if response.is_streamed:
+            # Closing the response must still close the original iterable
+            original = response.response
+            response.response = compress_stream(response.iter_encoded(), encoding, level)
+            response.headers.pop('Content-Length', None)
+            if hasattr(original, 'close'):
+                response.call_on_close(original.close)
+        else:
+            data = response.get_data()
+            if len(data) < config['COMPRESS_MIN_SIZE']:
+                return response
+            response.set_data(compress_bytes(data, encoding, level))
+
+        response.headers['Content-Encoding'] = encoding
+
+        # The compressed body is a different representation of the same resource
+        etag, weak = response.get_etag()
+        if etag and not weak:
+            response.set_etag(etag, weak=True)
+
+        return response
+
+    def send_static_file(self, filename):
+        """Static view serving a fresh precompressed variant when one exists"""
+        app = current_app
+        path = safe_join(app.static_folder, filename)
+
+        if app.config['COMPRESS_ENABLED'] and path and os.path.isfile(path):
+            encoding, suffix = self._static_variant(path)
+            if encoding is not None:
+                response = send_from_directory(
+                    app.static_folder, filename + suffix,
+                    mimetype=mimetypes.guess_type(filename)[0] or 'application/octet-stream',
+                    max_age=app.get_send_file_max_age(filename)
+                )
+                response.headers['Content-Encoding'] = encoding
+                response.vary.add('Accept-Encoding')
+                return response
+
+        return app.send_static_file(filename)
+
+    def _static_variant(self, path: str):
+        """(encoding, suffix) of the best fresh variant the client accepts"""
+        source_mtime = os.path.getmtime(path)
+        for encoding, suffix in STATIC_SUFFIXES:
+            variant = path + suffix
+            if (os.path.isfile(variant) and os.path.getmtime(variant) >= source_mtime
+                    and request.accept_encodings[encoding]):
+                return encoding, suffix
+        return None, None
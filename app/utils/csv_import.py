@@ -0,0 +1,102 @@
+"""
+CSV parsing for bulk scooter imports
+
+Rows are decoded and read lazily, line by line, so a file of any size is never
+held in memory, and each row is validated on its own: a bad row becomes an entry
+in the import report instead of failing the whole file.
+"""
+
+import csv
+import math
+from typing import Iterator, Optional, Tuple
+
+REQUIRED_COLUMNS = ('identifier', 'model', 'brand', 'latitude', 'longitude')
+
+# Statuses a scooter can be imported with ('in_use' needs a rental)
+IMPORT_STATUSES = ('available', 'maintenance', 'offline')
+
+def decode_lines(stream) -> Iterator[str]:
+    """
+    Decode a binary stream line by line as UTF-8 (leading BOM dropped)
+    Undecodable bytes become U+FFFD, so only the rows containing them fail.
+    """
+    first = True
+    for line in stream:
+        text = line.decode('utf-8', 'replace')
+        if first:
+            text = text.lstrip('\ufeff')
+            first = False
+        yield text
+
+def read_rows(lines) -> Iterator[Tuple[int, dict]]:
+    """
+    Read the header from CSV text lines and return an iterator of
+    (line_number, row) for the data rows, read as they are consumed.
+    Raises ValueError when the header lacks a required column.
+    """
+    reader = csv.DictReader(lines)
+    try:
+        header = [name.strip().lower() for name in reader.fieldnames or ()]
+    except csv.Error as e:
+        raise ValueError(f'Malformed CSV header: {e}')
+
+    missing = [name for name in REQUIRED_COLUMNS if name not in header]
+    if missing:
+        raise ValueError(f"Missing CSV columns: {', '.join(missing)}")
+    reader.fieldnames = header
+
+    return ((reader.line_num, row) for row in reader
+            if any(value and value.strip() for value in row.values() if isinstance(value, str)))
+
+def _text(row: dict, name: str, max_length: int, required: bool = True) -> Optional[str]:
+    value = (row.get(name) or '').strip()
+    if not value:
+        if required:
+            raise ValueError(f'{name} is required')
+        return None
+    if len(value) > max_length:
+        raise ValueError(f'{name} is longer than {max_length} characters')
+    return value
+
+def _number(row: dict, name: str, cast, low=None, high=None, required: bool = True):
+    value = (row.get(name) or '').strip()
+    if not value:
+        if required:
+            raise ValueError(f'{name} is required')
+        return None
+    try:
+        number = cast(value)
+    except ValueError:
+        raise ValueError(f'{name} must be a number')
+    if not math.isfinite(number):
+        raise ValueError(f'{name} must be a finite number')
+    if (low is not None and number < low) or (high is not None and number > high):
+        raise ValueError(f'{name} must be between {low} and {high}')
+    return number
+
+def parse_scooter_row(row: dict) -> dict:
+    """
+    Validate one CSV row into Scooter column values (identifier upper-cased,
+    model and brand title-cased as in Scooter()). Raises ValueError.
+    """
+    if any('\ufffd' in value for value in row.values() if isinstance(value, str)):
+        raise ValueError('row is not valid UTF-8')
+
+    values = {
+        'identifier': _text(row, 'identifier', 20).upper(),
+        'model': _text(row, 'model', 50).title(),
+        'brand': _text(row, 'brand', 50).title(),
+        'latitude': _number(row, 'latitude', float, -90, 90),
+        'longitude': _number(row, 'longitude', float, -180, 180),
+        'address': _text(row, 'address', 255, required=False),
+        'battery_level': _number(row, 'battery_level', int, 0, 100, required=False),
+        'max_speed': _number(row, 'max_speed', int, 0, 100, required=False),
+        'range_km': _number(row, 'range_km', int, 0, 1000, required=False),
+        'status': _text(row, 'status', 20, required=False)
+    }
+
+    if values['status'] is not None and values['status'] not in IMPORT_STATUSES:
+        raise ValueError(f"status must be one of {', '.join(IMPORT_STATUSES)}")
+
+    # Leave unset columns to their model defaults
+    return {name: value for name, value in values.items() if value is not None}
@@ -0,0 +1,96 @@
+"""
+Fast JSON encoding for API responses
+
+Uses orjson when it is installed (optional; `pip install orjson`) and falls
+back to a compact stdlib encoder. Both handle datetimes, dates, Decimals,
+sets and numpy scalars natively, so payloads need no per-field conversion.
+
+stream_json_array() encodes a lazy iterable item by item into a streamed
+response, so large lists never exist in memory as a whole and the first bytes
+go out before the last row has been read. sse_event() frames a payload for a
+text/event-stream response.
+"""
+
+import json
+from datetime import date, datetime, time
+from decimal import Decimal
+from typing import Callable, Iterable, Iterator, Optional
+from flask import Response, make_response, stream_with_context
+
+try:
+    import orjson
+except ImportError:  # optional dependency
+    orjson = None
+
+# Name of the encoder in use, e.g. for the debug endpoints
+BACKEND = 'orjson' if orjson is not None else 'json'
+
+# Bytes collected before a streamed response writes a chunk
+STREAM_CHUNK_SIZE = 64 * 1024
+
+def _default(value):
+    """Encode types neither backend handles on its own"""
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (datetime, date, time)):
+        return value.isoformat()
+    if isinstance(value, (set, frozenset)):
+        return list(value)
+    if hasattr(value, 'item'):  # numpy scalars
+        return value.item()
+    raise TypeError(f'Object of type {type(value).__name__} is not JSON serializable')
+
+if orjson is not None:
+    _ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+    def dumps(data) -> bytes:
+        """Encode data as compact JSON bytes"""
+        return orjson.dumps(data, default=_default, option=_ORJSON_OPTIONS)
+else:
+    _encoder = json.JSONEncoder(default=_default, separators=(',', ':'), ensure_ascii=False)
+
+    def dumps(data) -> bytes:
+        """Encode data as compact JSON bytes"""
+        return _encoder.encode(data).encode()
+
+def output_json(data, code, headers=None):
+    """Flask-RESTX representation for application/json"""
+    response = make_response(dumps(data), code)
+    response.headers.extend(headers or {})
+    response.mimetype = 'application/json'
+    return response
+
+def iter_json_array(items: Iterable, serialize: Optional[Callable] = None,
+                    chunk_size: int = STREAM_CHUNK_SIZE) -> Iterator[bytes]:
+    """Encode items as one JSON array, yielding chunks of about chunk_size bytes"""
+    # The opening bracket goes out before the first item is fetched
+    yield b'['
+
+    buffer = bytearray()
+    separator = b''
+    for item in items:
+        buffer += separator
+        buffer += dumps(serialize(item) if serialize else item)
+        separator = b','
+        if len(buffer) >= chunk_size:
+            yield bytes(buffer)
+            buffer.clear()
+
+    buffer += b']'
+    yield bytes(buffer)
+
+def stream_json_array(items: Iterable, serialize: Optional[Callable] = None,
+                      headers: Optional[dict] = None) -> Response:
+    """
+    Streamed application/json response for a lazy iterable
+    The request context (and with it the DB session) stays open until the
+    last chunk is sent; validate input before calling, errors raised while
+    streaming truncate the body.
+    """
+    return Response(stream_with_context(iter_json_array(items, serialize)),
+                    headers=headers, mimetype='application/json')
+
+def sse_event(data, event: Optional[str] = None) -> bytes:
+    """Encode one Server-Sent Events frame with a JSON data line"""
+    head = b'event: ' + event.encode() + b'\n' if event else b''
+    return head + b'data: ' + dumps(data) + b'\n\n'
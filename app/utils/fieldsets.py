@@ -0,0 +1,106 @@
+"""
+Sparse fieldsets (?fields=) for model serialization
+
+Each model declares its serialized fields once as a FieldMap: the public and
+sensitive field names, how each value is computed and which columns it reads.
+to_dict() only computes the requested fields, and repositories use the same
+map to restrict the SELECT list with load_only().
+"""
+
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+from flask import request
+from sqlalchemy.orm import load_only
+
+# Returned by a getter to leave the field out of the output entirely
+OMIT = object()
+
+def isoformat(value) -> Optional[str]:
+    """ISO timestamp or None"""
+    return value.isoformat() if value else None
+
+class Field:
+    """A serialized value and the model columns it reads"""
+
+    __slots__ = ('getter', 'columns')
+
+    def __init__(self, getter: Callable, columns: Tuple[str, ...]):
+        self.getter = getter
+        self.columns = columns
+
+def attr(convert: Optional[Callable] = None, column: Optional[str] = None) -> Callable[[str], Field]:
+    """Field copied from a column (named like the field unless given), optionally converted"""
+    def build(name: str) -> Field:
+        key = column or name
+        if convert is None:
+            return Field(lambda obj: getattr(obj, key), (key,))
+        return Field(lambda obj: convert(getattr(obj, key)), (key,))
+    return build
+
+def computed(getter: Callable, *columns: str) -> Callable[[str], Field]:
+    """Field derived from the object; columns lists what the getter reads"""
+    return lambda name: Field(getter, columns)
+
+def parse_fields(raw: Optional[str]) -> Optional[frozenset]:
+    """Parse a ?fields=a,b,c value; None or empty means all fields"""
+    if not raw:
+        return None
+    names = frozenset(name.strip() for name in raw.split(',') if name.strip())
+    return names or None
+
+def load_columns(query, model, columns: Optional[Iterable[str]]):
+    """Restrict a query's SELECT list to the given columns (all columns when None)"""
+    if not columns:
+        return query
+    return query.options(load_only(*(getattr(model, column) for column in columns)))
+
+class FieldMap:
+    """Ordered public and sensitive fields of a model"""
+
+    def __init__(self, public: Dict[str, Callable], sensitive: Optional[Dict[str, Callable]] = None):
+        self.public = {name: build(name) for name, build in public.items()}
+        self.sensitive = {name: build(name) for name, build in (sensitive or {}).items()}
+
+    def _available(self, include_sensitive: bool) -> Dict[str, Field]:
+        if include_sensitive:
+            return {**self.public, **self.sensitive}
+        return self.public
+
+    def validate(self, fields: Optional[Iterable[str]], include_sensitive: bool = False) -> Optional[str]:
+        """Error message naming unknown fields, or None when all are valid"""
+        if not fields:
+            return None
+        unknown = sorted(set(fields) - set(self._available(include_sensitive)))
+        return f"Unknown fields: {', '.join(unknown)}" if unknown else None
+
+    def columns(self, fields: Optional[Iterable[str]], include_sensitive: bool = False,
+                always: Iterable[str] = ('id',)) -> Optional[List[str]]:
+        """Columns needed to serialize the fields (None = every column)"""
+        if not fields:
+            return None
+        available = self._available(include_sensitive)
+        needed = dict.fromkeys(always)
+        for name in fields:
+            if name in available:
+                needed.update(dict.fromkeys(available[name].columns))
+        return list(needed)
+
+    def serialize(self, obj, include_sensitive: bool = False,
+                  fields: Optional[Iterable[str]] = None) -> dict:
+        """Build the dict, computing only the requested fields (all when fields is None)"""
+        data = {}
+        for name, field in self._available(include_sensitive).items():
+            if fields is not None and name not in fields:
+                continue
+            value = field.getter(obj)
+            if value is not OMIT:
+                data[name] = value
+        return data
+
+def fields_from_request(field_map: FieldMap,
+                        include_sensitive: bool = False) -> Tuple[Optional[frozenset], Optional[str]]:
+    """
+    Read ?fields= for the current request
+    Returns: (fields, error_message) - fields is None when all were requested
+    """
+    fields = parse_fields(request.args.get('fields'))
+    return fields, field_map.validate(fields, include_sensitive)
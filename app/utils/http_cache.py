@@ -0,0 +1,70 @@
+"""
+HTTP conditional request helpers (ETag / Last-Modified)
+
+The collection responses (conditional_response) validate by ETag only: their
+Last-Modified is the newest member's updated_at, which does not advance when
+a member leaves the set, so If-Modified-Since alone would answer 304 for a
+stale copy. Their ETags include the member count, which does change.
+"""
+
+import hashlib
+from datetime import datetime, timezone
+from typing import Callable, Optional
+from flask import Response, request
+from werkzeug.http import http_date, quote_etag
+
+def make_etag(*parts) -> str:
+    """Build a compact ETag from the parts that identify a representation"""
+    raw = '|'.join(str(part) for part in parts)
+    return hashlib.blake2b(raw.encode(), digest_size=12).hexdigest()
+
+def _http_timestamp(value: Optional[datetime]) -> Optional[datetime]:
+    """Naive UTC datetimes from the database, truncated to HTTP date precision"""
+    if value is None:
+        return None
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.replace(microsecond=0)
+
+def is_not_modified(etag: str, last_modified: Optional[datetime] = None) -> bool:
+    """Check the request's validators; If-None-Match wins over If-Modified-Since"""
+    if request.if_none_match:
+        return request.if_none_match.contains_weak(etag)
+
+    if last_modified is not None and request.if_modified_since:
+        return last_modified <= request.if_modified_since
+
+    return False
+
+def conditional_response(etag: str, last_modified: Optional[datetime],
+                         build_payload: Callable, cache_control: str = 'private, no-cache'):
+    """
+    Answer a GET of a collection with 304 when the client's ETag is current,
+    else build the payload. build_payload is only called for a 200, so
+    unchanged collections are never serialized. last_modified is sent but
+    not used to validate (see module docstring).
+    Returns a Response (304) or a (payload, 200, headers) tuple.
+    """
+    last_modified, headers = _validators(etag, last_modified, cache_control)
+
+    if is_not_modified(etag):
+        return Response(status=304, headers=headers)
+
+    return build_payload(), 200, headers
+
+async def async_conditional_response(etag: str, last_modified: Optional[datetime],
+                                     build_payload: Callable, cache_control: str = 'private, no-cache'):
+    """conditional_response for a coroutine function build_payload (async read service)"""
+    last_modified, headers = _validators(etag, last_modified, cache_control)
+
+    if is_not_modified(etag):
+        return Response(status=304, headers=headers)
+
+    return await build_payload(), 200, headers
+
+def _validators(etag: str, last_modified: Optional[datetime], cache_control: str):
+    last_modified = _http_timestamp(last_modified)
+    headers = {'ETag': quote_etag(etag), 'Cache-Control': cache_control}
+    if last_modified is not None:
+        headers['Last-Modified'] = http_date(last_modified)
+    return last_modified, headers
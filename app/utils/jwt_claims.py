@@ -0,0 +1,72 @@
+"""
+JWT claim helpers for stateless authorization
+"""
+
+import hashlib
+import time
+from flask import current_app
+from flask_jwt_extended import get_jwt, get_jwt_identity
+
+def token_version(password_hash: str, role: str, is_active: bool) -> str:
+    """
+    Fingerprint of the user fields a token was issued against
+
+    Changing the password, role or active flag changes the version, which
+    revokes every token issued before the change.
+    """
+    raw = f'{password_hash}|{role}|{int(bool(is_active))}'
+    return hashlib.blake2b(raw.encode(), digest_size=8).hexdigest()
+
+def user_claims(user) -> dict:
+    """Additional claims embedded in access and refresh tokens"""
+    return {
+        'role': user.role,
+        'is_active': user.is_active,
+        'ver': token_version(user.password_hash, user.role, user.is_active)
+    }
+
+def is_legacy_token(claims: dict) -> bool:
+    """True for tokens issued before role and version claims were embedded"""
+    return 'ver' not in claims
+
+def in_legacy_grace(claims: dict) -> bool:
+    """Whether a legacy token was issued less than JWT_LEGACY_TOKEN_GRACE seconds ago"""
+    grace = current_app.config.get('JWT_LEGACY_TOKEN_GRACE', 0)
+    return time.time() - claims.get('iat', 0) < grace
+
+class TokenIdentity:
+    """Authenticated principal built from JWT claims, mirroring User's role checks"""
+
+    __slots__ = ('id', 'role', 'is_active')
+
+    def __init__(self, id: int, role: str, is_active: bool):
+        self.id = id
+        self.role = role
+        self.is_active = is_active
+
+    def is_customer(self):
+        """Check if user is a customer"""
+        return self.role == 'customer'
+
+    def is_provider(self):
+        """Check if user is a provider"""
+        return self.role == 'provider'
+
+    def is_admin(self):
+        """Check if user is an admin"""
+        return self.role == 'admin'
+
+    def can_manage_scooters(self):
+        """Check if user can manage scooters"""
+        return self.role in ['admin', 'provider']
+
+def current_identity() -> TokenIdentity:
+    """Get the principal of the current request from its verified JWT"""
+    claims = get_jwt()
+    if is_legacy_token(claims):
+        # Role and status are not in the token; read them from the user
+        from app.services.auth_service import AuthService
+        user = AuthService().get_user_by_id(get_jwt_identity())
+        return TokenIdentity(get_jwt_identity(), user.role if user else None,
+                             bool(user and user.is_active))
+    return TokenIdentity(get_jwt_identity(), claims.get('role'), claims.get('is_active', False))
@@ -0,0 +1,55 @@
+"""
+Keyset (cursor) pagination on (created_at, id)
+
+Pages are ordered newest first and continue strictly after the last row of
+the previous page, so page N costs one index range scan like page 1 and rows
+inserted meanwhile never shift or duplicate results. Cursors are opaque to
+clients: url-safe base64 of "<created_at iso>|<id>".
+"""
+
+import base64
+import binascii
+from datetime import datetime
+from typing import List, Optional, Tuple
+from sqlalchemy import tuple_
+from app import db
+
+# Upper bound for ?limit= on cursor pages
+MAX_PAGE_SIZE = 500
+
+def encode_cursor(created_at: datetime, row_id: int) -> str:
+    """Build the opaque cursor pointing just past a row"""
+    raw = f'{created_at.isoformat()}|{row_id}'.encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """Parse a cursor; raises ValueError when it is malformed"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode()
+        created_at, row_id = raw.split('|')
+        return datetime.fromisoformat(created_at), int(row_id)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise ValueError('Invalid cursor')
+
+def keyset_page(query, model, limit: int = 100,
+                cursor: Optional[str] = None) -> Tuple[List, Optional[str]]:
+    """
+    Fetch one page of a query newest first
+    Works for ORM queries and Core selects (which must select created_at and id).
+    Returns: (items, next_cursor) - next_cursor is None on the last page
+    """
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+
+    if cursor:
+        created_at, row_id = decode_cursor(cursor)
+        query = query.filter(tuple_(model.created_at, model.id) < tuple_(created_at, row_id))
+
+    # One extra row tells whether another page follows
+    page = query.order_by(None).order_by(model.created_at.desc(), model.id.desc()).limit(limit + 1)
+    items = page.all() if hasattr(page, 'all') else db.session.execute(page).all()
+
+    if len(items) <= limit:
+        return items, None
+
+    last = items[limit - 1]
+    return items[:limit], encode_cursor(last.created_at, last.id)
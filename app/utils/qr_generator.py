@@ -4,19 +4,25 @@ QR Code Generator for ScooterShare Pro
 
 import qrcode
 import io
+import os
 import base64
-from flask import url_for
+import hashlib
+from flask import url_for, current_app
+from app import cache
 
-def generate_qr_code_image(qr_code_text: str, size: int = 200) -> str:
+# Rendered PNG bytes keyed by "<digest>:<size>"
+qr_cache = cache.namespace('qr')
+
+def render_qr_png(qr_code_text: str, size: int = 200) -> bytes:
     """
-    Generate QR code image and return as base64 data URL
+    Render a QR code as PNG bytes
     
     Args:
         qr_code_text: The text to encode in QR code
         size: Size of the QR code image
         
     Returns:
-        Base64 data URL for QR code image
+        PNG image bytes
     """
     # Create QR code instance
     qr = qrcode.QRCode(
@@ -36,10 +42,61 @@ def generate_qr_code_image(qr_code_text: str, size: int = 200) -> str:
     # Resize to desired size
     img = img.resize((size, size))
     
-    # Convert to base64
     buffer = io.BytesIO()
     img.save(buffer, format='PNG')
-    img_str = base64.b64encode(buffer.getvalue()).decode()
+    return buffer.getvalue()
+
+def qr_digest(qr_code_text: str) -> str:
+    """Stable short digest of a QR payload, used for cache keys, file names and URLs"""
+    return hashlib.sha256(qr_code_text.encode()).hexdigest()[:16]
+
+def _qr_cache_dir() -> str:
+    return current_app.config.get('QR_CACHE_DIR') or \
+        os.path.join(current_app.instance_path, 'qr_cache')
+
+def get_qr_png(qr_code_text: str, size: int = 200) -> bytes:
+    """
+    Get QR code PNG bytes, rendering only on a miss
+    
+    Lookups go through the in-memory cache first, then the on-disk cache
+    (QR_CACHE_DIR, shared by all workers and kept across restarts).
+    """
+    key = f'{qr_digest(qr_code_text)}:{size}'
+    
+    def load_or_render():
+        path = os.path.join(_qr_cache_dir(), f'{key.replace(":", "-")}.png')
+        try:
+            with open(path, 'rb') as f:
+                return f.read()
+        except OSError:
+            pass
+        
+        png = render_qr_png(qr_code_text, size)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f'{path}.{os.getpid()}.tmp'
+            with open(tmp_path, 'wb') as f:
+                f.write(png)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            current_app.logger.warning(f"Could not write QR cache file {path}: {e}")
+        return png
+    
+    return qr_cache.get_or_set(key, load_or_render,
+                               ttl=current_app.config.get('QR_CACHE_TTL', 86400))
+
+def generate_qr_code_image(qr_code_text: str, size: int = 200) -> str:
+    """
+    Generate QR code image and return as base64 data URL
+    
+    Args:
+        qr_code_text: The text to encode in QR code
+        size: Size of the QR code image
+        
+    Returns:
+        Base64 data URL for QR code image
+    """
+    img_str = base64.b64encode(get_qr_png(qr_code_text, size)).decode()
     
     # Return as data URL
     return f"data:image/png;base64,{img_str}"
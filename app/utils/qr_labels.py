@@ -0,0 +1,160 @@
+"""
+Bulk QR label sheets for fleet onboarding
+
+Whole sheets are rendered in a process pool: QR encoding (version fitting and
+mask selection) dominates the cost, so each worker encodes, scales and places
+a page of labels and returns it compressed. Sheets come back in order one at
+a time, so PDF output can be streamed page by page without holding the
+document in memory.
+"""
+
+import io
+import os
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterable, Iterator, List, Optional, Tuple
+import qrcode
+from PIL import Image, ImageDraw, ImageFont
+
+# A4 at 150 dpi
+PAGE_SIZE = (1240, 1754)
+PAGE_DPI = 150
+PAGE_MARGIN = 60
+CAPTION_HEIGHT = 28
+
+# Below this many labels a pool costs more than it saves
+POOL_THRESHOLD = 200
+
+def _qr_modules(qr_code_text: str) -> Image.Image:
+    """Encode a QR code as a grayscale image with one pixel per module"""
+    qr = qrcode.QRCode(error_correction=qrcode.constants.ERROR_CORRECT_M, box_size=1, border=4)
+    qr.add_data(qr_code_text)
+    qr.make(fit=True)
+    matrix = qr.get_matrix()
+    data = bytes(0 if cell else 255 for row in matrix for cell in row)
+    return Image.frombytes('L', (len(matrix), len(matrix)), data)
+
+def _render_sheet(job: Tuple[List[Tuple[str, str]], int, int]) -> bytes:
+    """
+    Render one sheet of labels (runs in a pool worker)
+
+    Returns the sheet's 8-bit grayscale pixels, zlib-compressed: small to ship
+    back to the parent and embeddable in a PDF as-is.
+    """
+    labels, columns, rows = job
+    page_width, page_height = PAGE_SIZE
+    cell_width = (page_width - 2 * PAGE_MARGIN) // columns
+    cell_height = (page_height - 2 * PAGE_MARGIN) // rows
+    qr_size = min(cell_width, cell_height - CAPTION_HEIGHT) - 10
+    try:
+        font = ImageFont.load_default(size=CAPTION_HEIGHT - 6)
+    except TypeError:  # Pillow < 10.1: fixed-size bitmap font only
+        font = ImageFont.load_default()
+
+    page = Image.new('L', PAGE_SIZE, 255)
+    draw = ImageDraw.Draw(page)
+    for slot, (qr_code_text, caption) in enumerate(labels):
+        left = PAGE_MARGIN + (slot % columns) * cell_width
+        top = PAGE_MARGIN + (slot // columns) * cell_height
+
+        qr_image = _qr_modules(qr_code_text).resize((qr_size, qr_size), Image.NEAREST)
+        page.paste(qr_image, (left + (cell_width - qr_size) // 2, top))
+
+        text_width = draw.textlength(caption, font=font)
+        draw.text((left + (cell_width - text_width) / 2, top + qr_size + 6),
+                  caption, fill=0, font=font)
+
+    return zlib.compress(page.tobytes(), 6)
+
+def iter_label_sheets(labels: Iterable[Tuple[str, str]], columns: int = 4, rows: int = 6,
+                      workers: Optional[int] = None) -> Iterator[bytes]:
+    """
+    Yield compressed A4 sheets (see _render_sheet) in order, columns x rows labels each
+
+    Sheets are rendered in a process pool of `workers` processes (defaults to
+    the CPU count); small batches are rendered inline.
+
+    Args:
+        labels: (qr_code, caption) pairs, e.g. a scooter's QR code and identifier
+        columns, rows: Label grid per sheet
+        workers: Process pool size
+    """
+    labels = [tuple(label) for label in labels]
+    per_page = columns * rows
+    jobs = [(labels[i:i + per_page], columns, rows) for i in range(0, len(labels), per_page)]
+
+    workers = workers or os.cpu_count() or 1
+    if workers <= 1 or len(labels) < POOL_THRESHOLD:
+        for job in jobs:
+            yield _render_sheet(job)
+        return
+
+    executor = ProcessPoolExecutor(max_workers=min(workers, len(jobs)))
+    try:
+        yield from executor.map(_render_sheet, jobs)
+    finally:
+        # Drop queued sheets if the consumer goes away mid-stream
+        executor.shutdown(wait=True, cancel_futures=True)
+
+def sheet_to_png(sheet: bytes) -> bytes:
+    """Encode one compressed sheet as PNG"""
+    image = Image.frombytes('L', PAGE_SIZE, zlib.decompress(sheet))
+    buffer = io.BytesIO()
+    image.save(buffer, format='PNG', dpi=(PAGE_DPI, PAGE_DPI))
+    return buffer.getvalue()
+
+def stream_pdf(sheets: Iterable[bytes]) -> Iterator[bytes]:
+    """
+    Stream sheets as a multi-page PDF, one chunk per page
+
+    Each page holds its compressed sheet as a FlateDecode grayscale image
+    scaled to A4. The page tree and cross-reference table are written at the
+    end, so nothing but the byte offsets is kept in memory.
+    """
+    offsets = {}
+    position = 0
+    page_ids = []
+
+    def emit(obj_id, body: bytes) -> bytes:
+        nonlocal position
+        offsets[obj_id] = position
+        chunk = b'%d 0 obj\n' % obj_id + body + b'\nendobj\n'
+        position += len(chunk)
+        return chunk
+
+    header = b'%PDF-1.4\n%\xe2\xe3\xcf\xd3\n'
+    position = len(header)
+    # Object 1 is the catalog, object 2 the page tree (written last)
+    chunk = header + emit(1, b'<< /Type /Catalog /Pages 2 0 R >>')
+    yield chunk
+
+    width_pt = PAGE_SIZE[0] * 72 / PAGE_DPI
+    height_pt = PAGE_SIZE[1] * 72 / PAGE_DPI
+    next_id = 3
+    for sheet in sheets:
+        page_id, image_id, content_id = next_id, next_id + 1, next_id + 2
+        next_id += 3
+        page_ids.append(page_id)
+
+        content = b'q %.2f 0 0 %.2f 0 0 cm /Im0 Do Q' % (width_pt, height_pt)
+
+        chunk = emit(page_id, b'<< /Type /Page /Parent 2 0 R /MediaBox [0 0 %.2f %.2f] '
+                              b'/Resources << /XObject << /Im0 %d 0 R >> >> /Contents %d 0 R >>'
+                     % (width_pt, height_pt, image_id, content_id))
+        chunk += emit(image_id, b'<< /Type /XObject /Subtype /Image /Width %d /Height %d '
+                                b'/ColorSpace /DeviceGray /BitsPerComponent 8 '
+                                b'/Filter /FlateDecode /Length %d >>\nstream\n'
+                      % (PAGE_SIZE[0], PAGE_SIZE[1], len(sheet)) + sheet + b'\nendstream')
+        chunk += emit(content_id, b'<< /Length %d >>\nstream\n' % len(content)
+                      + content + b'\nendstream')
+        yield chunk
+
+    kids = b' '.join(b'%d 0 R' % page_id for page_id in page_ids)
+    chunk = emit(2, b'<< /Type /Pages /Kids [%s] /Count %d >>' % (kids, len(page_ids)))
+
+    xref_position = position
+    xref = [b'xref\n0 %d\n' % next_id, b'0000000000 65535 f \n']
+    xref += [b'%010d 00000 n \n' % offsets[obj_id] for obj_id in range(1, next_id)]
+    trailer = b'trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n' % (
+        next_id, xref_position)
+    yield chunk + b''.join(xref) + trailer
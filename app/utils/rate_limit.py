@@ -0,0 +1,259 @@
+"""
+Token-bucket rate limiting for ScooterShare Pro
+
+Routes declare their policy with a decorator::
+
+    @limiter.limit('10/minute', key='ip')
+    def post(self): ...
+
+Each (route, client) pair owns a bucket holding up to ``burst`` tokens that
+refills at the policy's rate; a request takes one token or is answered with
+429 and Retry-After. Clients are keyed by JWT identity or remote address.
+
+Buckets live in a per-worker ``MemoryBucketStore`` (sharded dicts with one
+lock per shard, so concurrent requests rarely contend) or, with
+``RATELIMIT_BACKEND = 'redis'``, in a shared Redis-compatible server where a
+Lua script updates each bucket atomically. An unreachable server lets
+requests through rather than failing them; a server without scripting (such
+as ``flask cache-server``) is replaced by a per-worker store, with a warning.
+"""
+
+import functools
+import logging
+import math
+import threading
+import time
+import zlib
+from flask import current_app, g, request
+from flask_jwt_extended import get_jwt_identity
+from app.utils.cache import RedisBackend, RedisError
+
+logger = logging.getLogger(__name__)
+
+_PERIODS = {'second': 1, 'minute': 60, 'hour': 3600, 'day': 86400}
+
+def parse_rate(rate: str):
+    """Parse '10/minute' (or '10/5 minutes') into (requests, seconds)"""
+    try:
+        count, period = rate.split('/')
+        parts = period.split()
+        multiplier = int(parts[0]) if len(parts) == 2 else 1
+        seconds = _PERIODS[parts[-1].rstrip('s')] * multiplier
+        return int(count), seconds
+    except (ValueError, KeyError, IndexError):
+        raise ValueError(f'Invalid rate: {rate!r}')
+
+class MemoryBucketStore:
+    """
+    Per-worker token buckets sharded over independently locked dicts
+
+    Buckets that have refilled completely carry no state, so they are pruned
+    first when a shard reaches its share of max_keys; beyond that the least
+    recently used buckets go.
+    """
+
+    SHARDS = 16
+
+    def __init__(self, max_keys: int = 100000):
+        self._shards = [({}, threading.Lock()) for _ in range(self.SHARDS)]
+        self._max_per_shard = max(1, max_keys // self.SHARDS)
+
+    def consume(self, key: str, capacity: float, refill_rate: float, cost: float = 1):
+        """Take cost tokens; returns (allowed, tokens_left, retry_after_seconds)"""
+        buckets, lock = self._shards[zlib.crc32(key.encode()) % self.SHARDS]
+        now = time.monotonic()
+
+        with lock:
+            bucket = buckets.pop(key, None)
+            if bucket is None:
+                if len(buckets) >= self._max_per_shard:
+                    self._prune(buckets, now)
+                tokens = capacity
+            else:
+                tokens = min(capacity, bucket[0] + (now - bucket[1]) * refill_rate)
+
+            allowed = tokens >= cost
+            if allowed:
+                tokens -= cost
+
+            # (tokens, updated_at, full_at); re-inserted last, so dict order is LRU
+            buckets[key] = (tokens, now, now + (capacity - tokens) / refill_rate)
+
+        retry_after = 0.0 if allowed else (cost - tokens) / refill_rate
+        return allowed, tokens, retry_after
+
+    def _prune(self, buckets: dict, now: float):
+        for key in [key for key, bucket in buckets.items() if bucket[2] <= now]:
+            del buckets[key]
+        while len(buckets) >= self._max_per_shard:
+            del buckets[next(iter(buckets))]
+
+    def reset(self):
+        """Forget every bucket"""
+        for buckets, lock in self._shards:
+            with lock:
+                buckets.clear()
+
+# KEYS[1] bucket; ARGV: capacity, refill rate per second, cost
+_CONSUME_SCRIPT = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(bucket[1]) or capacity
+local ts = tonumber(bucket[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+local allowed = 0
+if tokens >= cost then
+  tokens = tokens - cost
+  allowed = 1
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now))
+redis.call('PEXPIRE', KEYS[1], math.ceil((capacity - tokens) / rate * 1000) + 1000)
+return {allowed, tostring(tokens)}
+"""
+
+class RedisBucketStore:
+    """Token buckets shared by all workers through a Redis-compatible server"""
+
+    def __init__(self, url: str, key_prefix: str = ''):
+        self.client = RedisBackend(url, key_prefix=key_prefix)
+        # Set when the server cannot run scripts
+        self.fallback = None
+
+    def consume(self, key: str, capacity: float, refill_rate: float, cost: float = 1):
+        """Take cost tokens; returns (allowed, tokens_left, retry_after_seconds)"""
+        if self.fallback is not None:
+            return self.fallback.consume(key, capacity, refill_rate, cost)
+
+        reply = None
+        if self.client.available:
+            try:
+                reply = self.client.execute('EVAL', _CONSUME_SCRIPT, 1, self.client.key_prefix + key,
+                                            capacity, refill_rate, cost)
+            except OSError as e:
+                self.client.mark_unavailable(e)
+            except RedisError as e:
+                if 'unknown command' in str(e).lower():
+                    logger.warning('Rate-limit server does not support EVAL; '
+                                   'falling back to per-worker buckets')
+                    self.fallback = MemoryBucketStore()
+                    return self.fallback.consume(key, capacity, refill_rate, cost)
+                logger.warning('Rate-limit script failed: %s', e)
+
+        if reply is None:
+            # Fail open: an unavailable limiter must not take the API down
+            return True, capacity, 0.0
+
+        allowed, tokens = bool(reply[0]), float(reply[1])
+        retry_after = 0.0 if allowed else (cost - tokens) / refill_rate
+        return allowed, tokens, retry_after
+
+    def reset(self):
+        """Forget every bucket"""
+        if self.fallback is not None:
+            self.fallback.reset()
+        self.client.delete_prefix('ratelimit:')
+
+def _client_ip() -> str:
+    return request.remote_addr or 'unknown'
+
+def _client_user_or_ip() -> str:
+    try:
+        identity = get_jwt_identity()
+    except RuntimeError:  # no verified JWT in this request
+        identity = None
+    return f'user:{identity}' if identity is not None else f'ip:{_client_ip()}'
+
+KEY_FUNCTIONS = {
+    'ip': lambda: f'ip:{_client_ip()}',
+    'user': _client_user_or_ip
+}
+
+class Limiter:
+    """Flask extension holding the bucket store and the route decorator"""
+
+    def __init__(self):
+        self.store = MemoryBucketStore()
+
+    def init_app(self, app):
+        """Choose the bucket store from the application config"""
+        app.config.setdefault('RATELIMIT_ENABLED', True)
+        backend = app.config.get('RATELIMIT_BACKEND', 'memory')
+
+        if backend == 'redis':
+            url = app.config.get('RATELIMIT_REDIS_URL') or app.config.get('CACHE_REDIS_URL')
+            self.store = RedisBucketStore(url, key_prefix=app.config.get('CACHE_KEY_PREFIX', ''))
+        elif backend == 'memory':
+            self.store = MemoryBucketStore(app.config.get('RATELIMIT_MAX_KEYS', 100000))
+        else:
+            raise ValueError(f'Unknown rate limit backend: {backend}')
+
+        app.after_request(self._add_headers)
+        app.extensions['limiter'] = self
+
+    def limit(self, rate: str, key='user', burst: int = None, scope: str = None,
+              methods: tuple = None):
+        """
+        Decorate a view (or Resource method) with a token-bucket policy
+
+        rate: sustained rate, e.g. '10/minute'
+        key: 'user' (JWT identity, else IP), 'ip', or a callable returning a key
+        burst: bucket size (defaults to the request count of rate)
+        scope: bucket namespace (defaults to the decorated function), share it
+               between routes that should draw from the same bucket
+        methods: only count these HTTP methods (all when None)
+        """
+        count, seconds = parse_rate(rate)
+        capacity = burst or count
+        refill_rate = count / seconds
+        key_function = key if callable(key) else KEY_FUNCTIONS[key]
+
+        def decorator(fn):
+            bucket_scope = scope or f'{fn.__module__}.{fn.__qualname__}'
+
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                if (not current_app.config['RATELIMIT_ENABLED']
+                        or (methods and request.method not in methods)):
+                    return fn(*args, **kwargs)
+
+                rejected = self._consume(bucket_scope, key_function, capacity, refill_rate)
+                if rejected:
+                    return rejected
+                return fn(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def hit(self, rate: str, key='user', burst: int = None, scope: str = 'default'):
+        """
+        Apply a policy to the current request without decorating a view
+        (e.g. in the async read service). Returns the 429 response tuple
+        when the request is rejected, else None.
+        """
+        if not current_app.config['RATELIMIT_ENABLED']:
+            return None
+
+        count, seconds = parse_rate(rate)
+        key_function = key if callable(key) else KEY_FUNCTIONS[key]
+        return self._consume(scope, key_function, burst or count, count / seconds)
+
+    def _consume(self, bucket_scope: str, key_function, capacity: float, refill_rate: float):
+        allowed, tokens, retry_after = self.store.consume(
+            f'ratelimit:{bucket_scope}:{key_function()}', capacity, refill_rate)
+        g._rate_limit = (capacity, int(tokens))
+
+        if not allowed:
+            return ({'message': 'Too many requests, please retry later'}, 429,
+                    {'Retry-After': str(max(1, math.ceil(retry_after)))})
+        return None
+
+    @staticmethod
+    def _add_headers(response):
+        limit = g.pop('_rate_limit', None)
+        if limit is not None:
+            response.headers['X-RateLimit-Limit'] = str(limit[0])
+            response.headers['X-RateLimit-Remaining'] = str(limit[1])
+        return response
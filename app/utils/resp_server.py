@@ -0,0 +1,219 @@
+"""
+Local stand-in for a Redis server
+
+Serves the subset of the Redis protocol (RESP) that ``RedisBackend`` uses
+(PING, AUTH, SELECT, GET, MGET, SET with EX/PX/NX, DEL, INCR, SCAN, DBSIZE,
+FLUSHDB) from
+an in-memory dict, so the shared cache backend can be exercised without
+installing Redis::
+
+    flask cache-server --port 6380
+    CACHE_BACKEND=redis CACHE_REDIS_URL=redis://localhost:6380/0 flask run
+
+Scripts (EVAL) are not supported: with RATELIMIT_BACKEND=redis the rate
+limiter detects this and keeps its buckets per worker (logging a warning).
+"""
+
+import re
+import socketserver
+import threading
+import time
+from typing import Optional
+
+class RespError(Exception):
+    """Error reply sent to the client"""
+
+def _glob_to_regex(pattern: str):
+    """Translate a Redis glob (*, ?, [...], backslash escapes) into a regex"""
+    parts, i = [], 0
+    while i < len(pattern):
+        ch = pattern[i]
+        if ch == '\\' and i + 1 < len(pattern):
+            i += 1
+            parts.append(re.escape(pattern[i]))
+        elif ch == '*':
+            parts.append('.*')
+        elif ch == '?':
+            parts.append('.')
+        elif ch == '[':
+            end = pattern.find(']', i + 1)
+            if end == -1:
+                parts.append(re.escape(ch))
+            else:
+                body = pattern[i + 1:end]
+                parts.append('[^' + body[1:] + ']' if body.startswith('^') else '[' + body + ']')
+                i = end
+        else:
+            parts.append(re.escape(ch))
+        i += 1
+    return re.compile(''.join(parts), re.DOTALL)
+
+class KeyStore:
+    """Thread-safe key/value store with per-key expiry"""
+
+    def __init__(self):
+        self._data = {}
+        self._lock = threading.Lock()
+
+    def _live(self, key: bytes) -> Optional[bytes]:
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at is not None and expires_at <= time.monotonic():
+            del self._data[key]
+            return None
+        return value
+
+    def execute(self, args: list):
+        """Run one command (list of bytes arguments) and return its reply"""
+        name = args[0].decode().upper()
+        handler = getattr(self, f'_cmd_{name.lower()}', None)
+        if handler is None:
+            raise RespError(f"ERR unknown command '{name}'")
+        with self._lock:
+            return handler(*args[1:])
+
+    def _cmd_ping(self, *args):
+        return args[0] if args else 'PONG'
+
+    def _cmd_auth(self, *args):
+        return 'OK'
+
+    def _cmd_select(self, index):
+        return 'OK'
+
+    def _cmd_get(self, key):
+        return self._live(key)
+
+    def _cmd_mget(self, *keys):
+        return [self._live(key) for key in keys]
+
+    def _cmd_set(self, key, value, *options):
+        expires_at, only_new = None, False
+        options = list(options)
+        while options:
+            option = options.pop(0).decode().upper()
+            if option in ('EX', 'PX'):
+                if not options:
+                    raise RespError('ERR syntax error')
+                seconds = int(options.pop(0)) / (1 if option == 'EX' else 1000)
+                expires_at = time.monotonic() + seconds
+            elif option == 'NX':
+                only_new = True
+            else:
+                raise RespError('ERR syntax error')
+
+        if only_new and self._live(key) is not None:
+            return None
+        self._data[key] = (expires_at, value)
+        return 'OK'
+
+    def _cmd_del(self, *keys):
+        deleted = 0
+        for key in keys:
+            if self._live(key) is not None:
+                del self._data[key]
+                deleted += 1
+        return deleted
+
+    def _cmd_incr(self, key):
+        entry = self._data.get(key)
+        current = self._live(key)
+        try:
+            value = int(current or 0) + 1
+        except ValueError:
+            raise RespError('ERR value is not an integer or out of range')
+        self._data[key] = (entry[0] if current is not None else None, str(value).encode())
+        return value
+
+    def _cmd_scan(self, cursor, *options):
+        # A single pass: every matching key comes back with cursor 0
+        pattern = None
+        options = list(options)
+        while options:
+            option = options.pop(0).decode().upper()
+            value = options.pop(0) if options else None
+            if option == 'MATCH' and value is not None:
+                pattern = _glob_to_regex(value.decode('latin1'))
+            elif option != 'COUNT' or value is None:
+                raise RespError('ERR syntax error')
+
+        keys = [key for key in list(self._data) if self._live(key) is not None
+                and (pattern is None or pattern.fullmatch(key.decode('latin1')))]
+        return [b'0', keys]
+
+    def _cmd_dbsize(self):
+        return sum(1 for key in list(self._data) if self._live(key) is not None)
+
+    def _cmd_flushdb(self, *args):
+        self._data.clear()
+        return 'OK'
+
+def encode_reply(reply) -> bytes:
+    """Encode a reply: str = status, bytes = bulk, int, list, None = nil, RespError"""
+    if isinstance(reply, RespError):
+        return b'-%s\r\n' % str(reply).encode()
+    if reply is None:
+        return b'$-1\r\n'
+    if isinstance(reply, int):
+        return b':%d\r\n' % reply
+    if isinstance(reply, str):
+        return b'+%s\r\n' % reply.encode()
+    if isinstance(reply, bytes):
+        return b'$%d\r\n%s\r\n' % (len(reply), reply)
+    return b'*%d\r\n' % len(reply) + b''.join(encode_reply(item) for item in reply)
+
+def read_command(reader) -> Optional[list]:
+    """Read one RESP array of bulk strings; None when the client disconnected"""
+    line = reader.readline()
+    if not line:
+        return None
+    if not line.startswith(b'*'):
+        # Inline command (e.g. typed in telnet)
+        return line.split() or []
+
+    args = []
+    for _ in range(int(line[1:-2])):
+        header = reader.readline()
+        if not header.startswith(b'$'):
+            raise RespError('ERR Protocol error: expected bulk string')
+        length = int(header[1:-2])
+        args.append(reader.read(length + 2)[:-2])
+    return args
+
+class _Handler(socketserver.StreamRequestHandler):
+    def handle(self):
+        while True:
+            try:
+                args = read_command(self.rfile)
+                if args is None:
+                    return
+                if not args:
+                    continue
+                reply = self.server.store.execute(args)
+            except RespError as e:
+                reply = e
+            except (ValueError, IndexError):
+                reply = RespError('ERR syntax error')
+            self.wfile.write(encode_reply(reply))
+
+class LocalRedisServer(socketserver.ThreadingTCPServer):
+    """Threaded TCP server answering RESP commands from a KeyStore"""
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 6380):
+        super().__init__((host, port), _Handler)
+        self.store = KeyStore()
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f'redis://{host}:{port}/0'
+
+    def start(self) -> 'LocalRedisServer':
+        """Serve from a daemon thread (port 0 picks a free port; see url)"""
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
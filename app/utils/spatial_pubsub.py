@@ -0,0 +1,184 @@
+"""
+In-process publish/subscribe keyed by spatial grid cells
+
+The map is divided into CELL_SIZE-degree cells. A subscription covers the
+cells under its bounding box, and an event at a point is delivered only to
+subscriptions registered on that point's cell (and, for moves, the cell it
+left) whose box actually contains one of the points.
+
+Publishing encodes the event once and appends the same bytes to each
+matching subscriber's bounded queue. Cell membership is stored as immutable
+sets that subscribe/unsubscribe replace under a lock, so publishers read
+them without locking. Slow subscribers lose their oldest events and are
+flagged as lagged, so the stream can tell the client to resync.
+
+Subscribers wait either by blocking a thread (``wait``; one thread per open
+stream, so a sync worker serves at most as many streams as it has threads) or
+on an asyncio event loop (``wait_async``; no thread held, used by the ASGI
+service). Publishers run in any thread and wake both kinds.
+
+Events only reach subscribers in the same worker process.
+"""
+
+import asyncio
+import math
+import threading
+from collections import deque
+from typing import Iterable, Optional, Tuple
+
+# Grid cell size in degrees (~1.1 km of latitude)
+CELL_SIZE = 0.01
+
+# Largest bounding box a subscription may cover, in cells
+MAX_CELLS = 2500
+
+# Events buffered per subscriber before the oldest are dropped
+QUEUE_SIZE = 1000
+
+_EMPTY = frozenset()
+
+def cell_of(latitude: float, longitude: float) -> Tuple[int, int]:
+    """Grid cell containing a point"""
+    return math.floor(latitude / CELL_SIZE), math.floor(longitude / CELL_SIZE)
+
+def parse_bbox(value: str) -> Tuple[float, float, float, float]:
+    """
+    Parse "min_lon,min_lat,max_lon,max_lat" (west,south,east,north)
+    Raises ValueError when malformed, inverted, or larger than MAX_CELLS.
+    """
+    try:
+        min_lon, min_lat, max_lon, max_lat = (float(part) for part in value.split(','))
+    except (AttributeError, ValueError):
+        raise ValueError('bbox must be min_lon,min_lat,max_lon,max_lat')
+
+    if not (-90 <= min_lat <= max_lat <= 90 and -180 <= min_lon <= max_lon <= 180):
+        raise ValueError('bbox is out of range or inverted')
+
+    low, high = cell_of(min_lat, min_lon), cell_of(max_lat, max_lon)
+    if (high[0] - low[0] + 1) * (high[1] - low[1] + 1) > MAX_CELLS:
+        raise ValueError('bbox is too large')
+
+    return min_lon, min_lat, max_lon, max_lat
+
+class Subscription:
+    """One subscriber's bounding box and pending events"""
+
+    __slots__ = ('hub', 'bbox', 'cells', 'queue', 'ready', 'lagged', 'waker')
+
+    def __init__(self, hub: 'SpatialHub', bbox: Tuple[float, float, float, float]):
+        self.hub = hub
+        self.bbox = bbox
+        min_lon, min_lat, max_lon, max_lat = bbox
+        low, high = cell_of(min_lat, min_lon), cell_of(max_lat, max_lon)
+        self.cells = [(row, col) for row in range(low[0], high[0] + 1)
+                      for col in range(low[1], high[1] + 1)]
+        self.queue = deque(maxlen=QUEUE_SIZE)
+        self.ready = threading.Event()
+        self.lagged = False
+        # (loop, asyncio.Event) of an async subscriber, set by wait_async
+        self.waker = None
+
+    def contains(self, latitude: float, longitude: float) -> bool:
+        """Check whether a point lies in the bounding box"""
+        min_lon, min_lat, max_lon, max_lat = self.bbox
+        return min_lat <= latitude <= max_lat and min_lon <= longitude <= max_lon
+
+    def wait(self, timeout: float) -> list:
+        """Block up to timeout seconds for events; returns those pending (maybe none)"""
+        self.ready.wait(timeout)
+        return self._drain()
+
+    async def wait_async(self, timeout: float) -> list:
+        """Like wait(), but awaits on the running event loop instead of blocking a thread"""
+        if self.waker is None:
+            self.waker = (asyncio.get_running_loop(), asyncio.Event())
+        event = self.waker[1]
+
+        if not self.ready.is_set():
+            try:
+                await asyncio.wait_for(event.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+        event.clear()
+        return self._drain()
+
+    def _drain(self) -> list:
+        # Clear before draining, so an event published meanwhile sets it again
+        self.ready.clear()
+        events = []
+        while self.queue:
+            events.append(self.queue.popleft())
+        return events
+
+    def notify(self):
+        """Wake the subscriber (from any thread)"""
+        if self.ready.is_set():
+            return
+        self.ready.set()
+        if self.waker is not None:
+            loop, event = self.waker
+            try:
+                loop.call_soon_threadsafe(event.set)
+            except RuntimeError:  # loop closed; the subscriber is gone
+                pass
+
+    def close(self):
+        """Stop receiving events"""
+        self.hub.unsubscribe(self)
+
+class SpatialHub:
+    """Fan events out to the subscriptions whose box contains them"""
+
+    def __init__(self):
+        self._cells = {}
+        self._lock = threading.Lock()
+
+    def subscribe(self, bbox: Tuple[float, float, float, float]) -> Subscription:
+        """Register a subscription for a (min_lon, min_lat, max_lon, max_lat) box"""
+        subscription = Subscription(self, bbox)
+        with self._lock:
+            for cell in subscription.cells:
+                self._cells[cell] = self._cells.get(cell, _EMPTY) | {subscription}
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        """Remove a subscription from all its cells"""
+        with self._lock:
+            for cell in subscription.cells:
+                members = self._cells.get(cell, _EMPTY) - {subscription}
+                if members:
+                    self._cells[cell] = members
+                else:
+                    self._cells.pop(cell, None)
+
+    def publish(self, frame: bytes, points: Iterable[Optional[Tuple[float, float]]]) -> int:
+        """
+        Deliver an encoded event to subscribers covering any of the points
+        Pass the old and new position for moves. Returns the number of
+        subscribers reached.
+        """
+        points = [point for point in points if point is not None]
+        cells = {cell_of(*point) for point in points}
+
+        if len(cells) == 1:
+            candidates = self._cells.get(cells.pop(), _EMPTY)
+        else:
+            candidates = frozenset().union(*(self._cells.get(cell, _EMPTY) for cell in cells))
+
+        delivered = 0
+        for subscription in candidates:
+            if any(subscription.contains(*point) for point in points):
+                if len(subscription.queue) == QUEUE_SIZE:
+                    subscription.lagged = True
+                subscription.queue.append(frame)
+                subscription.notify()
+                delivered += 1
+        return delivered
+
+    def has_subscribers(self) -> bool:
+        """Cheap check publishers use to skip building events nobody receives"""
+        return bool(self._cells)
+
+    def subscriber_count(self) -> int:
+        """Number of distinct live subscriptions"""
+        return len(set().union(*self._cells.values())) if self._cells else 0
@@ -0,0 +1,151 @@
+"""
+Status histograms with an in-process counter cache
+
+Unfiltered per-status counts are loaded once with a single ``GROUP BY status``
+query and then kept current by applying the status transitions of every
+committed session. Changes the ORM cannot see (bulk ``INSERT``/``UPDATE``/
+``DELETE`` statements, other worker processes) are covered by invalidation and a
+short TTL (STATUS_COUNTS_TTL), so another worker's counts lag by at most that long.
+Read counts with ``.get(status, 0)``.
+"""
+
+import threading
+import time
+from flask import current_app
+from sqlalchemy import event, func, inspect, select
+from app import db
+
+class StatusCounter:
+    """Thread-safe cached status -> count mapping for one model"""
+
+    def __init__(self, model, ttl: float = 30):
+        self.model = model
+        self.ttl = ttl
+        self._counts = None
+        self._loaded_at = 0.0
+        self._version = 0
+        self._lock = threading.Lock()
+
+    def get(self, loader, ttl: float = None) -> dict:
+        """Get the cached counts, reloading them through loader when stale"""
+        ttl = self.ttl if ttl is None else ttl
+        with self._lock:
+            if self._counts is not None and time.monotonic() - self._loaded_at < ttl:
+                return dict(self._counts)
+            version = self._version
+
+        counts = loader()
+
+        with self._lock:
+            # Only cache the result if no transition was applied while loading
+            if version == self._version:
+                self._counts = dict(counts)
+                self._loaded_at = time.monotonic()
+
+        return counts
+
+    def apply(self, deltas: dict):
+        """Adjust the cached counts by committed status deltas"""
+        with self._lock:
+            self._version += 1
+            if self._counts is None:
+                return
+
+            for status, delta in deltas.items():
+                self._counts[status] = self._counts.get(status, 0) + delta
+                if self._counts[status] < 0:
+                    # Out of sync with the database; reload on next read
+                    self._counts = None
+                    return
+
+    def invalidate(self):
+        """Drop the cached counts"""
+        with self._lock:
+            self._version += 1
+            self._counts = None
+
+_counters = {}
+
+def status_counter(model) -> StatusCounter:
+    """Get the counter registered for a model (see track_status_changes)"""
+    return _counters[model]
+
+def status_histogram(model, *criteria) -> dict:
+    """Count rows per status in one GROUP BY query; every status is present"""
+    stmt = select(model.status, func.count()).group_by(model.status)
+    if criteria:
+        stmt = stmt.where(*criteria)
+
+    counts = dict.fromkeys(model.__table__.c.status.type.enums, 0)
+    counts.update(db.session.execute(stmt).all())
+    return counts
+
+def cached_status_histogram(model) -> dict:
+    """Unfiltered status histogram served from the counter cache"""
+    return status_counter(model).get(lambda: status_histogram(model),
+                                     ttl=current_app.config.get('STATUS_COUNTS_TTL'))
+
+def track_status_changes(model, ttl: float = 30):
+    """Register a counter for model and keep it current from session events"""
+    _counters[model] = StatusCounter(model, ttl=ttl)
+
+def _pending_deltas(session) -> dict:
+    return session.info.setdefault('status_deltas', {})
+
+def _add_delta(session, model, status, delta):
+    deltas = _pending_deltas(session).setdefault(model, {})
+    deltas[status] = deltas.get(status, 0) + delta
+
+@event.listens_for(db.session, 'after_flush')
+def _collect_status_deltas(session, flush_context):
+    """Record status transitions of flushed objects until commit"""
+    for obj in session.new:
+        if type(obj) in _counters:
+            _add_delta(session, type(obj), obj.status, 1)
+
+    for obj in session.deleted:
+        if type(obj) in _counters:
+            history = inspect(obj).attrs.status.history
+            old_status = history.deleted[0] if history.deleted else obj.status
+            _add_delta(session, type(obj), old_status, -1)
+
+    for obj in session.dirty:
+        if type(obj) not in _counters:
+            continue
+
+        history = inspect(obj).attrs.status.history
+        if not history.added:
+            continue
+        if not history.deleted:
+            # Previous value was never loaded; the delta cannot be computed
+            _pending_deltas(session).setdefault('invalidate', set()).add(type(obj))
+            continue
+
+        _add_delta(session, type(obj), history.deleted[0], -1)
+        _add_delta(session, type(obj), history.added[0], 1)
+
+@event.listens_for(db.session, 'after_commit')
+def _apply_status_deltas(session):
+    deltas = session.info.pop('status_deltas', {})
+    for model in deltas.pop('invalidate', ()):
+        _counters[model].invalidate()
+        deltas.pop(model, None)
+
+    for model, changes in deltas.items():
+        _counters[model].apply(changes)
+
+@event.listens_for(db.session, 'after_rollback')
+def _discard_status_deltas(session):
+    session.info.pop('status_deltas', None)
+
+@event.listens_for(db.session, 'do_orm_execute')
+def _invalidate_on_bulk_change(orm_execute_state):
+    """Bulk INSERT/UPDATE/DELETE statements bypass flush; reload affected counters"""
+    if not (orm_execute_state.is_insert or orm_execute_state.is_update
+            or orm_execute_state.is_delete):
+        return
+
+    mapper = orm_execute_state.bind_mapper
+    if mapper is not None and mapper.class_ in _counters:
+        _pending_deltas(orm_execute_state.session).setdefault('invalidate', set()).add(
+            mapper.class_)
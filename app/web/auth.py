@@ -4,6 +4,7 @@ Web authentication routes
 
 from flask import render_template, redirect, url_for, flash, request
 from flask_login import login_user, logout_user, login_required, current_user
+from app import limiter
 from app.web import bp
 from app.services.auth_service import AuthService
 
@@ -17,6 +18,7 @@ def index():
     return render_template('index.html')
 
 @bp.route('/login', methods=['GET', 'POST'])
+@limiter.limit('10/minute', key='ip', scope='login', methods=('POST',))
 def login():
     """Login page"""
     if current_user.is_authenticated:
@@ -41,6 +43,7 @@ def login():
     return render_template('auth/login.html')
 
 @bp.route('/register', methods=['GET', 'POST'])
+@limiter.limit('5/minute', key='ip', scope='register', methods=('POST',))
 def register():
     """Registration page"""
     if current_user.is_authenticated:
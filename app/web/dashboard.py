@@ -2,15 +2,51 @@
 Dashboard routes
 """
 
-from flask import render_template
+from flask import render_template, current_app
 from flask_login import login_required, current_user
+from markupsafe import Markup
 from app.web import bp
 from app.services.scooter_service import ScooterService
 from app.services.rental_service import RentalService
+from app.signals import rental_started, rental_ended, rental_cancelled, scooter_status_changed
+from app import cache
 
 scooter_service = ScooterService()
 rental_service = RentalService()
 
+# Rendered dashboard sections keyed by section in a namespace per scope:
+# "admin" (shared by all admins), "provider:<id>" or "customer:<id>"
+dashboard_cache = cache.namespace('dashboard')
+
+def cached_fragment(scope, section, template, context_factory):
+    """Render a dashboard section, reusing the cached HTML when available"""
+    scope_cache = dashboard_cache.namespace(scope)
+    html = scope_cache.get(section)
+
+    if html is None:
+        html = render_template(template, **context_factory())
+        scope_cache.set(section, html, ttl=current_app.config.get('DASHBOARD_CACHE_TTL', 60))
+
+    return Markup(html)
+
+def invalidate_dashboards(*scopes):
+    """Drop all cached sections for the given scopes"""
+    for scope in scopes:
+        dashboard_cache.namespace(scope).clear()
+
+@rental_started.connect
+@rental_ended.connect
+@rental_cancelled.connect
+def _on_rental_changed(rental, **extra):
+    """Rental state changes affect admin, scooter provider and rider dashboards"""
+    invalidate_dashboards('admin', f'provider:{rental.scooter.provider_id}',
+                          f'customer:{rental.user_id}')
+
+@scooter_status_changed.connect
+def _on_scooter_status_changed(scooter, **extra):
+    """Scooter status changes affect admin and provider dashboards"""
+    invalidate_dashboards('admin', f'provider:{scooter.provider_id}')
+
 @bp.route('/dashboard')
 @login_required
 def dashboard():
@@ -24,55 +60,58 @@ def dashboard():
 
 def admin_dashboard():
     """Admin dashboard"""
-    rental_stats = rental_service.get_rental_statistics()
-    active_rentals = rental_service.get_active_rentals(limit=10)
-    recent_rentals = rental_service.rental_repo.get_recent_rentals(days=7, limit=10)
-    
-    scooters = scooter_service.get_all_scooters(limit=10)
-    available_count = scooter_service.scooter_repo.count_by_status('available')
-    in_use_count = scooter_service.scooter_repo.count_by_status('in_use')
-    maintenance_count = scooter_service.scooter_repo.count_by_status('maintenance')
-    
-    return render_template('dashboard/admin.html',
-                         rental_stats=rental_stats,
-                         active_rentals=active_rentals,
-                         recent_rentals=recent_rentals,
-                         scooters=scooters,
-                         available_count=available_count,
-                         in_use_count=in_use_count,
-                         maintenance_count=maintenance_count)
+    def fleet_context():
+        counts = scooter_service.scooter_repo.get_status_counts()
+        return {
+            'available_count': counts.get('available', 0),
+            'in_use_count': counts.get('in_use', 0),
+            'maintenance_count': counts.get('maintenance', 0)
+        }
 
-def provider_dashboard():
-    """Provider dashboard"""
-    scooters = scooter_service.get_scooters_by_provider(current_user.id, limit=100)
-    
-    # Get all rentals for provider's scooters
-    all_rentals = rental_service.get_provider_rentals(current_user.id, limit=1000)
-    
+    def rental_lists_context():
+        return {
+            'active_rentals': rental_service.get_active_rentals(limit=10),
+            'recent_rentals': rental_service.rental_repo.get_recent_rentals(days=7, limit=10)
+        }
+
+    return render_template(
+        'dashboard/admin.html',
+        fleet_summary=cached_fragment('admin', 'fleet', 'dashboard/_admin_fleet.html',
+                                      fleet_context),
+        rental_summary=cached_fragment('admin', 'rental_stats',
+                                       'dashboard/_admin_rental_stats.html',
+                                       lambda: {'rental_stats': rental_service.get_rental_statistics()}),
+        rental_lists=cached_fragment('admin', 'rentals', 'dashboard/_admin_rentals.html',
+                                     rental_lists_context),
+        scooter_table=cached_fragment('admin', 'scooters', 'dashboard/_admin_scooters.html',
+                                      lambda: {'scooters': scooter_service.get_all_scooters(limit=10)})
+    )
+
+def provider_statistics(scooters, all_rentals):
+    """Calculate provider dashboard statistics"""
     # Calculate statistics correctly
     total_scooters = len(scooters)
     available = len([s for s in scooters if s.status == 'available'])
     in_use = len([s for s in scooters if s.status == 'in_use'])
     maintenance = len([s for s in scooters if s.status == 'maintenance'])
-    
+
     # Calculate total revenue from rentals (same method as rentals page)
     total_revenue = sum(rental.total_cost for rental in all_rentals if rental.status == 'completed')
-    
+
     # Calculate utilization rate based on actual rental time
     if all_rentals:
         # Get date range of rentals
-        from datetime import datetime
         completed_rentals = [r for r in all_rentals if r.status == 'completed' and r.duration_minutes]
-        
+
         if completed_rentals:
             # Calculate utilization based on actual rental periods
             total_minutes_used = sum(r.duration_minutes for r in completed_rentals)
-            
+
             # Get the time span from first to last rental
             first_rental = min(completed_rentals, key=lambda r: r.created_at)
             last_rental = max(completed_rentals, key=lambda r: r.created_at)
             days_active = (last_rental.created_at - first_rental.created_at).days + 1
-            
+
             # Calculate utilization over the active period
             total_possible_minutes = total_scooters * days_active * 24 * 60
             avg_utilization = (total_minutes_used / total_possible_minutes) * 100 if total_possible_minutes > 0 else 0
@@ -80,8 +119,8 @@ def provider_dashboard():
             avg_utilization = 0
     else:
         avg_utilization = 0
-    
-    stats = {
+
+    return {
         'total_scooters': total_scooters,
         'available': available,
         'in_use': in_use,
@@ -89,24 +128,52 @@ def provider_dashboard():
         'total_revenue': total_revenue,
         'average_utilization': avg_utilization
     }
-    
-    recent_rentals = sorted(all_rentals, key=lambda r: r.created_at, reverse=True)[:10]
-    
-    return render_template('dashboard/provider.html',
-                         scooters=scooters,
-                         stats=stats,
-                         recent_rentals=recent_rentals)
+
+def provider_dashboard():
+    """Provider dashboard"""
+    provider_id = current_user.id
+    scope = f'provider:{provider_id}'
+    loaded = {}
+
+    def load():
+        # Scooters and rentals are shared by both sections; load them once per miss
+        if not loaded:
+            loaded['scooters'] = scooter_service.get_scooters_by_provider(provider_id, limit=100)
+            loaded['rentals'] = rental_service.get_provider_rentals(provider_id, limit=1000)
+        return loaded['scooters'], loaded['rentals']
+
+    def stats_context():
+        scooters, all_rentals = load()
+        return {'stats': provider_statistics(scooters, all_rentals)}
+
+    def lists_context():
+        scooters, all_rentals = load()
+        recent_rentals = sorted(all_rentals, key=lambda r: r.created_at, reverse=True)[:10]
+        return {'scooters': scooters, 'recent_rentals': recent_rentals}
+
+    return render_template(
+        'dashboard/provider.html',
+        provider_summary=cached_fragment(scope, 'stats', 'dashboard/_provider_stats.html',
+                                         stats_context),
+        provider_lists=cached_fragment(scope, 'lists', 'dashboard/_provider_lists.html',
+                                       lists_context)
+    )
 
 def customer_dashboard():
     """Customer dashboard"""
+    scope = f'customer:{current_user.id}'
+
+    # The active rental shows a live duration and cost, so it is never cached
     active_rental = rental_service.get_active_rental_for_user(current_user.id)
-    rental_history = rental_service.get_user_rentals(current_user.id, limit=10)
-    user_stats = rental_service.get_user_rental_statistics(current_user.id)
-    
-    nearby_scooters = []
-    
-    return render_template('dashboard/customer.html',
-                         active_rental=active_rental,
-                         rental_history=rental_history,
-                         user_stats=user_stats,
-                         nearby_scooters=nearby_scooters)
+
+    return render_template(
+        'dashboard/customer.html',
+        active_rental=active_rental,
+        customer_summary=cached_fragment(
+            scope, 'stats', 'dashboard/_customer_stats.html',
+            lambda: {'user_stats': rental_service.get_user_rental_statistics(current_user.id)}),
+        customer_lists=cached_fragment(
+            scope, 'lists', 'dashboard/_customer_lists.html',
+            lambda: {'rental_history': rental_service.get_user_rentals(current_user.id, limit=10),
+                     'nearby_scooters': []})
+    )
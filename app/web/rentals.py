@@ -16,19 +16,21 @@ scooter_service = ScooterService()
 def rentals_list():
     """List rentals - providers see their scooter rentals, customers see their own rentals"""
     page = request.args.get('page', 1, type=int)
+    cursor = request.args.get('cursor')
     per_page = 20
     
-    if current_user.is_admin():
-        rentals = rental_service.get_all_rentals(limit=per_page, offset=(page-1)*per_page)
-        return render_template('rentals/list.html', rentals=rentals, page=page)
-    elif current_user.is_provider():
+    if current_user.is_provider():
         # Providers see rentals of their scooters
         rentals = rental_service.get_provider_rentals(current_user.id, limit=per_page)
         return render_template('rentals/provider_list.html', rentals=rentals, page=page)
-    else:
-        # Customers see their own rentals
-        rentals = rental_service.get_user_rentals(current_user.id, limit=per_page)
-        return render_template('rentals/list.html', rentals=rentals, page=page)
+    
+    # Admins page through all rentals, customers through their own
+    user_id = None if current_user.is_admin() else current_user.id
+    try:
+        rentals, next_cursor = rental_service.get_rentals_page(per_page, cursor, user_id=user_id)
+    except ValueError:
+        return redirect(url_for('web.rentals_list'))
+    return render_template('rentals/list.html', rentals=rentals, page=page, next_cursor=next_cursor)
 
 @bp.route('/rentals/<int:rental_id>')
 @login_required
@@ -2,11 +2,12 @@
 Scooter management routes
 """
 
-from flask import render_template, redirect, url_for, flash, request
+from flask import render_template, redirect, url_for, flash, request, abort, make_response
 from flask_login import login_required, current_user
 from app.web import bp
 from app.services.scooter_service import ScooterService
-from app.utils.qr_generator import generate_qr_code_image
+from app.utils.qr_generator import get_qr_png, qr_digest
+from app.utils.http_cache import is_not_modified
 
 scooter_service = ScooterService()
 
@@ -15,13 +16,18 @@ scooter_service = ScooterService()
 def scooters_list():
     """List scooters - providers see their own, customers see available ones"""
     page = request.args.get('page', 1, type=int)
+    cursor = request.args.get('cursor')
     per_page = 20
-    offset = (page - 1) * per_page
     
     if current_user.is_provider() or current_user.is_admin():
         # Providers and admins see their own scooters for management
-        scooters = scooter_service.get_scooters_by_provider(current_user.id, limit=per_page)
-        return render_template('scooters/manage.html', scooters=scooters, page=page)
+        try:
+            scooters, next_cursor = scooter_service.get_scooters_page(
+                per_page, cursor, provider_id=current_user.id)
+        except ValueError:
+            return redirect(url_for('web.scooters_list'))
+        return render_template('scooters/manage.html', scooters=scooters, page=page,
+                               next_cursor=next_cursor)
     else:
         # Customers see available scooters for rental
         scooters = scooter_service.get_available_scooters(limit=per_page)
@@ -46,10 +52,36 @@ def scooter_detail(scooter_id):
     
     stats = scooter_service.get_scooter_statistics(scooter)
     
-    # Generate QR code image
-    qr_code_image = generate_qr_code_image(scooter.qr_code)
+    # The image is served by scooter_qr_png; the digest makes the URL change with the QR code
+    qr_code_url = url_for('web.scooter_qr_png', scooter_id=scooter.id, v=qr_digest(scooter.qr_code))
     
-    return render_template('scooters/detail.html', scooter=scooter, stats=stats, qr_code_image=qr_code_image)
+    return render_template('scooters/detail.html', scooter=scooter, stats=stats, qr_code_url=qr_code_url)
+
+@bp.route('/scooters/<int:scooter_id>/qr.png')
+@login_required
+def scooter_qr_png(scooter_id):
+    """Scooter QR code as a cached PNG image"""
+    scooter = scooter_service.get_scooter_by_id(scooter_id)
+    
+    if not scooter or not scooter.qr_code:
+        abort(404)
+    
+    etag = qr_digest(scooter.qr_code)
+    # Versioned URLs (?v=<digest>) never change content, so browsers may keep them for a year
+    if request.args.get('v') == etag:
+        cache_control = 'private, max-age=31536000, immutable'
+    else:
+        cache_control = 'private, max-age=3600'
+    
+    if is_not_modified(etag):
+        response = make_response('', 304)
+    else:
+        response = make_response(get_qr_png(scooter.qr_code))
+        response.mimetype = 'image/png'
+    
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = cache_control
+    return response
 
 @bp.route('/scooters/create', methods=['GET', 'POST'])
 @login_required
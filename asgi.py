@@ -0,0 +1,10 @@
+#!/usr/bin/env python3
+"""
+Scooter Share Pro - ASGI entry point
+Serves the async read endpoints and the Flask application (see app.aio)
+"""
+
+from app.aio import create_asgi_app
+from run import app as flask_app
+
+app = create_asgi_app(flask_app)
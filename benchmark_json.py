@@ -0,0 +1,75 @@
+"""
+Benchmark JSON encoding of a 1,000-item scooter list
+Compares Flask-RESTX's stdlib encoder with app.utils.fast_json (orjson when
+installed), both for the encoding step alone and for a full GET /api/scooters/.
+Runs against a throwaway in-memory database: python benchmark_json.py
+"""
+
+import os
+import sys
+import json
+import timeit
+
+# Add the app directory to Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from flask_jwt_extended import create_access_token
+from flask_restx.representations import output_json as restx_output_json
+from app import create_app, db
+from app.api import api
+from app.models import User, Scooter
+from app.repositories.scooter_repository import ScooterRepository
+from app.utils import fast_json
+from app.utils.jwt_claims import user_claims
+
+ITEMS = 1000
+ROUNDS = 20
+
+def seed():
+    """Create a provider with ITEMS scooters and return an access token"""
+    provider = User('bench@example.com', 'password123', 'Bench', 'Provider', role='admin')
+    db.session.add(provider)
+    db.session.flush()
+
+    for i in range(ITEMS):
+        db.session.add(Scooter(f'BENCH{i:05d}', 'Model X', 'Brand', 47.0 + i * 1e-4,
+                               8.5 + i * 1e-4, provider.id))
+    db.session.commit()
+
+    return create_access_token(identity=provider.id, additional_claims=user_claims(provider))
+
+def best_ms(fn) -> float:
+    """Best-of-ROUNDS wall time in milliseconds"""
+    return min(timeit.repeat(fn, number=1, repeat=ROUNDS)) * 1000
+
+def run_benchmark():
+    """Print encode-only and end-to-end timings for both encoders"""
+    app = create_app('testing')
+
+    with app.app_context():
+        db.create_all()
+        token = seed()
+        client = app.test_client()
+        headers = {'Authorization': f'Bearer {token}'}
+        url = f'/api/scooters/?limit={ITEMS}'
+
+        payload = [s.to_dict() for s in ScooterRepository.get_views(ITEMS)]
+        stdlib_ms = best_ms(lambda: json.dumps(payload))
+        fast_ms = best_ms(lambda: fast_json.dumps(payload))
+
+        print(f'Encoding {ITEMS} scooters')
+        print(f'  stdlib json:            {stdlib_ms:7.2f} ms')
+        print(f'  fast_json ({fast_json.BACKEND:6}):     {fast_ms:7.2f} ms  ({stdlib_ms / fast_ms:.1f}x)')
+
+        api.representations['application/json'] = restx_output_json
+        stdlib_request_ms = best_ms(lambda: client.get(url, headers=headers))
+        api.representations['application/json'] = fast_json.output_json
+        fast_request_ms = best_ms(lambda: client.get(url, headers=headers))
+
+        print(f'GET {url}')
+        print(f'  RESTX representation:   {stdlib_request_ms:7.2f} ms')
+        print(f'  fast_json:              {fast_request_ms:7.2f} ms  '
+              f'({stdlib_request_ms / fast_request_ms:.1f}x)')
+
+if __name__ == '__main__':
+    run_benchmark()
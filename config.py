@@ -22,7 +22,53 @@ class Config:
     
     # Application settings
     MAX_RENTAL_TIME_HOURS = int(os.environ.get('MAX_RENTAL_TIME_HOURS') or 24)
+    API_BATCH_MAX_REQUESTS = int(os.environ.get('API_BATCH_MAX_REQUESTS') or 20)
     QR_CODE_EXPIRY_MINUTES = int(os.environ.get('QR_CODE_EXPIRY_MINUTES') or 5)
+    
+    # Caching (backend: memory or redis; TTLs in seconds)
+    CACHE_BACKEND = os.environ.get('CACHE_BACKEND') or 'memory'
+    CACHE_REDIS_URL = os.environ.get('CACHE_REDIS_URL') or 'redis://localhost:6379/0'
+    CACHE_KEY_PREFIX = os.environ.get('CACHE_KEY_PREFIX') or 'ssp:'
+    CACHE_MAX_ENTRIES = int(os.environ.get('CACHE_MAX_ENTRIES') or 10000)
+    CACHE_DEFAULT_TTL = int(os.environ.get('CACHE_DEFAULT_TTL') or 300)
+    SCOOTER_CACHE_TTL = int(os.environ.get('SCOOTER_CACHE_TTL') or 10)
+    STATISTICS_CACHE_TTL = int(os.environ.get('STATISTICS_CACHE_TTL') or 60)
+    DASHBOARD_CACHE_TTL = int(os.environ.get('DASHBOARD_CACHE_TTL') or 60)
+    QR_CACHE_TTL = int(os.environ.get('QR_CACHE_TTL') or 86400)
+    QR_CACHE_DIR = os.environ.get('QR_CACHE_DIR')  # defaults to <instance>/qr_cache
+    QR_LABEL_WORKERS = int(os.environ.get('QR_LABEL_WORKERS') or 0)  # 0 = one per CPU
+    STATUS_COUNTS_TTL = int(os.environ.get('STATUS_COUNTS_TTL') or 30)  # bounds staleness across workers
+    SCOOTER_STREAM_KEEPALIVE = int(os.environ.get('SCOOTER_STREAM_KEEPALIVE') or 15)
+    SCOOTER_CHANGES_SETTLE_SECONDS = int(os.environ.get('SCOOTER_CHANGES_SETTLE_SECONDS') or 2)
+    SCOOTER_IMPORT_BATCH_SIZE = int(os.environ.get('SCOOTER_IMPORT_BATCH_SIZE') or 1000)
+    JWT_VERSION_CACHE_TTL = int(os.environ.get('JWT_VERSION_CACHE_TTL') or 30)
+    # Tokens issued before role/version claims stay valid this long after issue (0 = none)
+    JWT_LEGACY_TOKEN_GRACE = int(os.environ.get('JWT_LEGACY_TOKEN_GRACE') or 30 * 24 * 3600)
+    USER_CACHE_TTL = int(os.environ.get('USER_CACHE_TTL') or 60)
+    
+    # Response compression (gzip, brotli when installed; sizes in bytes)
+    COMPRESS_ENABLED = os.environ.get('COMPRESS_ENABLED', 'true').lower() in ['true', 'on', '1']
+    COMPRESS_MIN_SIZE = int(os.environ.get('COMPRESS_MIN_SIZE') or 500)
+    COMPRESS_LEVEL = int(os.environ.get('COMPRESS_LEVEL') or 6)
+    COMPRESS_BROTLI_QUALITY = int(os.environ.get('COMPRESS_BROTLI_QUALITY') or 4)
+    COMPRESS_MIMETYPES = (os.environ.get('COMPRESS_MIMETYPES') or
+                          'application/json,application/javascript,text/javascript,text/css,'
+                          'text/html,text/plain,text/csv,image/svg+xml').split(',')
+    
+    # Rate limiting (backend: memory = per worker, redis = shared; policies are per route)
+    RATELIMIT_ENABLED = os.environ.get('RATELIMIT_ENABLED', 'true').lower() in ['true', 'on', '1']
+    RATELIMIT_BACKEND = os.environ.get('RATELIMIT_BACKEND') or 'memory'
+    RATELIMIT_REDIS_URL = os.environ.get('RATELIMIT_REDIS_URL')  # defaults to CACHE_REDIS_URL
+    
+    # Reverse proxies in front of the app whose X-Forwarded-For/-Proto/-Host are trusted (0 = none)
+    PROXY_FIX_HOPS = int(os.environ.get('PROXY_FIX_HOPS') or 0)
+    
+    # Async read service (asgi.py); the database URL defaults to DATABASE_URL with an asyncio driver
+    ASYNC_DATABASE_URL = os.environ.get('ASYNC_DATABASE_URL')
+    ASYNC_WSGI_THREADS = int(os.environ.get('ASYNC_WSGI_THREADS') or 40)
+    RENTAL_STATUS_MAX_WAIT = int(os.environ.get('RENTAL_STATUS_MAX_WAIT') or 60)
+    RENTAL_STATUS_POLL_INTERVAL = int(os.environ.get('RENTAL_STATUS_POLL_INTERVAL') or 5)
+    SCOOTER_STREAM_MAX_CLIENTS = int(os.environ.get('SCOOTER_STREAM_MAX_CLIENTS') or 10000)  # per worker
 
 class DevelopmentConfig(Config):
     DEBUG = True
@@ -32,8 +78,10 @@ class DevelopmentConfig(Config):
 
 class TestingConfig(Config):
     TESTING = True
-    SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
+    # A file database when set, e.g. to share it with the async read service
+    SQLALCHEMY_DATABASE_URI = os.environ.get('TEST_DATABASE_URL') or 'sqlite:///:memory:'
     WTF_CSRF_ENABLED = False
+    RATELIMIT_ENABLED = False
 
 class ProductionConfig(Config):
     DEBUG = False
@@ -5,6 +5,7 @@ Enterprise E-Scooter Rental Platform
 """
 
 import os
+import click
 from app import create_app, db
 from app.models import User, Scooter, Rental, Payment
 
@@ -43,5 +44,89 @@ def create_admin():
     else:
         print('Failed to create admin user.')
 
+@app.cli.command()
+def rebuild_sketches():
+    """Rebuild rental percentile and active-rider sketches"""
+    from app.services.analytics_service import AnalyticsService
+    
+    analytics_service = AnalyticsService()
+    scanned = analytics_service.rebuild_rental_sketches()
+    print(f'Rebuilt percentile sketches from {scanned} completed rentals.')
+    scanned = analytics_service.rebuild_rider_sketches()
+    print(f'Rebuilt active-rider sketches from {scanned} rentals.')
+
+@app.cli.command()
+@click.option('--ids', help='Comma-separated scooter ids')
+@click.option('--provider-id', type=int, help='Print every scooter of a provider')
+@click.option('--format', 'fmt', type=click.Choice(['pdf', 'png']), default='pdf')
+@click.option('--output', default='scooter-labels', help='Output file (without extension)')
+@click.option('--workers', type=int, help='Process pool size (defaults to QR_LABEL_WORKERS)')
+def qr_labels(ids, provider_id, fmt, output, workers):
+    """Render QR label sheets for scooters to PDF or numbered PNG files"""
+    from app.repositories.scooter_repository import ScooterRepository
+    from app.utils.qr_labels import iter_label_sheets, sheet_to_png, stream_pdf
+    
+    scooter_ids = [int(i) for i in ids.split(',')] if ids else None
+    labels = ScooterRepository.get_label_data(scooter_ids, provider_id)
+    if not labels:
+        print('No scooters found.')
+        return
+    
+    workers = workers or app.config.get('QR_LABEL_WORKERS') or None
+    sheets = iter_label_sheets(labels, workers=workers)
+    
+    if fmt == 'pdf':
+        with open(f'{output}.pdf', 'wb') as f:
+            for chunk in stream_pdf(sheets):
+                f.write(chunk)
+        print(f'Wrote {len(labels)} labels to {output}.pdf.')
+    else:
+        for number, sheet in enumerate(sheets, start=1):
+            with open(f'{output}-{number}.png', 'wb') as f:
+                f.write(sheet_to_png(sheet))
+        print(f'Wrote {len(labels)} labels to {number} PNG sheets.')
+
+@app.cli.command()
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--provider-id', type=int, required=True, help='Provider owning the imported scooters')
+@click.option('--batch-size', type=int, help='Rows per INSERT (defaults to SCOOTER_IMPORT_BATCH_SIZE)')
+def import_scooters(path, provider_id, batch_size):
+    """Import scooters from a CSV file (identifier,model,brand,latitude,longitude,...)"""
+    from app.services.scooter_service import ScooterService
+    from app.utils.csv_import import decode_lines
+    
+    batch_size = batch_size or app.config.get('SCOOTER_IMPORT_BATCH_SIZE', 1000)
+    with open(path, 'rb') as f:
+        report, error = ScooterService().import_scooters(decode_lines(f), provider_id, batch_size)
+    
+    if error:
+        raise click.ClickException(error)
+    
+    for entry in report['errors']:
+        print(f"line {entry['line']}: {entry['identifier'] or '-'}: {entry['error']}")
+    print(f"Imported {report['created']} scooters, {report['failed']} rows failed.")
+
+@app.cli.command()
+def compress_static():
+    """Write precompressed .gz (and .br with brotli) variants of static assets"""
+    from app.utils.compression import precompress_static
+    
+    written = precompress_static(app.static_folder)
+    print(f'Wrote {len(written)} precompressed static files.')
+
+@app.cli.command()
+@click.option('--host', default='127.0.0.1')
+@click.option('--port', type=int, default=6380)
+def cache_server(host, port):
+    """Run a local Redis-protocol stand-in for CACHE_BACKEND=redis"""
+    from app.utils.resp_server import LocalRedisServer
+    
+    server = LocalRedisServer(host, port)
+    print(f'Serving {server.url} (Ctrl+C to stop)')
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.server_close()
+
 if __name__ == '__main__':
     app.run(debug=True, host='0.0.0.0', port=5000)
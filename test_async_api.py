@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+"""
+Scooter Share Pro async read service test script
+Drives the ASGI app (asgi.py) in-process against a temporary SQLite file
+read through aiosqlite, and checks every async route against its Flask
+endpoint: same bytes, ETags and errors, long-poll wake-up and event streams.
+
+Run: python test_async_api.py
+"""
+
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+DB_PATH = os.path.join(tempfile.mkdtemp(prefix='ssp-async-'), 'test.db')
+os.environ['TEST_DATABASE_URL'] = f'sqlite:///{DB_PATH}'
+
+from app import create_app, db
+from app.aio import create_asgi_app
+from app.models import User, Scooter, Rental
+from app.services.scooter_service import scooter_events
+
+flask_app = create_app('testing')
+asgi_app = create_asgi_app(flask_app)
+client = flask_app.test_client()
+
+def print_test_header(test_name):
+    """Print test header"""
+    print(f"\n{'='*60}")
+    print(f"🧪 Testing: {test_name}")
+    print(f"{'='*60}")
+
+def check(condition, message):
+    """Print one check; returns its result"""
+    print(f"{'✅' if condition else '❌'} {message}")
+    return condition
+
+def seed():
+    """Create a provider, a customer with an active rental and a small fleet"""
+    with flask_app.app_context():
+        provider = User(email='provider@example.com', password='password123',
+                        first_name='Test', last_name='Provider', role='provider')
+        customer = User(email='customer@example.com', password='password123',
+                        first_name='Test', last_name='Customer')
+        db.session.add_all([provider, customer])
+        db.session.commit()
+
+        for i in range(20):
+            db.session.add(Scooter(identifier=f'ASYNC{i}', model='Test', brand='Test',
+                                   latitude=47.0 + i * 0.001, longitude=8.5,
+                                   provider_id=provider.id))
+        db.session.commit()
+
+        rental = Rental(user_id=customer.id, scooter_id=1, start_latitude=47.0, start_longitude=8.5)
+        db.session.add(rental)
+        db.session.commit()
+        return rental.id
+
+def login(email):
+    """Get an access token through the Flask app"""
+    response = client.post('/api/auth/login', json={'email': email, 'password': 'password123'})
+    return response.get_json()['access_token']
+
+def make_scope(method, path, token=None, headers=(), body=b''):
+    """ASGI HTTP scope for a request"""
+    path, _, query = path.partition('?')
+    raw_headers = [(b'host', b'localhost')]
+    raw_headers += [(name.lower().encode(), value.encode()) for name, value in headers]
+    if token:
+        raw_headers.append((b'authorization', f'Bearer {token}'.encode()))
+    if body:
+        raw_headers += [(b'content-type', b'application/json'),
+                        (b'content-length', str(len(body)).encode())]
+    return {'type': 'http', 'method': method, 'path': path, 'query_string': query.encode(),
+            'headers': raw_headers, 'http_version': '1.1', 'scheme': 'http',
+            'server': ('localhost', 80), 'client': ('127.0.0.1', 50000), 'root_path': ''}
+
+async def call(path, token=None, headers=(), method='GET', body=b'', disconnect=None):
+    """Send one request to the ASGI app; returns {status, headers, body, chunks}"""
+    result = {'body': b'', 'chunks': []}
+    received = False
+
+    async def receive():
+        nonlocal received
+        if not received:
+            received = True
+            return {'type': 'http.request', 'body': body, 'more_body': False}
+        await (disconnect.wait() if disconnect else asyncio.Event().wait())
+        return {'type': 'http.disconnect'}
+
+    async def send(message):
+        if message['type'] == 'http.response.start':
+            result['status'] = message['status']
+            result['headers'] = {k.decode(): v.decode() for k, v in message['headers']}
+        else:
+            result['chunks'].append(message.get('body', b''))
+            result['body'] += message.get('body', b'')
+
+    await asgi_app(make_scope(method, path, token, headers, body), receive, send)
+    return result
+
+async def same_as_flask(path, token=None):
+    """Compare the async response of a GET with the Flask endpoint's"""
+    headers = {'Authorization': f'Bearer {token}'} if token else {}
+    expected = client.get(path, headers=headers)
+    actual = await call(path, token)
+    return (check(actual['status'] == expected.status_code,
+                  f"{path}: status {actual['status']}")
+            & check(actual['body'] == expected.data, f'{path}: same body as Flask')
+            & check(actual['headers'].get('etag') == expected.headers.get('ETag'),
+                    f'{path}: same ETag as Flask'))
+
+async def test_available_scooters(token):
+    """Available scooters: Flask parity and 304 revalidation"""
+    print_test_header('Available Scooters')
+    ok = await same_as_flask('/api/scooters/available', token)
+    ok &= await same_as_flask('/api/scooters/available?fields=id,status&limit=5', token)
+
+    first = await call('/api/scooters/available', token)
+    again = await call('/api/scooters/available', token,
+                       headers=[('If-None-Match', first['headers']['etag'])])
+    return ok & check(again['status'] == 304, 'If-None-Match gives 304')
+
+async def test_nearby_scooters(token):
+    """Nearby scooters: Flask parity, rate-limit headers and validation"""
+    print_test_header('Nearby Scooters')
+    ok = await same_as_flask('/api/scooters/nearby?latitude=47.005&longitude=8.5&radius=1', token)
+    ok &= await same_as_flask('/api/scooters/nearby', token)
+    return ok
+
+async def test_active_rentals(token):
+    """Active rentals of a customer"""
+    print_test_header('Active Rentals')
+    return await same_as_flask('/api/rentals/active', token)
+
+async def test_authentication():
+    """Missing and malformed tokens are rejected like in Flask"""
+    print_test_header('Authentication')
+    ok = await same_as_flask('/api/scooters/available')
+    ok &= await same_as_flask('/api/scooters/available', 'not-a-token')
+    return ok
+
+async def test_flask_fallback(token):
+    """Routes without an async handler run in Flask"""
+    print_test_header('Flask Fallback')
+    body = json.dumps({'email': 'customer@example.com', 'password': 'password123'}).encode()
+    login_response = await call('/api/auth/login', method='POST', body=body)
+    profile = await call('/api/users/me', token)
+    return (check(login_response['status'] == 200, 'POST /api/auth/login via the thread pool')
+            & check(profile['status'] == 200, 'GET /api/users/me via the thread pool'))
+
+async def test_rental_status_long_poll(token, rental_id):
+    """A status long-poll and an event stream both wake when the rental ends"""
+    print_test_header('Rental Status Long-Poll and Scooter Stream')
+    ok = await same_as_flask(f'/api/rentals/{rental_id}/status', token)
+
+    disconnect = asyncio.Event()
+    stream = asyncio.ensure_future(
+        call('/api/scooters/stream?bbox=8.4,46.9,8.6,47.1', token, disconnect=disconnect))
+    started = time.monotonic()
+    poll = asyncio.ensure_future(
+        call(f'/api/rentals/{rental_id}/status?status=active&wait=20', token))
+    await asyncio.sleep(0.3)
+    ok &= check(asgi_app.open_streams == 1 and not poll.done(), 'poll and stream are waiting')
+
+    body = json.dumps({'end_latitude': 47.0, 'end_longitude': 8.5}).encode()
+    ended = await call(f'/api/rentals/{rental_id}/end', token, method='POST', body=body)
+    ok &= check(ended['status'] == 200, 'rental ended through Flask')
+
+    status = await asyncio.wait_for(poll, 5)
+    ok &= check(json.loads(status['body'])['status'] == 'completed'
+                and time.monotonic() - started < 5, 'long-poll answered when the rental ended')
+
+    await asyncio.sleep(0.2)
+    disconnect.set()
+    streamed = await asyncio.wait_for(stream, 5)
+    ok &= check(streamed['headers']['content-type'].startswith('text/event-stream'),
+                'stream is text/event-stream')
+    ok &= check(b'event: scooter' in streamed['body'], 'stream delivered the scooter change')
+    ok &= check(asgi_app.open_streams == 0 and scooter_events.subscriber_count() == 0,
+                'stream closed on disconnect')
+    return ok
+
+async def run_tests():
+    rental_id = seed()
+    customer_token = login('customer@example.com')
+    provider_token = login('provider@example.com')
+
+    results = [
+        ('Available Scooters', await test_available_scooters(provider_token)),
+        ('Nearby Scooters', await test_nearby_scooters(provider_token)),
+        ('Active Rentals', await test_active_rentals(customer_token)),
+        ('Authentication', await test_authentication()),
+        ('Flask Fallback', await test_flask_fallback(customer_token)),
+        ('Long-Poll and Stream', await test_rental_status_long_poll(customer_token, rental_id)),
+    ]
+    await asgi_app.engine.dispose()
+    return results
+
+def main():
+    """Run all async read service tests"""
+    results = asyncio.run(run_tests())
+
+    print(f"\n{'='*60}")
+    print("📊 TEST SUMMARY")
+    print(f"{'='*60}")
+
+    passed = sum(1 for _, result in results if result)
+    for test_name, result in results:
+        print(f"{test_name:<30} {'✅ PASSED' if result else '❌ FAILED'}")
+
+    print(f"\n🎯 Overall Result: {passed}/{len(results)} tests passed")
+    print(f"\n📅 Completed at: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+    return passed == len(results)
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)